@@ -1,22 +1,42 @@
+from backend.startup import startup_timer
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import threading
 
 load_dotenv()
 
 def create_app():
+    startup_timer.mark("create_app")
     app = Flask(__name__)
-    CORS(app)
+    CORS(app, expose_headers=["X-Next-Cursor"])
     app.secret_key = os.urandom(24)
 
     # Register blueprints
-    from routes.api_routes import api_bp
-    from routes.page_routes import page_bp
+    with startup_timer.phase("routes"):
+        from routes.api_routes import api_bp, get_backend, get_tables
+        from routes.page_routes import page_bp
 
     app.register_blueprint(api_bp)
     app.register_blueprint(page_bp)
 
+    # Start from the last registry snapshot instead of cold DynamoDB scans;
+    # with SNAPSHOT_REFRESH_SECONDS set, a background thread also rescans
+    # and keeps the snapshot current (off by default)
+    from backend.snapshot import SnapshotRefresher
+
+    with startup_timer.phase("snapshot"):
+        app.extensions["snapshot"] = SnapshotRefresher(get_tables)
+        app.extensions["snapshot"].start()
+
+    # Bedrock clients and gateway targets are built off the request path
+    from backend.core import BACKEND_PREWARM
+
+    if BACKEND_PREWARM:
+        threading.Thread(target=get_backend, name="backend-warm", daemon=True).start()
+
+    startup_timer.mark("ready")
     return app
 
 # Create the app instance for Vercel
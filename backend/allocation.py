@@ -0,0 +1,159 @@
+from collections import defaultdict
+
+import numpy as np
+
+from backend.scoring import score_matrix
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    # Fallback: the pure numpy solver below
+    linear_sum_assignment = None
+
+
+def _hungarian(cost):
+    """Minimum-cost assignment of every row of a (rows <= cols) cost matrix
+
+    Shortest augmenting path Hungarian algorithm with row/column potentials,
+    O(rows^2 * cols); the inner column scan is vectorized. Rows start on
+    their cheapest free column, so only the conflicts need augmenting.
+    """
+    n, m = cost.shape
+    # Row reduction keeps the duals feasible (v stays <= 0 for spare columns)
+    u = np.zeros(n + 1)
+    u[1:] = cost.min(axis=1)
+    v = np.zeros(m + 1)
+    # assigned[j] = 1-based row holding column j (column 0 is the virtual root)
+    assigned = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    pending = []
+    for i, j in enumerate(cost.argmin(axis=1).tolist(), start=1):
+        if assigned[j + 1]:
+            pending.append(i)
+        else:
+            assigned[j + 1] = i
+
+    for i in pending:
+        assigned[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = assigned[j0]
+            free = ~used[1:]
+            slack = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            j1 = int(candidates.argmin()) + 1
+            delta = candidates[j1 - 1]
+            visited = used.nonzero()[0]
+            u[assigned[visited]] += delta
+            v[visited] -= delta
+            min_slack[1:][free] -= delta
+            j0 = j1
+            if assigned[j0] == 0:
+                break
+        # Flip the augmenting path back to the root
+        while j0:
+            j1 = way[j0]
+            assigned[j0] = assigned[j1]
+            j0 = j1
+
+    cols = np.nonzero(assigned[1:])[0]
+    rows = assigned[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def solve_assignment(weights):
+    """Maximum-weight assignment of a dense (rows, cols) weight matrix
+
+    Returns (rows, cols) index arrays; uses scipy when it is installed.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.size == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(weights, maximize=True)
+
+    # Every row of the narrower side is assigned, so maximizing the weight is
+    # minimizing (max - weight)
+    if weights.shape[0] > weights.shape[1]:
+        cols, rows = _hungarian(weights.max() - weights.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+    return _hungarian(weights.max() - weights)
+
+
+def greedy_assignment(weights):
+    """Baseline: repeatedly take the heaviest edge whose endpoints are both free"""
+    weights = np.asarray(weights, dtype=np.float64)
+    rows, cols = [], []
+    taken_rows, taken_cols = set(), set()
+    limit = min(weights.shape)
+    for flat in np.argsort(-weights, axis=None, kind="stable"):
+        r, c = divmod(int(flat), weights.shape[1])
+        if weights[r, c] <= 0:
+            break
+        if r in taken_rows or c in taken_cols:
+            continue
+        taken_rows.add(r)
+        taken_cols.add(c)
+        rows.append(r)
+        cols.append(c)
+        if len(rows) == limit:
+            break
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+
+SOLVERS = {"optimal": solve_assignment, "greedy": greedy_assignment}
+
+
+def allocate(engine, donors, method="optimal"):
+    """One recipient per donor and one donor per recipient, maximizing total score
+
+    The organ/blood blocking keys split the match graph into independent
+    buckets, so each bucket is solved as its own small dense assignment
+    instead of one sparse donors x recipients problem. Pairs build_match
+    would reject (unknown hospital) or outside the engine's max_distance_km
+    get weight 0 and are never proposed.
+    Returns match payloads in donor order.
+    """
+    solver = SOLVERS[method]
+
+    by_bucket = defaultdict(list)
+    for position, donor in enumerate(donors):
+        by_bucket[engine.donor_key(donor)].append((position, donor))
+
+    allocated = []
+    for key, entries in by_bucket.items():
+        bucket = engine.bucket_for(entries[0][1])
+        if not bucket:
+            continue
+        bucket_donors = [donor for _, donor in entries]
+        scores = score_matrix(*engine.scoring_columns(bucket_donors, bucket))
+
+        donor_known = np.array(
+            [d.get("hospital_id", "") in engine.hospital_lookup for d in bucket_donors], dtype=bool)
+        recipient_known = np.array(
+            [r.get("hospital_id", "") in engine.hospital_lookup for r in bucket], dtype=bool)
+        feasible = donor_known[:, None] & recipient_known[None, :]
+        in_range = engine.radius_mask(bucket_donors, bucket)
+        if in_range is not None:
+            feasible &= in_range
+        weights = np.where(feasible, scores, 0.0)
+
+        rows, cols = solver(weights)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            if weights[r, c] <= 0:
+                continue
+            position, donor = entries[r]
+            allocated.append((position, engine.build_match(donor, bucket[c], float(scores[r, c]))))
+
+    allocated.sort(key=lambda item: item[0])
+    return [match for _, match in allocated]
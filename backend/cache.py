@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Background revalidation for stale-while-revalidate entries
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _background():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+    return _executor
+
+
+def normalize_text_key(value):
+    """Case and whitespace insensitive cache key, e.g. for city names"""
+    return " ".join(str(value).split()).lower()
+
+
+class TTLCache:
+    """Bounded LRU cache with per-entry TTL
+
+    get_or_load() coalesces concurrent misses for a key onto one loader call,
+    and, when stale_ttl is set, serves an expired entry for up to stale_ttl
+    more seconds while a single background call refreshes it. Failed loads
+    are not cached. Uses only the standard library so Lambdas can import it.
+    """
+
+    def __init__(self, ttl, max_entries=256, stale_ttl=0, normalize=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.normalize = normalize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                       "errors": 0, "evictions": 0}
+
+    def _key(self, key):
+        return self.normalize(key) if self.normalize else key
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key, default=None):
+        """Fresh cached value or default; never calls a loader"""
+        key = self._key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(self._key(key), value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(key), None)
+
+    def _load(self, key, loader, future):
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def get_or_load(self, key, loader):
+        """Cached value for key, calling loader() at most once per miss"""
+        key = self._key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                age = time.monotonic() - entry[1]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        future = self._inflight[key] = Future()
+                        _background().submit(self._load, key, loader, future)
+                    return entry[0]
+
+            future = self._inflight.get(key)
+            if future is None:
+                self._stats["misses"] += 1
+                future = self._inflight[key] = Future()
+                leader = True
+            else:
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if leader:
+            self._load(key, loader, future)
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries))
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+# Consecutive failures before a backend is skipped, and for how long
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "2"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "60"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Remembers whether a backend is healthy
+
+    closed: calls go through. After `failure_threshold` consecutive failures
+    the breaker opens and callers skip the backend for `cooldown` seconds.
+    Once the cooldown expires exactly one caller gets a probe (half-open);
+    a success closes the breaker, a failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.failure_latency = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a normal call may go through"""
+        with self._lock:
+            return self.state == CLOSED
+
+    def try_probe(self):
+        """True for exactly one caller once the cooldown has expired"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, latency=0.0):
+        with self._lock:
+            self.failures += 1
+            # Moving average of what a failed call costs, to report savings
+            self.failure_latency = latency if self.failures == 1 else (
+                0.8 * self.failure_latency + 0.2 * latency)
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "failure_latency_ms": round(self.failure_latency * 1000, 1),
+            }
+
+
+class RouteMetrics:
+    """Which path served each call, its latency, and the latency skips saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths = {}
+        self.skipped = 0
+        self.saved_seconds = 0.0
+
+    def record(self, path, latency, success):
+        with self._lock:
+            stats = self.paths.setdefault(
+                path, {"calls": 0, "successes": 0, "failures": 0, "total_latency": 0.0})
+            stats["calls"] += 1
+            stats["successes" if success else "failures"] += 1
+            stats["total_latency"] += latency
+
+    def record_skip(self, saved_latency):
+        with self._lock:
+            self.skipped += 1
+            self.saved_seconds += saved_latency
+
+    def snapshot(self):
+        with self._lock:
+            paths = {
+                path: {
+                    "calls": stats["calls"],
+                    "successes": stats["successes"],
+                    "failures": stats["failures"],
+                    "avg_latency_ms": round(stats["total_latency"] / stats["calls"] * 1000, 1),
+                }
+                for path, stats in self.paths.items()
+            }
+            return {
+                "paths": paths,
+                "skipped_calls": self.skipped,
+                "saved_latency_ms": round(self.saved_seconds * 1000, 1),
+            }
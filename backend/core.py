@@ -1,6 +1,10 @@
-import boto3, os, json, uuid, random
+import os, json, uuid, random, threading, time
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from backend.circuit_breaker import CircuitBreaker, RouteMetrics
+from backend.viability import simulate_viability_batch
+from backend.flight_sim import simulate_flight_search as simulate_flights
 try:
     from backend.utils import simulate_weather_data, simulate_viability_check, simulate_flight_search, simulate_donor_matching
 except ImportError:
@@ -25,6 +29,8 @@ GATEWAY_ID = os.getenv("GATEWAY_ID")
 MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
 AGENT_ID = os.getenv("AGENT_ID")
 AGENT_ALIAS_ID = os.getenv("AGENT_ALIAS_ID")
+# Optional DynamoDB Local / moto server endpoint, e.g. http://localhost:8000
+DYNAMODB_ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL")
 
 # Global variables for lazy initialization
 bedrock_runtime = None
@@ -36,28 +42,65 @@ recipients_table = None
 hospitals_table = None
 AGENTCORE_AVAILABLE = False
 
+# Concurrent gateway calls per batch request
+GATEWAY_FANOUT = int(os.getenv("GATEWAY_FANOUT", "16"))
+# Build the Bedrock clients and discover gateway targets in the background
+# when the app starts; 0 leaves them to the first agent request
+BACKEND_PREWARM = os.getenv("BACKEND_PREWARM", "1") != "0"
+# Seconds a gateway tool call waits for background target discovery before
+# falling back to the local simulation
+GATEWAY_DISCOVERY_TIMEOUT = float(os.getenv("GATEWAY_DISCOVERY_TIMEOUT", "2"))
+
+# boto3 is imported on first use and its default session is not safe to
+# build from several threads at once (request threads and background warmers)
+_aws_lock = threading.Lock()
+
+# Cheap prompt used to check whether a tripped AgentCore path has recovered
+AGENTCORE_PROBE_PROMPT = "ping"
+
+def initialize_tables():
+    """Lazy initialization of the DynamoDB tables only (no Bedrock clients)"""
+    global dynamodb, donors_table, recipients_table, hospitals_table
+    
+    if dynamodb is not None:
+        return
+    with _aws_lock:
+        if dynamodb is not None:
+            return
+        try:
+            import boto3
+            
+            resource = boto3.resource("dynamodb", region_name=REGION, endpoint_url=DYNAMODB_ENDPOINT_URL)
+            donors_table = resource.Table("donors")
+            recipients_table = resource.Table("recipients")
+            hospitals_table = resource.Table("hospitals")
+            # Published last: a caller that sees dynamodb set sees the tables too
+            dynamodb = resource
+        except Exception as e:
+            print(f"⚠️ DynamoDB initialization failed: {e}")
+
 def initialize_aws():
     """Lazy initialization of AWS services"""
-    global bedrock_runtime, bedrock_agent_runtime, agentcore_client, dynamodb
-    global donors_table, recipients_table, hospitals_table, AGENTCORE_AVAILABLE
+    global bedrock_runtime, bedrock_agent_runtime, agentcore_client, AGENTCORE_AVAILABLE
     
-    if bedrock_runtime is None:
+    initialize_tables()
+    if bedrock_runtime is not None:
+        return
+    with _aws_lock:
+        if bedrock_runtime is not None:
+            return
         try:
-            bedrock_runtime = boto3.client("bedrock-runtime", region_name=REGION)
-            bedrock_agent_runtime = boto3.client("bedrock-agent-runtime", region_name=REGION)
+            import boto3
+            
+            agent_runtime = boto3.client("bedrock-agent-runtime", region_name=REGION)
             try:
                 agentcore_client = boto3.client("bedrock-agentcore-control", region_name=REGION)
                 AGENTCORE_AVAILABLE = True
             except Exception:
                 agentcore_client = None
                 AGENTCORE_AVAILABLE = False
-                
-            # DynamoDB connection
-            dynamodb = boto3.resource("dynamodb", region_name=REGION)
-            donors_table = dynamodb.Table("donors")
-            recipients_table = dynamodb.Table("recipients")
-            hospitals_table = dynamodb.Table("hospitals")
-            
+            bedrock_agent_runtime = agent_runtime
+            bedrock_runtime = boto3.client("bedrock-runtime", region_name=REGION)
         except Exception as e:
             print(f"⚠️ AWS initialization failed: {e}")
             bedrock_runtime = None
@@ -77,8 +120,34 @@ class OrganMatchBackend:
         self.agentcore_client = agentcore_client
         self.session_id = str(uuid.uuid4())
         
-        # Load gateway target mappings
-        self.gateway_targets = self._load_gateway_targets() if AGENTCORE_AVAILABLE else {}
+        # Health-aware routing between AgentCore and the direct model
+        self.agentcore_breaker = CircuitBreaker("agentcore")
+        self.route_metrics = RouteMetrics()
+        
+        # Gateway target mappings are discovered in the background so that
+        # constructing the backend never waits on list_gateway_targets
+        self._gateway_targets = {}
+        self._gateway_targets_ready = threading.Event()
+        if AGENTCORE_AVAILABLE and GATEWAY_ID:
+            threading.Thread(target=self._discover_gateway_targets, name="gateway-targets", daemon=True).start()
+        else:
+            self._gateway_targets_ready.set()
+    
+    @property
+    def gateway_targets(self):
+        """Tool name -> gateway target id
+        
+        Waits up to GATEWAY_DISCOVERY_TIMEOUT for discovery; until it
+        finishes the map is empty and callers use the simulation.
+        """
+        self._gateway_targets_ready.wait(GATEWAY_DISCOVERY_TIMEOUT)
+        return self._gateway_targets
+    
+    def _discover_gateway_targets(self):
+        try:
+            self._gateway_targets = self._load_gateway_targets()
+        finally:
+            self._gateway_targets_ready.set()
     
     def _load_gateway_targets(self):
         """Load gateway target mappings for tool invocation"""
@@ -101,33 +170,85 @@ class OrganMatchBackend:
             return {}
     
     def invoke_agent(self, prompt, context=None):
-        """Invoke the OrganMatch agent with context - tries AgentCore first, falls back to direct model"""
-        
-        # Try AgentCore agent first
-        agent_result = self._try_agentcore_invoke(prompt, context)
-        if agent_result["success"]:
-            return agent_result
+        """Invoke the OrganMatch agent with context - uses AgentCore while it is healthy, else the direct model"""
+        
+        # Try AgentCore agent first, unless it is known to be down
+        if self._agentcore_ready():
+            start = time.perf_counter()
+            agent_result = self._try_agentcore_invoke(prompt, context)
+            latency = time.perf_counter() - start
+            self.route_metrics.record("agentcore", latency, agent_result["success"])
+            if agent_result["success"]:
+                self.agentcore_breaker.record_success()
+                agent_result["latency_ms"] = round(latency * 1000, 1)
+                return agent_result
+            self.agentcore_breaker.record_failure(latency)
+        else:
+            self.route_metrics.record_skip(self.agentcore_breaker.failure_latency)
         
         # Fallback to direct model invocation
-        return self._invoke_direct_model(prompt, context)
+        start = time.perf_counter()
+        result = self._invoke_direct_model(prompt, context)
+        latency = time.perf_counter() - start
+        self.route_metrics.record("direct_model", latency, result["success"])
+        result["latency_ms"] = round(latency * 1000, 1)
+        return result
+    
+    def _agentcore_configured(self):
+        return bool(self.bedrock_agent_runtime and AGENT_ID and AGENT_ALIAS_ID)
+    
+    def _agentcore_ready(self):
+        """True if AgentCore should be tried for this call
+        
+        An unconfigured agent is never tried. A tripped breaker skips straight
+        to the direct model and, once its cooldown expires, probes AgentCore
+        on a background thread instead of on a user request.
+        """
+        
+        if not self._agentcore_configured():
+            return False
+        if self.agentcore_breaker.allow():
+            return True
+        if self.agentcore_breaker.try_probe():
+            threading.Thread(target=self._probe_agentcore, daemon=True).start()
+        return False
+    
+    def _probe_agentcore(self):
+        start = time.perf_counter()
+        # A throwaway session keeps probe turns out of the user's conversation memory
+        result = self._try_agentcore_invoke(AGENTCORE_PROBE_PROMPT, session_id=f"probe-{uuid.uuid4()}")
+        latency = time.perf_counter() - start
+        if result["success"]:
+            self.agentcore_breaker.record_success()
+        else:
+            self.agentcore_breaker.record_failure(latency)
+        print(f"🔎 AgentCore probe: {'healthy' if result['success'] else 'still failing'}")
+    
+    def routing_status(self):
+        """Breaker state and per-path routing metrics"""
+        return {
+            "agentcore_configured": self._agentcore_configured(),
+            "agentcore": self.agentcore_breaker.snapshot(),
+            **self.route_metrics.snapshot()
+        }
+    
+    def _agent_input_text(self, prompt, context=None):
+        """Prompt for the Bedrock agent, prefixed with any context"""
+        if context:
+            context_str = f"Context: {json.dumps(context, indent=2)}\n\n"
+            return f"{context_str}{prompt}"
+        return prompt
     
-    def _try_agentcore_invoke(self, prompt, context=None):
-        """Try to invoke the actual Bedrock agent"""
+    def _try_agentcore_invoke(self, prompt, context=None, session_id=None):
+        """Try to invoke the actual Bedrock agent (in the user's session unless one is given)"""
         
         try:
-            # Prepare the input text
-            if context:
-                context_str = f"Context: {json.dumps(context, indent=2)}\n\n"
-                input_text = f"{context_str}{prompt}"
-            else:
-                input_text = prompt
-            
             # Invoke the agent
             response = self.bedrock_agent_runtime.invoke_agent(
                 agentId=AGENT_ID,
                 agentAliasId=AGENT_ALIAS_ID,
-                sessionId=self.session_id,
-                inputText=input_text,
+                sessionId=session_id or self.session_id,
+                inputText=self._agent_input_text(prompt, context),
                 enableTrace=True
             )
             
@@ -159,8 +280,8 @@ class OrganMatchBackend:
                 "method": "agentcore"
             }
     
-    def _invoke_direct_model(self, prompt, context=None):
-        """Fallback to direct model invocation"""
+    def _direct_model_body(self, prompt, context=None):
+        """Request body for direct (non-agent) Claude invocation"""
         
         system_prompt = """You are OrganMatch AI Assistant, a specialized medical logistics AI that helps hospitals and transplant coordinators manage organ transplantation workflows.
 
@@ -197,7 +318,7 @@ Always format your responses with proper structure, bullet points for key inform
         else:
             full_prompt = f"{system_prompt}\n\nUser: {prompt}\n\nOrganMatch Agent:"
         
-        body = json.dumps({
+        return json.dumps({
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 800,
             "messages": [
@@ -207,6 +328,11 @@ Always format your responses with proper structure, bullet points for key inform
                 }
             ]
         })
+    
+    def _invoke_direct_model(self, prompt, context=None):
+        """Fallback to direct model invocation"""
+        
+        body = self._direct_model_body(prompt, context)
         
         try:
             response = self.bedrock_runtime.invoke_model(
@@ -228,6 +354,79 @@ Always format your responses with proper structure, bullet points for key inform
                 "method": "direct_model"
             }
     
+    def invoke_agent_stream(self, prompt, context=None):
+        """Streaming invoke_agent: yields events as the completion arrives
+        
+        Events are dicts: {"type": "chunk", "text": ...} for each piece of
+        text, then {"type": "done", "method": ...} or {"type": "error", ...}.
+        If AgentCore fails before sending any text, the direct model is used.
+        """
+        
+        if self._agentcore_ready():
+            started = False
+            start = time.perf_counter()
+            try:
+                for text in self._stream_agentcore(prompt, context):
+                    started = True
+                    yield {"type": "chunk", "text": text}
+                self.agentcore_breaker.record_success()
+                self.route_metrics.record("agentcore", time.perf_counter() - start, True)
+                yield {"type": "done", "method": "agentcore"}
+                return
+            except Exception as e:
+                latency = time.perf_counter() - start
+                self.agentcore_breaker.record_failure(latency)
+                self.route_metrics.record("agentcore", latency, False)
+                if started:
+                    yield {"type": "error", "error": str(e), "method": "agentcore"}
+                    return
+        else:
+            self.route_metrics.record_skip(self.agentcore_breaker.failure_latency)
+        
+        start = time.perf_counter()
+        try:
+            for text in self._stream_direct_model(prompt, context):
+                yield {"type": "chunk", "text": text}
+            self.route_metrics.record("direct_model", time.perf_counter() - start, True)
+            yield {"type": "done", "method": "direct_model"}
+        except Exception as e:
+            self.route_metrics.record("direct_model", time.perf_counter() - start, False)
+            yield {"type": "error", "error": str(e), "method": "direct_model"}
+    
+    def _stream_agentcore(self, prompt, context=None):
+        """Text chunks from the Bedrock agent's completion stream as they arrive"""
+        
+        response = self.bedrock_agent_runtime.invoke_agent(
+            agentId=AGENT_ID,
+            agentAliasId=AGENT_ALIAS_ID,
+            sessionId=self.session_id,
+            inputText=self._agent_input_text(prompt, context),
+            enableTrace=True
+        )
+        
+        for event in response['completion']:
+            chunk = event.get('chunk')
+            if chunk and 'bytes' in chunk:
+                yield chunk['bytes'].decode('utf-8')
+    
+    def _stream_direct_model(self, prompt, context=None):
+        """Text deltas from invoke_model_with_response_stream"""
+        
+        response = self.bedrock_runtime.invoke_model_with_response_stream(
+            modelId=MODEL_ID,
+            body=self._direct_model_body(prompt, context)
+        )
+        
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            payload = json.loads(chunk['bytes'])
+            if payload.get('type') == 'content_block_delta':
+                text = payload.get('delta', {}).get('text')
+                if text:
+                    yield text
+    
     def invoke_gateway_tool(self, tool_name, parameters):
         """Invoke a specific gateway tool via AgentCore"""
         
@@ -294,6 +493,35 @@ Always format your responses with proper structure, bullet points for key inform
         # Fallback to simulation
         return self._simulate_viability_check(organ_data)
     
+    def check_viability_batch(self, organs):
+        """check_viability for many organs, with a result (or error) per item
+        
+        Through the gateway the calls fan out concurrently, and whatever
+        check_viability returns (gateway result, its own simulation fallback
+        or an error) is kept. Only items it never ran (non-objects, or no
+        gateway at all) are scored in one vectorized simulation pass.
+        """
+        
+        results = [None] * len(organs)
+        
+        if AGENTCORE_AVAILABLE and "viability-tool" in self.gateway_targets:
+            def via_gateway(organ):
+                try:
+                    return self.check_viability(organ) if isinstance(organ, dict) else None
+                except Exception as e:
+                    return {"error": str(e)}
+            
+            with ThreadPoolExecutor(max_workers=GATEWAY_FANOUT) as pool:
+                for i, result in enumerate(pool.map(via_gateway, organs)):
+                    if result is not None:
+                        results[i] = result
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        simulated = simulate_viability_batch([organs[i] for i in pending])
+        for i, result in zip(pending, simulated):
+            results[i] = result
+        return results
+    
     def _simulate_viability_check(self, organ_data):
         """Simulate organ viability checking"""
         
@@ -410,43 +638,8 @@ Always format your responses with proper structure, bullet points for key inform
         return self._simulate_flight_search(origin, destination, date)
     
     def _simulate_flight_search(self, origin, destination, date=None):
-        """Simulate flight search"""
-        
-        # Simulate flight data
-        flights = [
-            {
-                "flight": f"AA{123 + hash(origin) % 900}",
-                "departure": "14:30",
-                "arrival": "18:45", 
-                "duration": "6h 15m",
-                "aircraft": "Boeing 737",
-                "price": "$450"
-            },
-            {
-                "flight": f"DL{456 + hash(destination) % 900}",
-                "departure": "16:00",
-                "arrival": "20:30",
-                "duration": "6h 30m", 
-                "aircraft": "Airbus A320",
-                "price": "$380"
-            },
-            {
-                "flight": f"UA{789 + hash(origin + destination) % 900}",
-                "departure": "18:15",
-                "arrival": "22:45",
-                "duration": "6h 30m",
-                "aircraft": "Boeing 757",
-                "price": "$420"
-            }
-        ]
-        
-        return {
-            "flights": flights,
-            "fastest_flight": flights[0]["flight"],
-            "cheapest_flight": flights[1]["flight"],
-            "recommendation": f"Book {flights[0]['flight']} for fastest transport",
-            "method": "simulation"
-        }
+        """Simulate flight search (deterministic and memoized per route and day)"""
+        return simulate_flights(origin, destination, date)
     
     def match_donor_recipient(self, donor_data, recipient_data):
         """Match donor-recipient - tries gateway first, falls back to simulation"""
@@ -0,0 +1,243 @@
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+# Seconds a cached table scan is served before it is read again
+TABLE_CACHE_TTL = float(os.getenv("TABLE_CACHE_TTL", "60"))
+# Parallel scan segments (DynamoDB Segment/TotalSegments); 1 disables parallelism
+SCAN_SEGMENTS = int(os.getenv("SCAN_SEGMENTS", "4"))
+# Largest page a list endpoint may request
+MAX_PAGE_SIZE = 100
+# Minimum items evaluated per read when filling a filtered page
+SCAN_READ_AHEAD = 50
+
+
+def scan_all(table, **scan_kwargs):
+    """Scan every page of a table, following LastEvaluatedKey"""
+    items = []
+    kwargs = dict(scan_kwargs)
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get("Items", []))
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return items
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def query_all(table, index_name, key_condition, **query_kwargs):
+    """Every page of a Query on a table or one of its indexes"""
+    items = []
+    kwargs = dict(query_kwargs, KeyConditionExpression=key_condition)
+    if index_name:
+        kwargs["IndexName"] = index_name
+    while True:
+        response = table.query(**kwargs)
+        items.extend(response.get("Items", []))
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return items
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def parallel_scan(table, segments=None, **scan_kwargs):
+    """Full table scan split into DynamoDB segments read on a thread pool
+
+    Each segment is paginated on its own; results are concatenated in segment
+    order. The underlying boto3 client is thread-safe, so the table is shared.
+    """
+    segments = segments or SCAN_SEGMENTS
+    if segments <= 1:
+        return scan_all(table, **scan_kwargs)
+
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        futures = [
+            pool.submit(scan_all, table, Segment=segment, TotalSegments=segments, **scan_kwargs)
+            for segment in range(segments)
+        ]
+        items = []
+        for future in futures:
+            items.extend(future.result())
+    return items
+
+
+class InvalidCursor(ValueError):
+    """A paging cursor that was not produced by encode_cursor"""
+
+
+def json_default(value):
+    """json.dumps default for DynamoDB numbers: Decimal -> int or float"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as JSON")
+
+
+def encode_cursor(key):
+    """Opaque, URL-safe cursor for an ExclusiveStartKey"""
+    if not key:
+        return None
+    raw = json.dumps(key, default=json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """ExclusiveStartKey from a cursor; raises InvalidCursor if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")), parse_float=Decimal)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(key, dict):
+        raise InvalidCursor("Invalid cursor")
+    return key
+
+
+def equals_number(field, value):
+    """Match a numeric attribute whether it is stored typed (N) or as a legacy string"""
+    variants = [value]
+    try:
+        variants.append(Decimal(value))
+    except ArithmeticError:
+        pass
+    from boto3.dynamodb.conditions import Attr
+
+    return Attr(field).is_in(variants)
+
+
+def equals_any_case(field, value):
+    """Filter on a string attribute regardless of how it was capitalised"""
+    variants = sorted({value, value.lower(), value.upper(), value.title()})
+    from boto3.dynamodb.conditions import Attr
+
+    return Attr(field).is_in(variants)
+
+
+def build_filter(conditions):
+    """AND together the conditions that are not None (None if there are none)"""
+    expression = None
+    for condition in conditions:
+        if condition is None:
+            continue
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _key_names(table):
+    return [key["AttributeName"] for key in table.key_schema]
+
+
+def scan_page(table, limit, cursor=None, filter_expression=None, projection=None,
+              key_condition=None, index_name=None, index_keys=(), keep=None):
+    """One page of up to `limit` items matching the filter, plus the next cursor
+
+    The filter and projection run inside DynamoDB, so only matching items (and
+    only the projected attributes) come back over the wire. When a read
+    returns more matches than the page needs, the cursor resumes right after
+    the last item kept, so no rows are skipped. With a key_condition the page
+    is read with Query (on index_name, whose key attributes are index_keys)
+    instead of Scan. keep, if given, is a predicate applied to each item read,
+    for conditions DynamoDB cannot evaluate.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    # An index cursor needs the index keys as well as the table key
+    key_names = list(dict.fromkeys(_key_names(table) + list(index_keys)))
+    kwargs = {}
+    read = table.scan
+    if key_condition is not None:
+        read = table.query
+        kwargs["KeyConditionExpression"] = key_condition
+        if index_name:
+            kwargs["IndexName"] = index_name
+    if filter_expression is not None:
+        kwargs["FilterExpression"] = filter_expression
+    if projection:
+        # Placeholders keep reserved words like "name" and "location" usable;
+        # key attributes are always projected so the cursor can be built
+        fields = list(dict.fromkeys(list(projection) + key_names))
+        names = {f"#proj{i}": field for i, field in enumerate(fields)}
+        kwargs["ProjectionExpression"] = ", ".join(names)
+        kwargs["ExpressionAttributeNames"] = names
+
+    start_key = decode_cursor(cursor)
+    items = []
+    while len(items) < limit:
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        # Filters apply after Limit, so read a little ahead of what is missing
+        kwargs["Limit"] = max(limit - len(items), SCAN_READ_AHEAD)
+        response = read(**kwargs)
+        page = response.get("Items", [])
+        if keep is not None:
+            page = [item for item in page if keep(item)]
+        start_key = response.get("LastEvaluatedKey")
+
+        remaining = limit - len(items)
+        if len(page) > remaining:
+            page = page[:remaining]
+            start_key = {name: page[-1][name] for name in key_names}
+        items.extend(page)
+        if not start_key:
+            break
+
+    return items, encode_cursor(start_key)
+
+
+class TableCache:
+    """TTL-bounded in-process cache of full table scans
+
+    One instance is shared by every route so a table is read at most once per
+    TTL window. Concurrent misses for the same table wait on a per-table lock
+    and reuse the first caller's scan. Cached lists are shared: do not mutate.
+    """
+
+    def __init__(self, ttl=None, segments=None):
+        self.ttl = TABLE_CACHE_TTL if ttl is None else ttl
+        self.segments = segments
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _table_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def _fresh(self, name):
+        entry = self._entries.get(name)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def get(self, table):
+        """All items of the table, served from cache while fresh"""
+        items = self._fresh(table.name)
+        if items is not None:
+            return items
+
+        with self._table_lock(table.name):
+            items = self._fresh(table.name)
+            if items is None:
+                items = parallel_scan(table, self.segments)
+                self._entries[table.name] = (time.monotonic() + self.ttl, items)
+            return items
+
+    def put(self, name, items):
+        """Serve these items for a table (e.g. from a snapshot or a background scan) for one TTL"""
+        with self._table_lock(name):
+            self._entries[name] = (time.monotonic() + self.ttl, items)
+
+    def invalidate(self, name=None):
+        """Drop one table (or every table) from the cache"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+
+# Shared by all routes
+table_cache = TableCache()
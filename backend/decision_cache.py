@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from backend.cache import TTLCache
+
+DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL", "900"))
+DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "512"))
+# After an AI failure, serve the rule-based decision for this long before retrying
+DECISION_RETRY_AFTER = float(os.getenv("DECISION_RETRY_AFTER", "30"))
+# Optional SQLite file so decisions survive restarts and are shared by workers
+DECISION_CACHE_PATH = os.getenv("DECISION_CACHE_PATH")
+
+# Context fields that do not change the decision
+VOLATILE_FIELDS = ("timestamp",)
+
+# Expired rows are purged from disk every this many writes
+_PURGE_EVERY = 100
+
+
+def decision_key(kind, context, prompt=""):
+    """Canonical hash of everything that feeds a transport decision"""
+    relevant = {k: v for k, v in context.items() if k not in VOLATILE_FIELDS}
+    canonical = json.dumps(
+        {"kind": kind, "context": relevant, "prompt": prompt},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """Bounded in-memory decision cache with optional SQLite persistence"""
+
+    def __init__(self, ttl=DECISION_CACHE_TTL, max_entries=DECISION_CACHE_SIZE, path=DECISION_CACHE_PATH,
+                 retry_after=DECISION_RETRY_AFTER):
+        self.ttl = ttl
+        self.memory = TTLCache(ttl, max_entries=max_entries)
+        self.failures = TTLCache(retry_after, max_entries=max_entries)
+        self.path = path
+        self.disk_hits = 0
+        self._db = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        return self._db
+
+    def _disk_get(self, key):
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT value FROM decisions WHERE key = ? AND created > ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+            if row:
+                self.disk_hits += 1
+        return json.loads(row[0]) if row else None
+
+    def _disk_set(self, key, value):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO decisions (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), time.time()),
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                db.execute("DELETE FROM decisions WHERE created <= ?", (time.time() - self.ttl,))
+            db.commit()
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.path:
+            try:
+                value = self._disk_get(key)
+            except sqlite3.Error as e:
+                print(f"⚠️ Decision cache read failed: {e}")
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.path:
+            try:
+                self._disk_set(key, value)
+            except sqlite3.Error as e:
+                print(f"⚠️ Decision cache write failed: {e}")
+
+    def mark_failed(self, key, fallback):
+        """Remember that computing this decision failed; fallback is served for retry_after seconds"""
+        self.failures.set(key, fallback)
+
+    def fallback(self, key):
+        """The fallback decision stored by a recent failure, or None"""
+        return self.failures.get(key)
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["persistent"] = bool(self.path)
+        return stats
+
+
+# Shared by /api/agent-transport-decision
+decision_cache = DecisionCache()
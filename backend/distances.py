@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from backend.data_access import table_cache
+from backend.geo import coordinates, distance_matrix
+
+KM_TO_MILES = 0.621371
+# Optional .npy file; the matrix is saved there and memory-mapped on reuse
+DISTANCE_MATRIX_PATH = os.getenv("DISTANCE_MATRIX_PATH")
+
+
+def _signature(hospitals):
+    """(hospital_id, lat, lon) for every hospital, in a stable order"""
+    rows = []
+    for hospital in hospitals:
+        hospital_id = hospital.get("hospital_id") or hospital.get("id")
+        if hospital_id:
+            point = coordinates(hospital) or (None, None)
+            rows.append((hospital_id, point[0], point[1]))
+    return sorted(rows, key=lambda row: row[0])
+
+
+class HospitalDistances:
+    """Precomputed hospital x hospital great-circle distances
+
+    The full matrix is built once with NumPy (100 hospitals = 10k pairs) and
+    rebuilt only when a hospital is added, removed or moved; every lookup
+    after that is two dict hits and an array index. The id index and the
+    matrix are published together as one tuple, so a lookup racing a
+    rebuild sees either the old pair or the new one, never a mix.
+    """
+
+    def __init__(self, hospitals=None, path=DISTANCE_MATRIX_PATH):
+        if path and not path.endswith(".npy"):
+            path += ".npy"
+        self.path = path
+        self._grid = ({}, np.zeros((0, 0), dtype=np.float32))
+        self._signature = None
+        self._source = None
+        self._lock = threading.Lock()
+        if hospitals:
+            self.refresh(hospitals)
+
+    def refresh(self, hospitals):
+        """Rebuild the matrix if the hospitals or their locations changed"""
+        with self._lock:
+            if hospitals is self._source:
+                return
+            signature = _signature(hospitals)
+            if signature != self._signature:
+                self._build(signature)
+            self._source = hospitals
+
+    def _build(self, signature):
+        ids = [row[0] for row in signature]
+        matrix = self._load(signature)
+        if matrix is None:
+            points = [(np.nan, np.nan) if row[1] is None else row[1:] for row in signature]
+            matrix = distance_matrix(points).astype(np.float32)
+            self._save(signature, matrix)
+        self._grid = ({hospital_id: i for i, hospital_id in enumerate(ids)}, matrix)
+        self._signature = signature
+
+    def _load(self, signature):
+        """The saved matrix, memory-mapped, if it was built for these hospitals"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path + ".hospitals.json", encoding="utf-8") as f:
+                if json.load(f) != [list(row) for row in signature]:
+                    return None
+            return np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not reuse distance matrix at {self.path}: {e}")
+            return None
+
+    def _save(self, signature, matrix):
+        if not self.path:
+            return
+        try:
+            # Write beside the old file and swap, so live memory maps keep their data
+            tmp = self.path + ".tmp.npy"
+            np.save(tmp, matrix)
+            with open(self.path + ".hospitals.json.tmp", "w", encoding="utf-8") as f:
+                json.dump(signature, f)
+            os.replace(tmp, self.path)
+            os.replace(self.path + ".hospitals.json.tmp", self.path + ".hospitals.json")
+        except OSError as e:
+            print(f"⚠️ Could not save distance matrix to {self.path}: {e}")
+
+    @property
+    def index(self):
+        return self._grid[0]
+
+    @property
+    def matrix(self):
+        return self._grid[1]
+
+    def km(self, origin_id, destination_id):
+        """Distance between two hospitals in km, or None if either is unknown"""
+        index, matrix = self._grid
+        i = index.get(origin_id)
+        j = index.get(destination_id)
+        if i is None or j is None:
+            return None
+        distance = float(matrix[i, j])
+        return None if np.isnan(distance) else distance
+
+    def miles(self, origin_id, destination_id):
+        distance = self.km(origin_id, destination_id)
+        return None if distance is None else distance * KM_TO_MILES
+
+    def __len__(self):
+        return len(self.index)
+
+
+# Shared by the API routes
+hospital_distances = HospitalDistances()
+
+
+def get_hospital_distances(hospitals_table):
+    """The shared matrix, refreshed from the cached hospitals scan"""
+    hospital_distances.refresh(table_cache.get(hospitals_table))
+    return hospital_distances
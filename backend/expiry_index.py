@@ -0,0 +1,142 @@
+import bisect
+import math
+import threading
+import time
+from datetime import datetime
+
+from backend.data_access import table_cache
+from backend.viability import MAX_HOURS, DEFAULT_MAX_HOURS
+
+# Viability threshold used by the simulation: viable while hours_left > 0.5
+VIABLE_HOURS_LEFT = 0.5
+
+
+def _epoch(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def compute_expiry(donor):
+    """Epoch seconds at which a donor organ stops being viable, or None
+
+    Solves the simulation's hours_left = (max_hours - elapsed) * temp_factor
+    * condition_factor for hours_left = 0.5, then caps it at available_until.
+    """
+    time_of_death = _epoch(donor.get("time_of_death"))
+    available_until = _epoch(donor.get("available_until"))
+    if time_of_death is None:
+        return available_until
+
+    try:
+        temperature = float(donor.get("temperature", 4))
+        condition = float(donor.get("organ_condition_score", donor.get("condition_score", 85)))
+    except (TypeError, ValueError):
+        return available_until
+    if not (math.isfinite(temperature) and math.isfinite(condition)):
+        return available_until
+
+    max_hours = MAX_HOURS.get(str(donor.get("organ_type", "")).lower(), DEFAULT_MAX_HOURS)
+    factor = (1.0 if temperature <= 4 else 0.7) * condition / 100
+    if factor <= 0:
+        expiry = time_of_death
+    else:
+        expiry = time_of_death + (max_hours - VIABLE_HOURS_LEFT / factor) * 3600
+
+    return expiry if available_until is None else min(expiry, available_until)
+
+
+class ExpiryIndex:
+    """Donor organs ordered by computed expiry time
+
+    A sorted list of (expiry, donor_id) answers "soonest to expire" with one
+    binary search; refresh()/upsert()/remove() keep it current as donors
+    change without rescoring the rest.
+    """
+
+    def __init__(self, donors=None):
+        self._order = []
+        self._entries = {}
+        self._source = None
+        self._lock = threading.Lock()
+        if donors:
+            self.refresh(donors)
+
+    def _insert(self, donor_id, donor):
+        expiry = compute_expiry(donor)
+        # NaN would break the sort order every lookup relies on
+        if expiry is None or not math.isfinite(expiry):
+            return
+        self._entries[donor_id] = (expiry, donor)
+        bisect.insort(self._order, (expiry, donor_id))
+
+    def _discard(self, donor_id):
+        entry = self._entries.pop(donor_id, None)
+        if entry is None:
+            return
+        i = bisect.bisect_left(self._order, (entry[0], donor_id))
+        if i < len(self._order) and self._order[i] == (entry[0], donor_id):
+            del self._order[i]
+
+    def upsert(self, donor):
+        donor_id = donor.get("donor_id")
+        if not donor_id:
+            return
+        with self._lock:
+            current = self._entries.get(donor_id)
+            if current is None or current[1] != donor:
+                self._discard(donor_id)
+                self._insert(donor_id, donor)
+                self._source = None
+
+    def remove(self, donor_id):
+        with self._lock:
+            self._discard(donor_id)
+            self._source = None
+
+    def refresh(self, donors):
+        """Sync with a full donor list, re-indexing only rows that changed"""
+        with self._lock:
+            if donors is self._source:
+                return
+            seen = set()
+            for donor in donors:
+                donor_id = donor.get("donor_id")
+                if not donor_id:
+                    continue
+                seen.add(donor_id)
+                current = self._entries.get(donor_id)
+                if current is not None and current[1] == donor:
+                    continue
+                self._discard(donor_id)
+                self._insert(donor_id, donor)
+            for donor_id in [d for d in self._entries if d not in seen]:
+                self._discard(donor_id)
+            self._source = donors
+
+    def soonest(self, limit=10, within_hours=None, now=None):
+        """Most urgent still-viable organs, soonest expiry first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            start = bisect.bisect_right(self._order, (now, chr(0x10FFFF)))
+            stop = len(self._order)
+            if within_hours is not None:
+                stop = bisect.bisect_right(self._order, (now + within_hours * 3600, chr(0x10FFFF)))
+            window = self._order[start:min(stop, start + limit)]
+            return [(expiry, self._entries[donor_id][1]) for expiry, donor_id in window]
+
+    def __len__(self):
+        return len(self._order)
+
+
+# Shared by the API routes
+expiry_index = ExpiryIndex()
+
+
+def get_expiry_index(donors_table):
+    """The shared index, refreshed from the cached donors scan"""
+    expiry_index.refresh(table_cache.get(donors_table))
+    return expiry_index
@@ -0,0 +1,243 @@
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+FLIGHTS_CACHE_PATH = os.getenv(
+    "FLIGHTS_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "flights_cache.json"),
+)
+
+# Year for flights_cache.json's year-less times ("07:00, Oct 20"). Unset: the
+# year of the S3 schedule it is combined with, else the current year.
+FLIGHTS_CACHE_YEAR = os.getenv("FLIGHTS_CACHE_YEAR")
+
+# flights_cache.json times are local to each airport; airports not listed
+# here are taken as UTC
+AIRPORT_TIMEZONES = {
+    "BOS": "America/New_York",
+    "JFK": "America/New_York",
+    "LAX": "America/Los_Angeles",
+    "SFO": "America/Los_Angeles",
+}
+
+SOURCES = ("s3", "cache", "simulated")
+
+_DURATION = re.compile(r"^\s*(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?\s*$")
+
+
+def _epoch(value):
+    """Epoch seconds for an ISO timestamp; naive values are taken as UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _airport_zone(code):
+    name = AIRPORT_TIMEZONES.get(code.upper())
+    if name is None:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        return timezone.utc
+
+
+def cache_year(rows=()):
+    """FLIGHTS_CACHE_YEAR if set, else the most common departure year among
+    normalized rows (e.g. the S3 schedule), else the current UTC year"""
+    if FLIGHTS_CACHE_YEAR:
+        return int(FLIGHTS_CACHE_YEAR)
+    years = Counter(datetime.fromtimestamp(row["departure"], timezone.utc).year for row in rows)
+    if years:
+        return years.most_common(1)[0][0]
+    return datetime.now(timezone.utc).year
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(int(epoch), timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _price(value):
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _row(airline, flight_number, origin, destination, departure, arrival, price, source):
+    return {
+        "airline": airline or "",
+        "flight_number": flight_number or "",
+        "origin": origin.upper(),
+        "destination": destination.upper(),
+        "departure": departure,
+        "arrival": arrival,
+        "duration_minutes": int(round((arrival - departure) / 60)),
+        "price": price,
+        "source": source,
+    }
+
+
+def normalize_mock(flights, source="s3"):
+    """mock_flights.json schema: from/to, ISO departure/arrival, duration_hr"""
+    rows = []
+    for f in flights:
+        if not (f.get("from") and f.get("to") and f.get("departure")):
+            continue
+        departure = _epoch(f["departure"])
+        if f.get("arrival"):
+            arrival = _epoch(f["arrival"])
+        elif f.get("duration_hr") is not None:
+            arrival = departure + int(round(float(f["duration_hr"]) * 3600))
+        else:
+            continue
+        rows.append(_row(f.get("airline"), f.get("flight_number"), f["from"], f["to"],
+                         departure, arrival, _price(f.get("price")), source))
+    return rows
+
+
+def normalize_cache(cache, year=None):
+    """flights_cache.json schema: {"LAX-BOS": [{FlightNumber, DepartureTime "07:00, Oct 20", DurationMinutes}]}
+
+    The free-text times carry no year (cache_year() when not given) and are
+    local to each airport: departures are read in the origin's timezone
+    (AIRPORT_TIMEZONES), and the arrival is departure + DurationMinutes
+    rather than the parsed ArrivalTime.
+    """
+    year = year or cache_year()
+    rows = []
+    for route, flights in cache.items():
+        origin, _, destination = route.partition("-")
+        if not origin or not destination:
+            continue
+        for f in flights:
+            try:
+                departure = int(datetime.strptime(f"{f['DepartureTime']} {year}", "%H:%M, %b %d %Y")
+                                .replace(tzinfo=_airport_zone(origin)).timestamp())
+            except (KeyError, ValueError):
+                continue
+            minutes = f.get("DurationMinutes")
+            if minutes is None:
+                continue
+            rows.append(_row(f.get("Airline"), f.get("FlightNumber"), origin, destination,
+                             departure, departure + int(minutes) * 60, _price(f.get("Price")), "cache"))
+    return rows
+
+
+def normalize_simulated(flights, origin, destination, date=None):
+    """Simulated search results: "14:30" departures, "6h 15m" durations, "$450" prices
+
+    Arrivals on a later day than the departure carry a "+N" day marker ("01:30+1").
+    """
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    if date:
+        try:
+            day = datetime.strptime(str(date)[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    rows = []
+    for f in flights:
+        departure = _epoch(f"{day}T{f['departure']}:00")
+        match = _DURATION.match(f.get("duration", ""))
+        if match and any(match.groups()):
+            arrival = departure + int(match.group(1) or 0) * 3600 + int(match.group(2) or 0) * 60
+        else:
+            clock, _, days = f["arrival"].partition("+")
+            arrival = _epoch(f"{day}T{clock}:00") + int(days or 0) * 24 * 3600
+            if arrival < departure:
+                arrival += 24 * 3600
+        airline = f.get("flight", "")[:2]
+        rows.append(_row(airline, f.get("flight"), origin, destination,
+                         departure, arrival, _price(f.get("price")), "simulated"))
+    return rows
+
+
+def load_flights_cache(path=FLIGHTS_CACHE_PATH, year=None):
+    """Normalized rows from flights_cache.json, or [] if the file is missing"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return normalize_cache(json.load(f), year)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load flight cache {path}: {e}")
+        return []
+
+
+class FlightTable:
+    """Normalized flights stored column by column
+
+    Airports, airlines and sources are small integer codes, times are epoch
+    seconds and durations integer minutes, so sorting and filtering never
+    touch strings. Each route's rows are pre-sorted by departure.
+    """
+
+    def __init__(self, rows):
+        self.airports = sorted({r["origin"] for r in rows} | {r["destination"] for r in rows})
+        self.airlines = sorted({r["airline"] for r in rows})
+        airport_codes = {code: i for i, code in enumerate(self.airports)}
+        airline_codes = {name: i for i, name in enumerate(self.airlines)}
+
+        self.origin = np.array([airport_codes[r["origin"]] for r in rows], dtype=np.int32)
+        self.destination = np.array([airport_codes[r["destination"]] for r in rows], dtype=np.int32)
+        self.airline = np.array([airline_codes[r["airline"]] for r in rows], dtype=np.int32)
+        self.flight_number = np.array([r["flight_number"] for r in rows], dtype=str)
+        self.departure = np.array([r["departure"] for r in rows], dtype=np.int64)
+        self.arrival = np.array([r["arrival"] for r in rows], dtype=np.int64)
+        self.duration_minutes = np.array([r["duration_minutes"] for r in rows], dtype=np.int32)
+        self.price = np.array([np.nan if r["price"] is None else r["price"] for r in rows], dtype=np.float32)
+        self.source = np.array([SOURCES.index(r["source"]) for r in rows], dtype=np.int8)
+
+        self._airport_codes = airport_codes
+        self._routes = {}
+        order = np.lexsort((self.departure, self.destination, self.origin))
+        if len(order):
+            pairs = self.origin[order].astype(np.int64) * len(self.airports) + self.destination[order]
+            bounds = np.flatnonzero(np.diff(pairs)) + 1
+            for chunk in np.split(order, bounds):
+                self._routes[(int(self.origin[chunk[0]]), int(self.destination[chunk[0]]))] = chunk
+
+    @classmethod
+    def from_sources(cls, *row_lists):
+        return cls([row for rows in row_lists for row in rows])
+
+    def __len__(self):
+        return len(self.departure)
+
+    def route(self, origin, destination, depart_after=None, depart_before=None):
+        """Row numbers for a route, by departure, optionally within a time window"""
+        o = self._airport_codes.get((origin or "").upper())
+        d = self._airport_codes.get((destination or "").upper())
+        rows = self._routes.get((o, d))
+        if rows is None:
+            return np.array([], dtype=np.int64)
+        departures = self.departure[rows]
+        lo = 0 if depart_after is None else np.searchsorted(departures, depart_after, side="left")
+        hi = len(rows) if depart_before is None else np.searchsorted(departures, depart_before, side="right")
+        return rows[lo:hi]
+
+    def record(self, row):
+        """One flight as a plain dict in the normalized schema"""
+        price = float(self.price[row])
+        return {
+            "airline": self.airlines[self.airline[row]],
+            "flight_number": str(self.flight_number[row]),
+            "origin": self.airports[self.origin[row]],
+            "destination": self.airports[self.destination[row]],
+            "departure": _iso(self.departure[row]),
+            "arrival": _iso(self.arrival[row]),
+            "duration_minutes": int(self.duration_minutes[row]),
+            "price": None if np.isnan(price) else price,
+            "source": SOURCES[self.source[row]],
+        }
+
+    def records(self, rows):
+        return [self.record(int(row)) for row in rows]
@@ -0,0 +1,142 @@
+import argparse
+import copy
+import functools
+import hashlib
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from backend.flight_data import normalize_simulated
+
+SIM_FLIGHT_CACHE_SIZE = int(os.getenv("SIM_FLIGHT_CACHE_SIZE", "1024"))
+
+AIRPORTS = [
+    "ATL", "BOS", "BWI", "CLT", "DCA", "DEN", "DFW", "DTW", "EWR", "FLL", "HNL", "IAD", "IAH", "JFK",
+    "LAS", "LAX", "LGA", "MCO", "MDW", "MIA", "MSP", "ORD", "PDX", "PHL", "PHX", "SAN", "SEA", "SFO",
+    "SLC", "TPA",
+]
+
+# (flight prefix, airline, aircraft) for the three simulated options
+CARRIERS = [
+    ("AA", "American Airlines", "Boeing 737"),
+    ("DL", "Delta Air Lines", "Airbus A320"),
+    ("UA", "United Airlines", "Boeing 757"),
+]
+
+
+def _seed(*parts):
+    # SHA-256 of the inputs rather than hash(), which is salted per process,
+    # so every gunicorn worker simulates the same flights
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _route_minutes(origin, destination):
+    """Typical block time for a route, the same in both directions"""
+    a, b = sorted((origin, destination))
+    return 60 + _seed("route", a, b) % 361
+
+
+def _day(date):
+    if date:
+        try:
+            return datetime.strptime(str(date)[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _hhmm(minutes):
+    """"HH:MM" for minutes after the departure day's midnight, "+N" on later days (e.g. "01:30+1")"""
+    days, minutes = divmod(minutes, 24 * 60)
+    text = f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return f"{text}+{days}" if days else text
+
+
+@functools.lru_cache(maxsize=SIM_FLIGHT_CACHE_SIZE)
+def _search(origin, destination, day):
+    rng = random.Random(_seed("search", origin, destination, day))
+    base = _route_minutes(origin, destination)
+    flights = []
+    for prefix, _, aircraft in CARRIERS:
+        departure = rng.randrange(6 * 60, 21 * 60, 5)
+        duration = base + rng.randrange(0, 35, 5)
+        flights.append({
+            "flight": f"{prefix}{100 + rng.randrange(900)}",
+            "departure": _hhmm(departure),
+            "arrival": _hhmm(departure + duration),
+            "duration": f"{duration // 60}h {duration % 60}m",
+            "aircraft": aircraft,
+            "price": f"${rng.randrange(250, 650, 5)}"
+        })
+    flights.sort(key=lambda f: f["departure"])
+
+    # Rank on normalized numbers, not the display strings
+    rows = normalize_simulated(flights, origin, destination, day)
+    fastest = min(range(len(rows)), key=lambda i: rows[i]["duration_minutes"])
+    cheapest = min(range(len(rows)), key=lambda i: rows[i]["price"])
+
+    return {
+        "flights": flights,
+        "fastest_flight": flights[fastest]["flight"],
+        "cheapest_flight": flights[cheapest]["flight"],
+        "recommendation": f"Book {flights[fastest]['flight']} for fastest transport",
+        "method": "simulation"
+    }
+
+
+def simulate_flight_search(origin, destination, date=None):
+    """Three simulated flights for a route and day, memoized per (origin, destination, date)"""
+    result = _search((origin or "").upper(), (destination or "").upper(), _day(date))
+    # Callers may annotate the result; keep the cached copy pristine
+    return copy.deepcopy(result)
+
+
+def generate_schedule(n_flights, airports=None, start_date="2025-10-18", days=7, seed=0):
+    """A reproducible schedule of n_flights in mock_flights.json format"""
+    airports = airports or AIRPORTS
+    rng = random.Random(seed)
+    start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    statuses = ["On Time"] * 8 + ["Delayed", "Boarding"]
+    flights = []
+    for _ in range(n_flights):
+        origin, destination = rng.sample(airports, 2)
+        prefix, airline, _ = rng.choice(CARRIERS)
+        departure = start + timedelta(minutes=rng.randrange(0, days * 24 * 60, 5))
+        duration = _route_minutes(origin, destination) + rng.randrange(0, 35, 5)
+        flights.append({
+            "airline": airline,
+            "flight_number": f"{prefix}{100 + rng.randrange(9900)}",
+            "from": origin,
+            "to": destination,
+            "departure": departure.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "arrival": (departure + timedelta(minutes=duration)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "duration_hr": round(duration / 60, 1),
+            "status": rng.choice(statuses)
+        })
+    flights.sort(key=lambda f: f["departure"])
+    return flights
+
+
+def main():
+    """python -m backend.flight_sim --flights 100000 --out flights.json"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic flight schedule")
+    parser.add_argument("--flights", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--start-date", default="2025-10-18")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="-")
+    args = parser.parse_args()
+
+    flights = generate_schedule(args.flights, start_date=args.start_date, days=args.days, seed=args.seed)
+    if args.out == "-":
+        print(json.dumps(flights, indent=2))
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(flights, f, indent=2)
+        print(f"Wrote {len(flights)} flights to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
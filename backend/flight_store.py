@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+
+from backend.flight_data import FlightTable, cache_year, load_flights_cache, normalize_mock
+
+FLIGHT_DATA_BUCKET = os.getenv("FLIGHT_DATA_BUCKET", "organmatch-flight-data")
+FLIGHT_DATA_KEY = os.getenv("FLIGHT_DATA_KEY", "mock_flights.json")
+# Seconds between ETag revalidations of the S3 object
+FLIGHT_DATA_REVALIDATE_SECONDS = float(os.getenv("FLIGHT_DATA_REVALIDATE_SECONDS", "300"))
+# Seconds before retrying S3 after a first load failed
+FLIGHT_DATA_RETRY_SECONDS = float(os.getenv("FLIGHT_DATA_RETRY_SECONDS", "30"))
+
+
+def _route_key(origin, destination):
+    return (origin or "").upper(), (destination or "").upper()
+
+
+def _not_modified(error):
+    from botocore.exceptions import ClientError
+
+    if not isinstance(error, ClientError):
+        return False
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return status == 304 or error.response.get("Error", {}).get("Code") in ("304", "NotModified")
+
+
+class FlightScheduleStore:
+    """The S3 flight schedule, loaded once and indexed by (from, to)
+
+    The object is re-checked at most every `revalidate_after` seconds with a
+    conditional GET (If-None-Match); an unchanged object costs a 304 and no
+    re-parse. Lookups are a single dict access. If the first load fails, S3
+    is not asked again for `retry_after` seconds.
+
+    Each load is also normalized, together with data/flights_cache.json, into
+    a FlightTable for the planners.
+    """
+
+    def __init__(self, bucket=FLIGHT_DATA_BUCKET, key=FLIGHT_DATA_KEY,
+                 s3_client=None, revalidate_after=FLIGHT_DATA_REVALIDATE_SECONDS,
+                 retry_after=FLIGHT_DATA_RETRY_SECONDS):
+        self.bucket = bucket
+        self.key = key
+        self.revalidate_after = revalidate_after
+        self.retry_after = retry_after
+        self._s3_client = s3_client
+        self._etag = None
+        self._routes = None
+        self._table = None
+        self._cache_rows = None
+        self._cache_year = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def s3_client(self):
+        if self._s3_client is None:
+            import boto3
+
+            self._s3_client = boto3.client("s3", region_name=os.getenv("REGION"))
+        return self._s3_client
+
+    def _index(self, flights):
+        routes = {}
+        for flight in flights:
+            routes.setdefault(_route_key(flight["from"], flight["to"]), []).append(flight)
+        return routes
+
+    def refresh(self, force=False):
+        """Reload the object if it changed since the last load"""
+        with self._lock:
+            if not force and time.monotonic() < self._next_check:
+                return False
+
+            params = {"Bucket": self.bucket, "Key": self.key}
+            if self._etag and not force:
+                params["IfNoneMatch"] = self._etag
+            try:
+                response = self.s3_client.get_object(**params)
+            except Exception as e:
+                # Nothing loaded yet: surface the error and retry after a short
+                # backoff, while the planners get a table of the local cache alone
+                if self._routes is None and not _not_modified(e):
+                    if self._table is None:
+                        self._table = FlightTable.from_sources([], self._load_cache(cache_year()))
+                    self._next_check = time.monotonic() + self.retry_after
+                    raise
+                self._next_check = time.monotonic() + self.revalidate_after
+                if _not_modified(e):
+                    return False
+                # Keep serving the last good copy if S3 is unreachable
+                print(f"⚠️ Flight data revalidation failed, serving cached copy: {e}")
+                return False
+
+            flights = json.loads(response["Body"].read().decode("utf-8"))
+            self._routes = self._index(flights)
+            rows = normalize_mock(flights)
+            # The cache's year-less times are placed in the schedule's year so the two connect
+            self._table = FlightTable.from_sources(rows, self._load_cache(cache_year(rows)))
+            self._etag = response.get("ETag")
+            self._next_check = time.monotonic() + self.revalidate_after
+            return True
+
+    def _load_cache(self, year):
+        if self._cache_rows is None or self._cache_year != year:
+            self._cache_rows = load_flights_cache(year=year)
+            self._cache_year = year
+        return self._cache_rows
+
+    def flights(self, origin, destination):
+        """Flights for a route (case-insensitive), in file order"""
+        self.refresh()
+        return (self._routes or {}).get(_route_key(origin, destination), [])
+
+    def table(self):
+        """Every known flight, normalized; the same object until the data changes
+
+        Without S3 (nothing loaded yet and the GET failing) this is the local
+        flights_cache.json alone.
+        """
+        try:
+            self.refresh()
+        except Exception as e:
+            if self._table is None:
+                raise
+            print(f"⚠️ Flight data unavailable from S3, planning on the local cache: {e}")
+        return self._table
+
+
+# Shared by the Flask routes and the flight Lambda
+flight_store = FlightScheduleStore()
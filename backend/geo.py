@@ -0,0 +1,204 @@
+import math
+import os
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from backend.data_access import table_cache
+
+EARTH_RADIUS_KM = 6371.0088
+# Grid cell size for GeoIndex; ~111 km of latitude per degree
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "1.0"))
+
+_HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def _coordinate(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def parse_distance_km(value):
+    """A travel radius from request input: None stays None, anything else must
+    be a finite, non-negative number (numeric strings are accepted)"""
+    if value is None:
+        return None
+    try:
+        km = float(value) if not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        km = None
+    if km is None or not math.isfinite(km) or km < 0:
+        raise ValueError(f"distance must be a finite, non-negative number of km, got {value!r}")
+    return km
+
+
+def coordinates(record, hospital_lookup=None):
+    """(lat, lon) of a donor, recipient or hospital row, or None
+
+    Donors and recipients carry location_lat/location_long, hospitals
+    latitude/longitude; a row without its own position falls back to its
+    hospital's when a hospital_id -> hospital lookup is given.
+    """
+    for lat_field, lon_field in (("location_lat", "location_long"), ("latitude", "longitude")):
+        lat, lon = _coordinate(record.get(lat_field)), _coordinate(record.get(lon_field))
+        if lat is not None and lon is not None:
+            return lat, lon
+    if hospital_lookup:
+        hospital = hospital_lookup.get(record.get("hospital_id", ""))
+        if hospital:
+            return coordinates(hospital)
+    return None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works on scalars or broadcastable arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return float(distance) if distance.ndim == 0 else distance
+
+
+def distance_matrix(points_a, points_b=None):
+    """(len(a), len(b)) haversine km between two lists of (lat, lon)"""
+    a = np.asarray(points_a, dtype=np.float64).reshape(-1, 2)
+    b = a if points_b is None else np.asarray(points_b, dtype=np.float64).reshape(-1, 2)
+    return np.asarray(haversine_km(a[:, None, 0], a[:, None, 1], b[None, :, 0], b[None, :, 1]))
+
+
+class GeoIndex:
+    """Records bucketed on a lat/lon grid for radius and nearest queries
+
+    A radius query only measures the records in grid cells overlapping the
+    search circle's bounding box; distances are exact haversine.
+    """
+
+    def __init__(self, id_field, records=None, cell_degrees=GEO_CELL_DEGREES, hospital_lookup=None):
+        self.id_field = id_field
+        self.cell_degrees = cell_degrees
+        self.hospital_lookup = hospital_lookup
+        self._columns = max(1, math.ceil(360 / cell_degrees))
+        self.points = {}
+        self.cells = defaultdict(dict)
+        self._source = None
+        self._lock = threading.Lock()
+        if records:
+            self.refresh(records)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_degrees),
+                math.floor((lon + 180) / self.cell_degrees) % self._columns)
+
+    def _add(self, record_id, record):
+        point = coordinates(record, self.hospital_lookup)
+        if point is None:
+            return
+        self.points[record_id] = (point, record)
+        self.cells[self._cell(*point)][record_id] = point
+
+    def _discard(self, record_id):
+        entry = self.points.pop(record_id, None)
+        if entry is None:
+            return
+        cell = self._cell(*entry[0])
+        self.cells[cell].pop(record_id, None)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def upsert(self, record):
+        record_id = record.get(self.id_field)
+        if not record_id:
+            return
+        with self._lock:
+            current = self.points.get(record_id)
+            if current is None or current[1] != record:
+                self._discard(record_id)
+                self._add(record_id, record)
+                self._source = None
+
+    def remove(self, record_id):
+        with self._lock:
+            self._discard(record_id)
+            self._source = None
+
+    def refresh(self, records):
+        """Sync with a full record list, re-indexing only rows that changed"""
+        with self._lock:
+            if records is self._source:
+                return
+            seen = set()
+            for record in records:
+                record_id = record.get(self.id_field)
+                if not record_id:
+                    continue
+                seen.add(record_id)
+                current = self.points.get(record_id)
+                if current is not None and current[1] == record:
+                    continue
+                self._discard(record_id)
+                self._add(record_id, record)
+            for record_id in [r for r in self.points if r not in seen]:
+                self._discard(record_id)
+            self._source = records
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        if radius_km >= _HALF_CIRCUMFERENCE_KM:
+            return list(self.cells)
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        lat_lo, lat_hi = lat - dlat, lat + dlat
+        if lat_lo <= -90 or lat_hi >= 90:
+            # The circle covers a pole: every longitude is in range
+            columns = range(self._columns)
+        else:
+            dlon = math.degrees(math.asin(
+                min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+            first = math.floor((lon - dlon + 180) / self.cell_degrees)
+            last = math.floor((lon + dlon + 180) / self.cell_degrees)
+            columns = {c % self._columns for c in range(first, min(last, first + self._columns - 1) + 1)}
+        rows = range(math.floor(lat_lo / self.cell_degrees), math.floor(lat_hi / self.cell_degrees) + 1)
+        if len(rows) * len(columns) > len(self.cells):
+            return [cell for cell in self.cells if cell[0] in rows and cell[1] in columns]
+        return [(r, c) for r in rows for c in columns if (r, c) in self.cells]
+
+    def within(self, lat, lon, radius_km):
+        """[(distance_km, record)] within radius_km of (lat, lon), nearest first"""
+        with self._lock:
+            ids, points = [], []
+            for cell in self._candidate_cells(lat, lon, radius_km):
+                for record_id, point in self.cells[cell].items():
+                    ids.append(record_id)
+                    points.append(point)
+            if not ids:
+                return []
+            points = np.asarray(points, dtype=np.float64)
+            distances = np.atleast_1d(haversine_km(lat, lon, points[:, 0], points[:, 1]))
+            order = np.argsort(distances, kind="stable")
+            return [(float(distances[i]), self.points[ids[i]][1])
+                    for i in order.tolist() if distances[i] <= radius_km]
+
+    def nearest(self, lat, lon, k=5, predicate=None):
+        """The k nearest records (optionally only those passing predicate)"""
+        radius = self.cell_degrees * 111.0
+        while True:
+            hits = self.within(lat, lon, radius)
+            if predicate is not None:
+                hits = [hit for hit in hits if predicate(hit[1])]
+            if len(hits) >= k or radius >= _HALF_CIRCUMFERENCE_KM:
+                return hits[:k]
+            radius *= 2
+
+    def __len__(self):
+        return len(self.points)
+
+
+# Shared by the API routes
+recipient_geo_index = GeoIndex("recipient_id")
+
+
+def get_recipient_geo_index(recipients_table):
+    """The shared recipient index, refreshed from the cached recipients scan"""
+    recipient_geo_index.refresh(table_cache.get(recipients_table))
+    return recipient_geo_index
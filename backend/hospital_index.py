@@ -0,0 +1,177 @@
+import threading
+from collections import defaultdict
+
+from backend.data_access import table_cache
+from backend.geo import GeoIndex
+
+
+def _hospital_id(hospital):
+    return hospital.get("hospital_id") or hospital.get("id")
+
+
+def _specialties(hospital):
+    raw = hospital.get("transplant_specialties") or ""
+    return {s.strip().lower() for s in raw.split(",") if s.strip()}
+
+
+class HospitalIndex:
+    """Hospitals keyed by hospital_id, by city, by transplant specialty and by location
+
+    Built once from a scan and kept current with refresh(), which only
+    re-indexes hospitals that were added, changed or removed. Readers take
+    the same lock and get copies, so a concurrent refresh never changes a
+    dict while it is being iterated. Hospitals keep their scan position
+    through updates; ones added by upsert() come after the scanned ones.
+    """
+
+    def __init__(self, hospitals=None):
+        self.by_id = {}
+        self.by_city = defaultdict(dict)
+        self.by_specialty = defaultdict(dict)
+        self.geo = GeoIndex("hospital_id")
+        self._position = {}
+        self._next_position = 0
+        # Hospitals without an id: not indexed, but still listed by cities()
+        self._unkeyed = []
+        self._cities = None
+        self._source = None
+        self._lock = threading.Lock()
+        if hospitals:
+            self.refresh(hospitals)
+
+    def _add(self, hospital_id, hospital):
+        self._cities = None
+        if hospital_id not in self._position:
+            self._position[hospital_id] = self._next_position
+            self._next_position += 1
+        self.by_id[hospital_id] = hospital
+        city = hospital.get("city")
+        if city:
+            self.by_city[city.lower()][hospital_id] = hospital
+        for specialty in _specialties(hospital):
+            self.by_specialty[specialty][hospital_id] = hospital
+        self.geo.upsert(hospital)
+
+    def _discard(self, hospital_id):
+        hospital = self.by_id.pop(hospital_id, None)
+        if hospital is None:
+            return
+        self._cities = None
+        city = (hospital.get("city") or "").lower()
+        if city in self.by_city:
+            self.by_city[city].pop(hospital_id, None)
+            if not self.by_city[city]:
+                del self.by_city[city]
+        for specialty in _specialties(hospital):
+            self.by_specialty[specialty].pop(hospital_id, None)
+            if not self.by_specialty[specialty]:
+                del self.by_specialty[specialty]
+        self.geo.remove(hospital_id)
+
+    def upsert(self, hospital):
+        hospital_id = _hospital_id(hospital)
+        if not hospital_id:
+            return
+        with self._lock:
+            if self.by_id.get(hospital_id) != hospital:
+                self._discard(hospital_id)
+                self._add(hospital_id, hospital)
+
+    def remove(self, hospital_id):
+        with self._lock:
+            self._discard(hospital_id)
+            self._position.pop(hospital_id, None)
+
+    def refresh(self, hospitals):
+        """Sync with a full hospital list; returns (added, changed, removed)"""
+        with self._lock:
+            # Same scan result as last time: nothing to do
+            if hospitals is self._source:
+                return 0, 0, 0
+
+            added = changed = 0
+            seen = set()
+            unkeyed = []
+            for position, hospital in enumerate(hospitals):
+                hospital_id = _hospital_id(hospital)
+                if not hospital_id:
+                    unkeyed.append((position, hospital))
+                    continue
+                seen.add(hospital_id)
+                self._position[hospital_id] = position
+                current = self.by_id.get(hospital_id)
+                if current == hospital:
+                    continue
+                if current is None:
+                    added += 1
+                else:
+                    changed += 1
+                    self._discard(hospital_id)
+                self._add(hospital_id, hospital)
+
+            stale = [hospital_id for hospital_id in self.by_id if hospital_id not in seen]
+            for hospital_id in stale:
+                self._discard(hospital_id)
+                self._position.pop(hospital_id, None)
+
+            self._next_position = len(hospitals)
+            self._unkeyed = unkeyed
+            self._cities = None
+            self._source = hospitals
+            return added, changed, len(stale)
+
+    def get(self, hospital_id):
+        with self._lock:
+            return self.by_id.get(hospital_id)
+
+    def in_city(self, city):
+        """Hospitals in a city (case-insensitive), in scan order"""
+        if not city:
+            return []
+        with self._lock:
+            hospitals = self.by_city.get(city.lower(), {})
+            return [hospitals[h] for h in sorted(hospitals, key=self._position.__getitem__)]
+
+    def cities(self):
+        """City -> its hospitals, in scan order, with city names exactly as stored
+
+        Unlike in_city(), "Boston" and "boston" are separate cities here, and
+        hospitals without an id are included.
+        """
+        with self._lock:
+            if self._cities is None:
+                entries = sorted(
+                    [(self._position[h], hospital) for h, hospital in self.by_id.items()] + self._unkeyed,
+                    key=lambda entry: entry[0],
+                )
+                cities = {}
+                for _, hospital in entries:
+                    city = hospital.get("city")
+                    if city:
+                        cities.setdefault(city, []).append(hospital)
+                self._cities = cities
+            return {city: list(hospitals) for city, hospitals in self._cities.items()}
+
+    def with_specialty(self, specialty):
+        """Hospitals listing a transplant specialty, e.g. 'kidney'"""
+        with self._lock:
+            return list(self.by_specialty.get(specialty.lower(), {}).values())
+
+    def nearest(self, lat, lon, k=5, specialty=None):
+        """[(distance_km, hospital)] for the k nearest hospitals, optionally
+        only those that transplant the given organ"""
+        with self._lock:
+            if specialty:
+                specialty = specialty.lower()
+                return self.geo.nearest(lat, lon, k, lambda h: specialty in _specialties(h))
+            return self.geo.nearest(lat, lon, k)
+
+
+# Shared by all routes
+hospital_index = HospitalIndex()
+
+
+def get_hospital_index(hospitals_table):
+    """The shared index, refreshed from the cached hospitals scan"""
+    hospital_index.refresh(table_cache.get(hospitals_table))
+    return hospital_index
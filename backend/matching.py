@@ -0,0 +1,334 @@
+from collections import defaultdict
+
+import numpy as np
+
+from backend.geo import coordinates, distance_matrix
+
+
+def _lower(value):
+    return value.lower()
+
+
+def _same(value):
+    return value
+
+
+# Blocking keys: (donor field, recipient field, normalizer). A donor can only
+# match recipients whose normalized values are equal on every key.
+DEFAULT_BLOCKING_KEYS = [
+    ("organ_type", "organ_needed", _lower),
+    ("blood_type", "blood_type", _same),
+]
+
+
+def calculate_match_score(donor, recipient):
+    score = 0
+
+    # Base score for organ + blood type match
+    score += 50
+
+    # Organ condition (0–100)
+    cond = float(donor.get("organ_condition_score", 0))
+    score += cond * 0.3
+
+    # Urgency weighting
+    urgency = float(recipient.get("urgency_level", 1))
+    score += urgency * 3
+
+    # HLA string similarity (rough match check)
+    if donor.get("hla_typing") and recipient.get("hla_typing"):
+        donor_hla = set(donor["hla_typing"].replace(" ", "").split(","))
+        recip_hla = set(recipient["hla_typing"].replace(" ", "").split(","))
+        overlap = len(donor_hla.intersection(recip_hla))
+        score += overlap * 5
+
+    return round(score, 2)
+
+
+class MatchingEngine:
+    """Indexed donor-recipient matcher
+
+    Recipients are bucketed by the blocking keys so each donor is only scored
+    against the recipients in its own bucket instead of the whole waitlist.
+    With max_distance_km set, recipients farther than that from the donor
+    (by their own or their hospital's location) are pruned as well. Given a
+    HospitalDistances matrix, each match also carries its hospital-to-hospital
+    distance_km. Given a Registry over the same records, the vectorized path
+    takes its pre-encoded scoring columns instead of re-parsing each bucket.
+    """
+
+    def __init__(self, hospitals=None, blocking_keys=None, vectorized=False, max_distance_km=None,
+                 distances=None, registry=None):
+        self.blocking_keys = blocking_keys or DEFAULT_BLOCKING_KEYS
+        self.vectorized = vectorized
+        self.max_distance_km = max_distance_km
+        self.distances = distances
+        self.registry = registry
+        self.hospital_lookup = {h["hospital_id"]: h for h in hospitals or []}
+        self.buckets = defaultdict(list)
+
+    def donor_key(self, donor):
+        return tuple(norm(donor[field]) for field, _, norm in self.blocking_keys)
+
+    def recipient_key(self, recipient):
+        return tuple(norm(recipient[field]) for _, field, norm in self.blocking_keys)
+
+    def add_recipients(self, recipients):
+        """Index recipients into their blocking buckets (insertion order is kept)"""
+        for recipient in recipients:
+            self.buckets[self.recipient_key(recipient)].append(recipient)
+
+    def bucket_for(self, donor):
+        """Recipients sharing every blocking key with the donor"""
+        return self.buckets.get(self.donor_key(donor), [])
+
+    def candidates(self, donor):
+        """bucket_for(donor), minus recipients outside max_distance_km"""
+        bucket = self.bucket_for(donor)
+        mask = self.radius_mask([donor], bucket)
+        if mask is None:
+            return bucket
+        return [recipient for recipient, keep in zip(bucket, mask[0].tolist()) if keep]
+
+    def radius_mask(self, donors, recipients):
+        """(donors, recipients) bool matrix of pairs within max_distance_km, or
+        None when there is no radius. Rows without a location are never pruned."""
+        if self.max_distance_km is None or not donors or not recipients:
+            return None
+        nowhere = (np.nan, np.nan)
+        donor_points = [coordinates(d, self.hospital_lookup) or nowhere for d in donors]
+        recipient_points = [coordinates(r, self.hospital_lookup) or nowhere for r in recipients]
+        return ~(distance_matrix(donor_points, recipient_points) > self.max_distance_km)
+
+    def build_match(self, donor, recipient, score=None):
+        """Build the match payload, or None if either hospital is unknown"""
+        donor_hosp = self.hospital_lookup.get(donor.get("hospital_id", ""), {})
+        recip_hosp = self.hospital_lookup.get(recipient.get("hospital_id", ""), {})
+
+        # Skip if any hospital missing key data
+        if not donor_hosp or not recip_hosp:
+            return None
+
+        match = {
+            "donor_id": donor["donor_id"],
+            "recipient_id": recipient["recipient_id"],
+            "organ": donor["organ_type"],
+            "blood_type": donor["blood_type"],
+            "donor_hospital": donor_hosp.get("hospital_name", "Unknown"),
+            "recipient_hospital": recip_hosp.get("hospital_name", "Unknown"),
+            "donor_city": donor_hosp.get("city", ""),
+            "recipient_city": recip_hosp.get("city", ""),
+            "transport_ready": donor_hosp.get("transport_ready", "False"),
+            "urgency_level": recipient.get("urgency_level", "N/A"),
+            "match_score": calculate_match_score(donor, recipient) if score is None else score
+        }
+        if self.distances is not None:
+            distance = self.distances.km(donor_hosp.get("hospital_id"), recip_hosp.get("hospital_id"))
+            match["distance_km"] = None if distance is None else round(distance, 1)
+        return match
+
+    def match_donor(self, donor):
+        """All matches for a single donor"""
+        matches = []
+        for recipient in self.candidates(donor):
+            match = self.build_match(donor, recipient)
+            if match is not None:
+                matches.append(match)
+        return matches
+
+    def match(self, donors):
+        """All matches for the given donors, in donor then recipient order"""
+        if self.vectorized:
+            return self._match_vectorized(donors)
+
+        matches = []
+        for donor in donors:
+            matches.extend(self.match_donor(donor))
+        return matches
+
+    def allocate(self, donors, method="optimal"):
+        """A consistent assignment: each donor and recipient used at most once"""
+        from backend.allocation import allocate
+
+        return allocate(self, donors, method)
+
+    def _match_vectorized(self, donors):
+        """Score each bucket as one donors x recipients matrix"""
+        from backend.scoring import score_matrix
+
+        by_bucket = defaultdict(list)
+        for donor in donors:
+            by_bucket[self.donor_key(donor)].append(donor)
+
+        # id(donor) -> (bucket recipients, row of scores)
+        rows = {}
+        for key, bucket_donors in by_bucket.items():
+            bucket = self.bucket_for(bucket_donors[0])
+            if not bucket:
+                continue
+            scores = score_matrix(*self.scoring_columns(bucket_donors, bucket))
+            mask = self.radius_mask(bucket_donors, bucket)
+            for i, (donor, row) in enumerate(zip(bucket_donors, scores)):
+                rows[id(donor)] = (bucket, row, None if mask is None else mask[i])
+
+        matches = []
+        for donor in donors:
+            if id(donor) not in rows:
+                continue
+            bucket, row, keep = rows[id(donor)]
+            for j, (recipient, score) in enumerate(zip(bucket, row)):
+                if keep is not None and not keep[j]:
+                    continue
+                match = self.build_match(donor, recipient, float(score))
+                if match is not None:
+                    matches.append(match)
+        return matches
+
+    def scoring_columns(self, donors, recipients):
+        """Scoring columns from the registry when it holds every record, else parsed"""
+        from backend.scoring import donor_columns, recipient_columns
+
+        if self.registry is not None:
+            donor_rows = [self.registry.donors.index.get(d.get("donor_id")) for d in donors]
+            recipient_rows = [self.registry.recipients.index.get(r.get("recipient_id")) for r in recipients]
+            if None not in donor_rows and None not in recipient_rows:
+                return self.registry.donor_columns(donor_rows), self.registry.recipient_columns(recipient_rows)
+        return donor_columns(donors), recipient_columns(recipients)
+
+
+class IncrementalMatcher(MatchingEngine):
+    """Keeps the scored match set current as single records change
+
+    Every upsert/remove rescores only the pairs that involve the changed
+    record (its own blocking bucket) and returns the delta:
+    {"added": [...], "removed": [...], "changed": [...]}. The matcher Lambda
+    keeps one per warm container and feeds it DynamoDB Streams records.
+    """
+
+    def __init__(self, hospitals=None, blocking_keys=None, max_distance_km=None, distances=None):
+        super().__init__(hospitals, blocking_keys, max_distance_km=max_distance_km, distances=distances)
+        self.donors = {}
+        self.recipients = {}
+        # Blocking key -> {id: record}; dicts make removal O(1)
+        self.donor_buckets = defaultdict(dict)
+        self.recipient_buckets = defaultdict(dict)
+        # donor_id -> {recipient_id: match} and the mirror for recipients
+        self.by_donor = defaultdict(dict)
+        self.by_recipient = defaultdict(dict)
+
+    def add_recipients(self, recipients):
+        for recipient in recipients:
+            self.upsert_recipient(recipient)
+
+    def bucket_for(self, donor):
+        return list(self.recipient_buckets.get(self.donor_key(donor), {}).values())
+
+    def load(self, donors, recipients):
+        """Bulk load; returns the delta from the previous state"""
+        delta = {"added": [], "removed": [], "changed": []}
+        for recipient in recipients:
+            self.merge(delta, self.upsert_recipient(recipient))
+        for donor in donors:
+            self.merge(delta, self.upsert_donor(donor))
+        return delta
+
+    def upsert_donor(self, donor):
+        donor_id = donor["donor_id"]
+        old = self._drop_donor(donor_id)
+        self.donors[donor_id] = donor
+        self.donor_buckets[self.donor_key(donor)][donor_id] = donor
+        new = {}
+        for recipient in self.candidates(donor):
+            match = self.build_match(donor, recipient)
+            if match is not None:
+                new[(donor_id, recipient["recipient_id"])] = match
+        self._store(new)
+        return self._diff(old, new)
+
+    def remove_donor(self, donor_id):
+        return self._diff(self._drop_donor(donor_id), {})
+
+    def upsert_recipient(self, recipient):
+        recipient_id = recipient["recipient_id"]
+        old = self._drop_recipient(recipient_id)
+        self.recipients[recipient_id] = recipient
+        key = self.recipient_key(recipient)
+        self.recipient_buckets[key][recipient_id] = recipient
+        new = {}
+        bucket = list(self.donor_buckets.get(key, {}).values())
+        mask = self.radius_mask(bucket, [recipient])
+        if mask is not None:
+            bucket = [donor for donor, keep in zip(bucket, mask[:, 0].tolist()) if keep]
+        for donor in bucket:
+            match = self.build_match(donor, recipient)
+            if match is not None:
+                new[(donor["donor_id"], recipient_id)] = match
+        self._store(new)
+        return self._diff(old, new)
+
+    def remove_recipient(self, recipient_id):
+        return self._diff(self._drop_recipient(recipient_id), {})
+
+    def donor_matches(self, donor_id):
+        """Current matches for a donor, best score first"""
+        return sorted(self.by_donor.get(donor_id, {}).values(), key=lambda m: -m["match_score"])
+
+    def recipient_matches(self, recipient_id):
+        """Current matches for a recipient, best score first"""
+        return sorted(self.by_recipient.get(recipient_id, {}).values(), key=lambda m: -m["match_score"])
+
+    def all_matches(self):
+        return [match for matches in self.by_donor.values() for match in matches.values()]
+
+    def _drop_donor(self, donor_id):
+        """Unindex a donor; returns its matches keyed by (donor_id, recipient_id)"""
+        donor = self.donors.pop(donor_id, None)
+        if donor is None:
+            return {}
+        self._discard(self.donor_buckets, self.donor_key(donor), donor_id)
+        old = {}
+        for recipient_id, match in self.by_donor.pop(donor_id, {}).items():
+            self._discard(self.by_recipient, recipient_id, donor_id)
+            old[(donor_id, recipient_id)] = match
+        return old
+
+    def _drop_recipient(self, recipient_id):
+        """Unindex a recipient; returns its matches keyed by (donor_id, recipient_id)"""
+        recipient = self.recipients.pop(recipient_id, None)
+        if recipient is None:
+            return {}
+        self._discard(self.recipient_buckets, self.recipient_key(recipient), recipient_id)
+        old = {}
+        for donor_id, match in self.by_recipient.pop(recipient_id, {}).items():
+            self._discard(self.by_donor, donor_id, recipient_id)
+            old[(donor_id, recipient_id)] = match
+        return old
+
+    @staticmethod
+    def _discard(index, key, member):
+        """Remove one member, dropping the entry once it is empty so churn does not leak memory"""
+        entries = index.get(key)
+        if entries is None:
+            return
+        entries.pop(member, None)
+        if not entries:
+            del index[key]
+
+    def _store(self, matches):
+        for (donor_id, recipient_id), match in matches.items():
+            self.by_donor[donor_id][recipient_id] = match
+            self.by_recipient[recipient_id][donor_id] = match
+
+    @staticmethod
+    def _diff(old, new):
+        return {
+            "added": [m for pair, m in new.items() if pair not in old],
+            "removed": [m for pair, m in old.items() if pair not in new],
+            "changed": [m for pair, m in new.items() if pair in old and old[pair] != m],
+        }
+
+    @staticmethod
+    def merge(delta, other):
+        """Append another delta's added/removed/changed matches to delta"""
+        for kind in delta:
+            delta[kind].extend(other[kind])
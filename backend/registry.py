@@ -0,0 +1,457 @@
+import csv
+import math
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from backend.data_access import table_cache
+from backend.scoring import HLAEncoder, encoded_match_scores
+from backend.viability import MAX_HOURS, DEFAULT_MAX_HOURS
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# (field, kind, shared vocabulary). Category codes come from the named
+# vocabulary, so donor organ_type and recipient organ_needed share codes.
+DONOR_SCHEMA = [
+    ("name", "str", None),
+    ("age", "int", None),
+    ("sex", "category", "sex"),
+    ("blood_type", "category", "blood"),
+    ("organ_type", "category", "organ"),
+    ("organ_condition_score", "centi", None),
+    ("hla_typing", "hla", None),
+    ("time_of_death", "epoch", None),
+    ("hospital_id", "category", "hospital"),
+    ("location_lat", "float", None),
+    ("location_long", "float", None),
+    ("available_until", "epoch", None),
+    ("infection_status", "category", "infection_status"),
+    ("cause_of_death", "category", "cause_of_death"),
+]
+RECIPIENT_SCHEMA = [
+    ("name", "str", None),
+    ("age", "int", None),
+    ("sex", "category", "sex"),
+    ("blood_type", "category", "blood"),
+    ("organ_needed", "category", "organ"),
+    ("hla_typing", "hla", None),
+    ("urgency_level", "centi", None),
+    ("wait_time_days", "int", None),
+    ("hospital_id", "category", "hospital"),
+    ("location_lat", "float", None),
+    ("location_long", "float", None),
+    ("medical_condition_score", "float", None),
+    ("is_compatible", "bool", None),
+    ("match_score", "float", None),
+    ("contact_time_limit_hr", "float", None),
+]
+HOSPITAL_SCHEMA = [
+    ("hospital_name", "str", None),
+    ("city", "category", "city"),
+    ("state", "category", "state"),
+    ("latitude", "float", None),
+    ("longitude", "float", None),
+    ("organ_storage_facility", "bool", None),
+    ("transport_ready", "bool", None),
+    ("icu_beds_available", "int", None),
+    ("transplant_specialties", "specialties", "organ"),
+    ("contact_number", "str", None),
+    ("priority_score", "float", None),
+]
+
+# Organ types are compared case-insensitively everywhere else
+_NORMALIZE = {"organ": str.lower}
+
+
+def _number(value):
+    if value is None or value == "":
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _epoch(value):
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return math.nan
+
+
+class Vocabulary:
+    """Label <-> small integer code; -1 means missing"""
+
+    def __init__(self, normalize=None):
+        self.normalize = normalize
+        self.labels = []
+        self.codes = {}
+
+    def code(self, label):
+        if label is None or label == "":
+            return -1
+        label = str(label)
+        key = self.normalize(label) if self.normalize else label
+        code = self.codes.get(key)
+        if code is None:
+            # Codes are keyed on the normalized form; the first spelling seen is kept for display
+            code = self.codes[key] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def label(self, code):
+        return self.labels[code] if code >= 0 else None
+
+
+def _encode(kind, values, vocabulary, encoder):
+    if kind == "str":
+        return np.array(["" if v is None else str(v) for v in values], dtype=object)
+    if kind == "category":
+        codes = [vocabulary.code(v) for v in values]
+        return np.array(codes, dtype=np.int16 if len(vocabulary.labels) > 127 else np.int8)
+    if kind == "int":
+        numbers = np.array([_number(v) for v in values], dtype=np.float64)
+        return np.where(np.isnan(numbers), -1, numbers).astype(np.int32)
+    if kind == "float":
+        return np.array([_number(v) for v in values], dtype=np.float32)
+    if kind == "centi":
+        # Hundredths as int32: exact for two-decimal scores, so scoring
+        # reproduces float(value) bit for bit; anything finer stays float64
+        numbers = np.array([_number(v) for v in values], dtype=np.float64)
+        centi = np.round(numbers * 100)
+        if np.all(np.isnan(numbers) | (centi / 100 == numbers)) and np.nanmax(np.abs(centi), initial=0) < 2**31:
+            return np.where(np.isnan(numbers), np.iinfo(np.int32).min, centi).astype(np.int32)
+        return numbers
+    if kind == "epoch":
+        return np.array([_epoch(v) for v in values], dtype=np.float64)
+    if kind == "bool":
+        return np.array([str(v).strip().lower() == "true" for v in values], dtype=bool)
+    if kind == "hla":
+        strings = ["" if v is None else str(v) for v in values]
+        masks, has = encoder.encode(strings)
+        return {"masks": masks, "has": has}
+    if kind == "specialties":
+        bits = np.zeros(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            for organ in str(value or "").split(","):
+                if organ.strip():
+                    bits[i] |= 1 << vocabulary.code(organ.strip())
+        return bits
+    raise ValueError(f"unknown column kind {kind!r}")
+
+
+class ColumnTable:
+    """One record type stored column by column, with an id -> row index"""
+
+    def __init__(self, id_field, schema, rows, vocabularies, encoder):
+        self.id_field = id_field
+        self.schema = schema
+        self.vocabularies = vocabularies
+        self.ids = np.array([str(r.get(id_field, "")) for r in rows], dtype=object)
+        self.index = {record_id: i for i, record_id in enumerate(self.ids.tolist())}
+        self.columns = {}
+        for field, kind, vocab in schema:
+            self.columns[field] = _encode(
+                kind, [r.get(field) for r in rows], vocabularies[vocab or field], encoder)
+
+    @classmethod
+    def from_arrays(cls, id_field, schema, vocabularies, ids, columns):
+        """Rebuild from the arrays written by to_arrays"""
+        table = cls.__new__(cls)
+        table.id_field = id_field
+        table.schema = schema
+        table.vocabularies = vocabularies
+        table.ids = ids.astype(object)
+        table.index = {record_id: i for i, record_id in enumerate(table.ids.tolist())}
+        table.columns = {}
+        for field, kind, _ in schema:
+            if kind == "hla":
+                table.columns[field] = {"masks": columns[f"{field}.masks"], "has": columns[f"{field}.has"]}
+            elif kind == "str":
+                table.columns[field] = columns[field].astype(object)
+            else:
+                table.columns[field] = columns[field]
+        return table
+
+    def to_arrays(self):
+        """Plain (non-object) arrays by name, for np.savez"""
+        arrays = {"ids": self.ids.astype(str)}
+        for field, kind, _ in self.schema:
+            column = self.columns[field]
+            if kind == "hla":
+                arrays[f"{field}.masks"], arrays[f"{field}.has"] = column["masks"], column["has"]
+            elif kind == "str":
+                arrays[field] = column.astype(str)
+            else:
+                arrays[field] = column
+        return arrays
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def numbers(self, field, rows=None):
+        """A numeric column as float64 (centi columns converted back)"""
+        column = self.columns[field]
+        column = column if rows is None else column[rows]
+        if column.dtype == np.int32 and self._kind(field) == "centi":
+            return np.where(column == np.iinfo(np.int32).min, np.nan, column / 100)
+        return column.astype(np.float64)
+
+    def _kind(self, field):
+        return next(kind for f, kind, _ in self.schema if f == field)
+
+    def labels(self, field, rows=None):
+        """Decoded labels of a category column"""
+        vocabulary = self.vocabularies[next(v or f for f, _, v in self.schema if f == field)]
+        codes = self.columns[field] if rows is None else self.columns[field][rows]
+        return [vocabulary.label(int(c)) for c in codes]
+
+    def record(self, row):
+        """One row as a typed dict"""
+        record = {self.id_field: self.ids[row]}
+        for field, kind, vocab in self.schema:
+            value = self.columns[field]
+            if kind == "category":
+                record[field] = self.vocabularies[vocab or field].label(int(value[row]))
+            elif kind == "hla":
+                continue
+            elif kind == "specialties":
+                organs = self.vocabularies[vocab]
+                record[field] = [organs.labels[b] for b in range(len(organs.labels)) if value[row] >> b & 1]
+            elif kind == "centi":
+                number = self.numbers(field, [row])[0]
+                record[field] = None if np.isnan(number) else float(number)
+            elif kind in ("float", "epoch"):
+                record[field] = None if np.isnan(value[row]) else float(value[row])
+            elif kind == "int":
+                record[field] = None if value[row] == -1 else int(value[row])
+            elif kind == "bool":
+                record[field] = bool(value[row])
+            else:
+                record[field] = value[row]
+        return record
+
+    def nbytes(self):
+        total = self.ids.nbytes
+        for column in self.columns.values():
+            if isinstance(column, dict):
+                total += sum(part.nbytes for part in column.values())
+            else:
+                total += column.nbytes
+        return total
+
+
+class Registry:
+    """Typed, columnar donors, recipients and hospitals
+
+    Built once from the CSVs or DynamoDB items: categorical codes for blood,
+    organ and hospital, exact fixed-point condition scores, epoch times and
+    HLA typings pre-encoded as bitmasks, so queries never re-coerce strings.
+    """
+
+    def __init__(self, donors, recipients, hospitals):
+        self.vocabularies = defaultdict(Vocabulary)
+        for name, normalize in _NORMALIZE.items():
+            self.vocabularies[name] = Vocabulary(normalize)
+        self.encoder = HLAEncoder().fit(
+            [d.get("hla_typing") or "" for d in donors], [r.get("hla_typing") or "" for r in recipients])
+
+        self.hospitals = ColumnTable("hospital_id", HOSPITAL_SCHEMA, hospitals, self.vocabularies, self.encoder)
+        self.donors = ColumnTable("donor_id", DONOR_SCHEMA, donors, self.vocabularies, self.encoder)
+        self.recipients = ColumnTable("recipient_id", RECIPIENT_SCHEMA, recipients, self.vocabularies, self.encoder)
+
+        # Recipient rows per (organ, blood) code pair
+        keys = (self.recipients["organ_needed"].astype(np.int64) * 256
+                + self.recipients["blood_type"].astype(np.int64))
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        self.buckets = {int(keys[chunk[0]]): chunk for chunk in np.split(order, bounds) if len(chunk)}
+
+    # (attribute, id field, schema) of each record table
+    _TABLES = [
+        ("donors", "donor_id", DONOR_SCHEMA),
+        ("recipients", "recipient_id", RECIPIENT_SCHEMA),
+        ("hospitals", "hospital_id", HOSPITAL_SCHEMA),
+    ]
+
+    def to_arrays(self):
+        """Every column, vocabulary and the bucket index as named plain arrays
+
+        Strings become fixed-width unicode, so the result can be written with
+        np.savez and read back without pickle.
+        """
+        arrays = {}
+        for name, vocabulary in self.vocabularies.items():
+            arrays[f"vocab.{name}"] = np.array(vocabulary.labels, dtype=str)
+        arrays["hla.antigens"] = np.array(sorted(self.encoder.vocab, key=self.encoder.vocab.get), dtype=str)
+        for name, _, _ in self._TABLES:
+            for field, array in getattr(self, name).to_arrays().items():
+                arrays[f"{name}.{field}"] = array
+        keys = sorted(self.buckets)
+        arrays["buckets.keys"] = np.array(keys, dtype=np.int64)
+        arrays["buckets.rows"] = np.concatenate([self.buckets[k] for k in keys] or [np.array([], dtype=np.int64)])
+        arrays["buckets.sizes"] = np.array([len(self.buckets[k]) for k in keys], dtype=np.int64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Registry from to_arrays output, without re-parsing any record"""
+        registry = cls.__new__(cls)
+        registry.vocabularies = defaultdict(Vocabulary)
+        for key in arrays:
+            if key.startswith("vocab."):
+                name = key[len("vocab."):]
+                vocabulary = registry.vocabularies[name] = Vocabulary(_NORMALIZE.get(name))
+                for label in arrays[key].tolist():
+                    vocabulary.code(label)
+        registry.encoder = HLAEncoder()
+        registry.encoder.vocab = {antigen: bit for bit, antigen in enumerate(arrays["hla.antigens"].tolist())}
+        for name, id_field, schema in cls._TABLES:
+            prefix = f"{name}."
+            columns = {key[len(prefix):]: arrays[key] for key in arrays if key.startswith(prefix)}
+            setattr(registry, name, ColumnTable.from_arrays(
+                id_field, schema, registry.vocabularies, columns.pop("ids"), columns))
+        bounds = np.cumsum(arrays["buckets.sizes"])[:-1]
+        registry.buckets = dict(zip(arrays["buckets.keys"].tolist(), np.split(arrays["buckets.rows"], bounds)))
+        return registry
+
+    @classmethod
+    def from_csv(cls, data_dir=DATA_DIR):
+        def read(name):
+            with open(os.path.join(data_dir, f"{name}.csv"), newline="", encoding="utf-8") as f:
+                return list(csv.DictReader(f))
+        return cls(read("donors"), read("recipients"), read("hospitals"))
+
+    def donor_columns(self, rows):
+        """Scoring columns (see backend.scoring) for donor rows"""
+        hla = self.donors["hla_typing"]
+        return {
+            "donor_id": self.donors.ids[rows],
+            "organ_condition_score": np.nan_to_num(self.donors.numbers("organ_condition_score", rows)),
+            "hla_masks": hla["masks"][rows],
+            "hla_has": hla["has"][rows],
+        }
+
+    def recipient_columns(self, rows):
+        """Scoring columns (see backend.scoring) for recipient rows"""
+        hla = self.recipients["hla_typing"]
+        urgency = self.recipients.numbers("urgency_level", rows)
+        return {
+            "recipient_id": self.recipients.ids[rows],
+            # calculate_match_score defaults a missing urgency to 1
+            "urgency_level": np.where(np.isnan(urgency), 1.0, urgency),
+            "hla_masks": hla["masks"][rows],
+            "hla_has": hla["has"][rows],
+        }
+
+    def bucket(self, donor_row):
+        """Recipient rows with the donor's organ and blood type"""
+        organ = int(self.donors["organ_type"][donor_row])
+        blood = int(self.donors["blood_type"][donor_row])
+        if organ < 0 or blood < 0:
+            return np.array([], dtype=np.int64)
+        return self.buckets.get(organ * 256 + blood, np.array([], dtype=np.int64))
+
+    def candidates(self, donor_id, limit=None):
+        """(recipient rows, scores) for a donor, best score first"""
+        row = self.donors.index.get(donor_id)
+        if row is None:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+        rows = self.bucket(row)
+        if not len(rows):
+            return rows, np.array([], dtype=np.float64)
+        d, r = self.donor_columns([row]), self.recipient_columns(rows)
+        scores = encoded_match_scores(d["organ_condition_score"], d["hla_masks"], d["hla_has"],
+                                      r["urgency_level"], r["hla_masks"], r["hla_has"])[0]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return rows[order], scores[order]
+
+    def expiry(self):
+        """compute_expiry for every donor at once (NaN where unknown)"""
+        death = self.donors["time_of_death"]
+        until = self.donors["available_until"]
+        condition = self.donors.numbers("organ_condition_score")
+        factor = np.where(np.isnan(condition), 85, condition) / 100
+        max_hours = self._max_hours()
+        with np.errstate(divide="ignore"):
+            expiry = np.where(factor > 0, death + (max_hours - 0.5 / factor) * 3600, death)
+        # fmin ignores a missing bound on either side
+        return np.fmin(expiry, until)
+
+    def hours_left(self, now=None):
+        """Simulated viability hours left per donor, from time_of_death"""
+        now = datetime.now().timestamp() if now is None else now
+        elapsed = np.where(np.isnan(self.donors["time_of_death"]), 0.0,
+                           (now - self.donors["time_of_death"]) / 3600)
+        condition = self.donors.numbers("organ_condition_score")
+        factor = np.where(np.isnan(condition), 85, condition) / 100
+        return np.maximum(0, (self._max_hours() - elapsed) * factor)
+
+    def _max_hours(self):
+        organs = self.vocabularies["organ"]
+        hours = [MAX_HOURS.get(label.lower(), DEFAULT_MAX_HOURS) for label in organs.labels]
+        table = np.array(hours + [DEFAULT_MAX_HOURS], dtype=np.float64)
+        # Code -1 (missing) indexes the trailing default
+        return table[self.donors["organ_type"]]
+
+    def nbytes(self):
+        return self.donors.nbytes() + self.recipients.nbytes() + self.hospitals.nbytes()
+
+
+_registry_lock = threading.Lock()
+# One rebuild at a time; held while building, so _registry_lock never is
+_build_lock = threading.Lock()
+_registry_cache = {"sources": None, "registry": None}
+
+
+def install_registry(registry, sources=None):
+    """Serve a prebuilt registry (e.g. from a snapshot)
+
+    With sources (the cached scans it was built from) it is kept until a
+    scan changes; without, it is pinned and served as-is until installed
+    again with sources.
+    """
+    with _registry_lock:
+        _registry_cache["registry"] = registry
+        _registry_cache["sources"] = None if sources is None else tuple(sources)
+
+
+def get_registry(donors_table, recipients_table, hospitals_table):
+    """Registry over the cached table scans, rebuilt when any scan changes
+
+    The rebuild runs outside the registry lock: only callers that need the
+    new registry wait for it, and pinned reads and installs never do.
+    """
+    with _registry_lock:
+        if _registry_cache["sources"] is None and _registry_cache["registry"] is not None:
+            return _registry_cache["registry"]
+    sources = tuple(table_cache.get(t) for t in (donors_table, recipients_table, hospitals_table))
+    registry = _built_from(sources)
+    if registry is not None:
+        return registry
+    with _build_lock:
+        # Another caller may have built it while this one waited
+        registry = _built_from(sources)
+        if registry is None:
+            registry = Registry(*sources)
+            with _registry_lock:
+                _registry_cache["registry"] = registry
+                _registry_cache["sources"] = sources
+    return registry
+
+
+def _built_from(sources):
+    """The cached registry if it was built from exactly these scans, else None"""
+    with _registry_lock:
+        cached = _registry_cache["sources"]
+        if cached is not None and all(a is b for a, b in zip(cached, sources)):
+            return _registry_cache["registry"]
+    return None
@@ -0,0 +1,157 @@
+import heapq
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.flight_data import FlightTable, normalize_mock
+
+# Minimum time on the ground between two legs
+MIN_CONNECTION_MINUTES = float(os.getenv("MIN_CONNECTION_MINUTES", "45"))
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FlightGraph:
+    """Flight schedule as a time-dependent graph of airports
+
+    Built over a FlightTable; each airport keeps its outgoing flights sorted
+    by departure, so the flights catchable after landing are one binary
+    search away.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.airports = table.airports
+        self.airport_index = {code: i for i, code in enumerate(self.airports)}
+        departures = table.departure.astype(np.float64)
+        arrivals = table.arrival.astype(np.float64)
+
+        order = np.lexsort((departures, table.origin))
+        self.flight_ids = order
+        self.departures = departures[order]
+        self.arrivals = arrivals[order]
+        self.destination_ids = table.destination[order]
+        # Outgoing flights of airport i are rows start[i]:start[i + 1]
+        self.start = np.searchsorted(table.origin[order], np.arange(len(self.airports) + 1))
+
+    @classmethod
+    def from_flights(cls, flights):
+        """Build from mock_flights.json-style dicts"""
+        return cls(FlightTable(normalize_mock(flights)))
+
+    def earliest_arrival(self, origin, destination, depart_after, deadline=None,
+                         min_connection=MIN_CONNECTION_MINUTES * 60):
+        """Earliest-arrival itinerary as a list of flight row numbers, or None
+
+        Dijkstra over airports keyed on arrival time. Flights departing
+        after the deadline, or landing after it or after the best known
+        arrival at their destination, are never pushed.
+        """
+        source = self.airport_index.get(origin.upper())
+        target = self.airport_index.get(destination.upper())
+        if source is None or target is None:
+            return None
+        deadline = np.inf if deadline is None else deadline
+
+        best = np.full(len(self.airports), np.inf)
+        via = np.full(len(self.airports), -1, dtype=np.int64)
+        best[source] = depart_after
+        heap = [(depart_after, source)]
+        while heap:
+            arrived, airport = heapq.heappop(heap)
+            if arrived > best[airport]:
+                continue
+            if airport == target:
+                break
+
+            ready = arrived if airport == source else arrived + min_connection
+            lo, hi = self.start[airport], self.start[airport + 1]
+            first = lo + np.searchsorted(self.departures[lo:hi], ready, side="left")
+            last = lo + np.searchsorted(self.departures[lo:hi], deadline, side="right")
+            if first >= last:
+                continue
+
+            rows = np.arange(first, last)
+            arrivals = self.arrivals[first:last]
+            destinations = self.destination_ids[first:last]
+            improves = (arrivals <= deadline) & (arrivals < best[destinations])
+            if not improves.any():
+                continue
+            rows, arrivals, destinations = rows[improves], arrivals[improves], destinations[improves]
+            # Earliest landing per destination wins
+            order = np.lexsort((arrivals, destinations))
+            keep = np.ones(len(order), dtype=bool)
+            keep[1:] = destinations[order][1:] != destinations[order][:-1]
+            for row, arrival, nxt in zip(rows[order][keep].tolist(), arrivals[order][keep].tolist(),
+                                         destinations[order][keep].tolist()):
+                best[nxt] = arrival
+                via[nxt] = row
+                heapq.heappush(heap, (arrival, nxt))
+
+        if not np.isfinite(best[target]) or target == source:
+            return None
+        legs = []
+        airport = target
+        while airport != source:
+            row = int(via[airport])
+            legs.append(row)
+            airport = self.airport_index[self.origin_of(row)]
+        return legs[::-1]
+
+    def origin_of(self, row):
+        return self.airports[int(np.searchsorted(self.start, row, side="right")) - 1]
+
+    def destination_of(self, row):
+        return self.airports[int(self.destination_ids[row])]
+
+    def flight(self, row):
+        """The normalized flight record for a graph row"""
+        return self.table.record(int(self.flight_ids[row]))
+
+
+def plan_route(graph, origin, destination, depart_after, hours_left=None,
+               min_connection_minutes=MIN_CONNECTION_MINUTES):
+    """Earliest-arrival itinerary that lands within the organ's viability window"""
+    deadline = None if hours_left is None else depart_after + hours_left * 3600
+    legs = graph.earliest_arrival(origin, destination, depart_after, deadline, min_connection_minutes * 60)
+    if legs is None:
+        return {
+            "found": False,
+            "origin": origin,
+            "destination": destination,
+            "reason": "No itinerary lands within the viability window" if hours_left is not None
+            else "No connecting flights"
+        }
+
+    departure = float(graph.departures[legs[0]])
+    arrival = float(graph.arrivals[legs[-1]])
+    plan = {
+        "found": True,
+        "origin": origin,
+        "destination": destination,
+        "departure": _iso(departure),
+        "arrival": _iso(arrival),
+        "total_hours": round((arrival - depart_after) / 3600, 2),
+        "connections": len(legs) - 1,
+        "legs": [graph.flight(row) for row in legs],
+    }
+    if hours_left is not None:
+        plan["hours_left_at_arrival"] = round(hours_left - (arrival - depart_after) / 3600, 2)
+    return plan
+
+
+_graph_lock = threading.Lock()
+_graph_cache = {"source": None, "graph": None}
+
+
+def graph_for(table):
+    """FlightGraph for a FlightTable, rebuilt only when the table object changes"""
+    with _graph_lock:
+        if _graph_cache["source"] is not table:
+            _graph_cache["graph"] = FlightGraph(table)
+            _graph_cache["source"] = table
+        return _graph_cache["graph"]
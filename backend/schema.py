@@ -0,0 +1,316 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from backend.data_access import parallel_scan, query_all
+from backend.registry import DONOR_SCHEMA, HOSPITAL_SCHEMA, RECIPIENT_SCHEMA
+
+# Synthetic GSI partition key: "<organ, lowercased>#<blood type>". DynamoDB
+# keys are one attribute each, so (organ, blood type) is stored combined.
+BUCKET_KEY = "organ_blood"
+DONOR_BUCKET_INDEX = "organ_blood-index"
+RECIPIENT_BUCKET_INDEX = "organ_blood-urgency_level-index"
+
+# Table tag data/migrate_schema.py writes once every item of a table is typed;
+# until it is present, reads Scan and compare numbers in Python
+SCHEMA_TAG = "organmatch:schema"
+SCHEMA_VERSION = "typed-1"
+# Seconds before a table found unmigrated (or an index not yet ACTIVE) is checked again
+SCHEMA_RECHECK_SECONDS = float(os.getenv("SCHEMA_RECHECK_SECONDS", "60"))
+
+# Table -> partition key, registry column schema, and GSIs as name -> (hash key, range key)
+TABLES = {
+    "donors": {
+        "key": "donor_id",
+        "columns": DONOR_SCHEMA,
+        "indexes": {DONOR_BUCKET_INDEX: (BUCKET_KEY, None)},
+    },
+    "recipients": {
+        "key": "recipient_id",
+        "columns": RECIPIENT_SCHEMA,
+        "indexes": {RECIPIENT_BUCKET_INDEX: (BUCKET_KEY, "urgency_level")},
+    },
+    "hospitals": {
+        "key": "hospital_id",
+        "columns": HOSPITAL_SCHEMA,
+        "indexes": {},
+    },
+}
+
+# Registry column kind -> stored DynamoDB type
+_STORED = {"int": "number", "float": "number", "centi": "number", "bool": "bool", "epoch": "datetime"}
+_ATTRIBUTE_TYPES = {"number": "N", "bool": "BOOL", "datetime": "S", "str": "S"}
+
+# Organ column each table buckets on
+_ORGAN_FIELD = {"donors": "organ_type", "recipients": "organ_needed"}
+
+
+def bucket_key(organ, blood_type):
+    """Value of the organ_blood GSI key, or None if either part is missing"""
+    if not organ or not blood_type:
+        return None
+    return f"{str(organ).strip().lower()}#{str(blood_type).strip()}"
+
+
+def _index_key_columns(table_name):
+    return {key for keys in TABLES.get(table_name, {}).get("indexes", {}).values() for key in keys if key}
+
+
+def index_keys(table_name, index_name):
+    """Key attributes of a GSI, hash first"""
+    hash_key, range_key = TABLES[table_name]["indexes"][index_name]
+    return [hash_key] + ([range_key] if range_key else [])
+
+
+def parse_number(value):
+    """Decimal for a numeric string, or None
+
+    Leading "+" or zeros (phone numbers, zip codes) are identifiers, not numbers.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        value = str(value)
+    text = str(value).strip()
+    if text[:1] == "+" or (len(text) > 1 and text[0] == "0" and text[1] != "."):
+        return None
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def parse_datetime(value):
+    """Sortable ISO form "YYYY-MM-DDTHH:MM:SS", or None"""
+    try:
+        return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00")).isoformat(timespec="seconds")
+    except ValueError:
+        return None
+
+
+def column_types(table_name, header=(), sample=()):
+    """Column -> "number" / "bool" / "datetime" / "str"
+
+    Known tables use the registry schema; columns it does not list (and
+    every column of any other table) are inferred from the sample rows.
+    """
+    known = {field: _STORED.get(kind, "str") for field, kind, _ in TABLES.get(table_name, {}).get("columns", [])}
+    types = dict(known)
+    for column in header:
+        if column in known:
+            continue
+        values = [row[column] for row in sample if row.get(column) not in (None, "")]
+        if values and all(parse_number(v) is not None for v in values):
+            types[column] = "number"
+        elif values and all(str(v).strip().lower() in ("true", "false") for v in values):
+            types[column] = "bool"
+        else:
+            types[column] = "str"
+    return types
+
+
+def unindexable(table_name, record, types=None):
+    """Number-typed GSI key columns of a record whose value does not parse
+
+    typed_item has to leave such a value out (DynamoDB rejects a GSI key of
+    the wrong type), so a stored item with any should not be rewritten.
+    """
+    types = types or column_types(table_name)
+    return [
+        column for column in sorted(_index_key_columns(table_name))
+        if types.get(column) == "number" and record.get(column) not in (None, "")
+        and parse_number(record[column]) is None
+    ]
+
+
+def typed_item(table_name, record, types=None):
+    """A record (CSV row or stored item) with typed attributes and GSI keys
+
+    Empty values are left out; a value that does not parse as its column
+    type is kept as-is rather than dropped, except for number GSI keys
+    (see unindexable). Already typed items come back unchanged, so
+    migrating twice is harmless.
+    """
+    types = types or column_types(table_name)
+    item = {}
+    for column, value in record.items():
+        if column is None or value is None or value == "":
+            continue
+        kind = types.get(column, "str")
+        if kind == "number":
+            number = parse_number(value)
+            if number is None and column in _index_key_columns(table_name):
+                # A GSI key of the wrong type would make DynamoDB reject the write
+                continue
+            item[column] = value if number is None else number
+        elif kind == "bool":
+            item[column] = value if isinstance(value, bool) else str(value).strip().lower() == "true"
+        elif kind == "datetime":
+            item[column] = parse_datetime(value) or value
+        else:
+            item[column] = value
+    organ_field = _ORGAN_FIELD.get(table_name)
+    if organ_field:
+        key = bucket_key(item.get(organ_field), item.get("blood_type"))
+        if key:
+            item[BUCKET_KEY] = key
+        else:
+            item.pop(BUCKET_KEY, None)
+    return item
+
+
+def table_definition(table_name):
+    """create_table arguments: on-demand billing, partition key plus GSIs"""
+    spec = TABLES[table_name]
+    types = column_types(table_name)
+    attributes = {spec["key"]: "S"}
+    indexes = []
+    for name, (hash_key, range_key) in spec["indexes"].items():
+        schema = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+        attributes[hash_key] = _ATTRIBUTE_TYPES[types.get(hash_key, "str")]
+        if range_key:
+            schema.append({"AttributeName": range_key, "KeyType": "RANGE"})
+            attributes[range_key] = _ATTRIBUTE_TYPES[types.get(range_key, "str")]
+        indexes.append({"IndexName": name, "KeySchema": schema, "Projection": {"ProjectionType": "ALL"}})
+    definition = {
+        "TableName": table_name,
+        "KeySchema": [{"AttributeName": spec["key"], "KeyType": "HASH"}],
+        "AttributeDefinitions": [{"AttributeName": a, "AttributeType": t} for a, t in attributes.items()],
+        "BillingMode": "PAY_PER_REQUEST",
+    }
+    if indexes:
+        definition["GlobalSecondaryIndexes"] = indexes
+    return definition
+
+
+def _wait_active(client, table_name, poll=5):
+    while True:
+        table = client.describe_table(TableName=table_name)["Table"]
+        statuses = [table["TableStatus"]] + [i["IndexStatus"] for i in table.get("GlobalSecondaryIndexes", [])]
+        if all(status == "ACTIVE" for status in statuses):
+            return
+        time.sleep(poll)
+
+
+def ensure_table(client, table_name):
+    """Create the table, or add whichever of its GSIs are missing; waits until ACTIVE"""
+    definition = table_definition(table_name)
+    try:
+        existing = client.describe_table(TableName=table_name)["Table"]
+    except client.exceptions.ResourceNotFoundException:
+        client.create_table(**definition)
+        _wait_active(client, table_name)
+        return list(TABLES[table_name]["indexes"])
+
+    present = {i["IndexName"] for i in existing.get("GlobalSecondaryIndexes", [])}
+    added = []
+    for index in definition.get("GlobalSecondaryIndexes", []):
+        if index["IndexName"] in present:
+            continue
+        names = {k["AttributeName"] for k in index["KeySchema"]}
+        # DynamoDB accepts one new GSI per update_table call
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=[a for a in definition["AttributeDefinitions"] if a["AttributeName"] in names],
+            GlobalSecondaryIndexUpdates=[{"Create": index}],
+        )
+        _wait_active(client, table_name)
+        added.append(index["IndexName"])
+    return added
+
+
+def mark_migrated(client, table_name):
+    """Tag the table as fully typed, which lets reads Query its GSIs"""
+    arn = client.describe_table(TableName=table_name)["Table"]["TableArn"]
+    client.tag_resource(ResourceArn=arn, Tags=[{"Key": SCHEMA_TAG, "Value": SCHEMA_VERSION}])
+
+
+def _has_schema_tag(table):
+    kwargs = {"ResourceArn": table.table_arn}
+    while True:
+        response = table.meta.client.list_tags_of_resource(**kwargs)
+        if any(t["Key"] == SCHEMA_TAG and t["Value"] == SCHEMA_VERSION for t in response.get("Tags", [])):
+            return True
+        if not response.get("NextToken"):
+            return False
+        kwargs["NextToken"] = response["NextToken"]
+
+
+def _index_active(table, index_name):
+    table.reload()
+    return any(
+        i["IndexName"] == index_name and i.get("IndexStatus", "ACTIVE") == "ACTIVE"
+        for i in table.global_secondary_indexes or []
+    )
+
+
+_status_lock = threading.Lock()
+_status = {}
+
+
+def _checked(table, what, check):
+    """check(), with a positive answer kept and a negative one for SCHEMA_RECHECK_SECONDS"""
+    cache_key = (table.name, what)
+    now = time.monotonic()
+    with _status_lock:
+        cached = _status.get(cache_key)
+        if cached and (cached[0] or cached[1] > now):
+            return cached[0]
+    try:
+        ok = check()
+    except Exception as e:
+        print(f"⚠️ Could not describe {table.name}: {e}")
+        ok = False
+    with _status_lock:
+        _status[cache_key] = (ok, now + SCHEMA_RECHECK_SECONDS)
+    return ok
+
+
+def schema_migrated(table):
+    """True once data/migrate_schema.py has tagged the table as fully typed"""
+    return _checked(table, SCHEMA_TAG, lambda: _has_schema_tag(table))
+
+
+def index_available(table, index_name):
+    """True once the table is migrated and the GSI is ACTIVE; otherwise callers fall back to Scan
+
+    An ACTIVE index alone is not enough: items not yet rewritten by the
+    migration have no GSI key and would be missing from a Query.
+    """
+    return schema_migrated(table) and _checked(table, index_name, lambda: _index_active(table, index_name))
+
+
+def bucket_condition(organ, blood_type, urgency=None, min_urgency=None):
+    """KeyConditionExpression for one organ_blood bucket, optionally narrowed on urgency"""
+    from boto3.dynamodb.conditions import Key
+
+    condition = Key(BUCKET_KEY).eq(bucket_key(organ, blood_type))
+    if urgency is not None:
+        condition = condition & Key("urgency_level").eq(Decimal(str(urgency)))
+    elif min_urgency is not None:
+        condition = condition & Key("urgency_level").gte(Decimal(str(min_urgency)))
+    return condition
+
+
+def recipients_for_donors(recipients_table, donors, workers=8):
+    """Recipients sharing an organ_blood bucket with any of the donors
+
+    One Query per distinct donor bucket on the recipients GSI, run in
+    parallel; a table without the index is scanned instead.
+    """
+    if not index_available(recipients_table, RECIPIENT_BUCKET_INDEX):
+        return parallel_scan(recipients_table)
+    keys = sorted({k for k in (bucket_key(d.get("organ_type"), d.get("blood_type")) for d in donors) if k})
+    if not keys:
+        return []
+    from boto3.dynamodb.conditions import Key
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(keys))) as pool:
+        pages = pool.map(
+            lambda key: query_all(recipients_table, RECIPIENT_BUCKET_INDEX, Key(BUCKET_KEY).eq(key)), keys
+        )
+        return [recipient for page in pages for recipient in page]
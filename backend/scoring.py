@@ -0,0 +1,161 @@
+import csv
+
+import numpy as np
+
+# Donor rows scored per block; bounds the (rows x recipients x words) popcount buffer
+DEFAULT_CHUNK_SIZE = 256
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _tokenize(typing):
+    """Split an hla_typing string exactly like calculate_match_score does"""
+    return typing.replace(" ", "").split(",")
+
+
+def _popcount(words):
+    """Count set bits over the last (word) axis"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+class HLAEncoder:
+    """Maps HLA antigens to bit positions so set overlap becomes a popcount"""
+
+    def __init__(self):
+        self.vocab = {}
+
+    def fit(self, *typing_columns):
+        for column in typing_columns:
+            for typing in column:
+                if typing:
+                    for antigen in _tokenize(typing):
+                        self.vocab.setdefault(antigen, len(self.vocab))
+        return self
+
+    @property
+    def words(self):
+        return max(1, (len(self.vocab) + 63) // 64)
+
+    def encode(self, typings):
+        """Return (masks, has_typing): uint64 (n, words) bitmasks and a bool mask"""
+        masks = np.zeros((len(typings), self.words), dtype=np.uint64)
+        has_typing = np.zeros(len(typings), dtype=bool)
+        for row, typing in enumerate(typings):
+            if not typing:
+                continue
+            has_typing[row] = True
+            for antigen in _tokenize(typing):
+                bit = self.vocab[antigen]
+                masks[row, bit // 64] |= np.uint64(1 << (bit % 64))
+        return masks, has_typing
+
+
+def donor_columns(donors):
+    """Column arrays for the donor fields used in scoring"""
+    return {
+        "donor_id": np.array([d.get("donor_id", "") for d in donors], dtype=object),
+        "organ_type": np.array([d.get("organ_type", "").lower() for d in donors], dtype=object),
+        "blood_type": np.array([d.get("blood_type", "") for d in donors], dtype=object),
+        "organ_condition_score": np.array(
+            [float(d.get("organ_condition_score", 0)) for d in donors], dtype=np.float64),
+        "hla_typing": np.array([d.get("hla_typing") or "" for d in donors], dtype=object),
+    }
+
+
+def recipient_columns(recipients):
+    """Column arrays for the recipient fields used in scoring"""
+    return {
+        "recipient_id": np.array([r.get("recipient_id", "") for r in recipients], dtype=object),
+        "organ_needed": np.array([r.get("organ_needed", "").lower() for r in recipients], dtype=object),
+        "blood_type": np.array([r.get("blood_type", "") for r in recipients], dtype=object),
+        "urgency_level": np.array(
+            [float(r.get("urgency_level", 1)) for r in recipients], dtype=np.float64),
+        "hla_typing": np.array([r.get("hla_typing") or "" for r in recipients], dtype=object),
+    }
+
+
+def load_columns(path):
+    """Load donors.csv or recipients.csv into scoring columns"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if rows and "donor_id" in rows[0]:
+        return donor_columns(rows)
+    return recipient_columns(rows)
+
+
+def round_scores(raw, digits=2):
+    """Round like Python's round(x, digits), which is correctly rounded, unlike np.round
+
+    np.round scales by 10**digits first, so values sitting on a .5 boundary
+    can round the other way; those few are re-rounded with the builtin.
+    """
+    rounded = np.round(raw, digits)
+    scaled = raw * 10 ** digits
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for idx in zip(*np.nonzero(ambiguous)):
+        rounded[idx] = round(float(raw[idx]), digits)
+    return rounded
+
+
+def batch_match_scores(organ_condition_score, donor_hla, urgency_level, recipient_hla,
+                       chunk_size=DEFAULT_CHUNK_SIZE):
+    """Score every donor against every recipient at once
+
+    Takes the donor condition scores / HLA typings and recipient urgency levels
+    / HLA typings as arrays and returns a (donors, recipients) float64 matrix
+    equal to calculate_match_score applied to each pair.
+    """
+    encoder = HLAEncoder().fit(donor_hla, recipient_hla)
+    donor_masks, donor_has = encoder.encode(donor_hla)
+    recip_masks, recip_has = encoder.encode(recipient_hla)
+    return encoded_match_scores(organ_condition_score, donor_masks, donor_has,
+                                urgency_level, recip_masks, recip_has, chunk_size)
+
+
+def encoded_match_scores(organ_condition_score, donor_masks, donor_has, urgency_level,
+                         recip_masks, recip_has, chunk_size=DEFAULT_CHUNK_SIZE):
+    """batch_match_scores for HLA typings already encoded by one shared HLAEncoder"""
+    condition = np.asarray(organ_condition_score, dtype=np.float64)
+    urgency = np.asarray(urgency_level, dtype=np.float64)
+
+    # Same summation order as the scalar function so floats match bit for bit
+    base = (50 + condition * 0.3)[:, None] + (urgency * 3)[None, :]
+
+    raw = np.empty((len(condition), len(urgency)), dtype=np.float64)
+    for start in range(0, len(condition), chunk_size):
+        stop = start + chunk_size
+        overlap = _popcount(donor_masks[start:stop, None, :] & recip_masks[None, :, :])
+        overlap *= donor_has[start:stop, None] & recip_has[None, :]
+        raw[start:stop] = base[start:stop] + overlap * 5
+
+    return round_scores(raw)
+
+
+def compatibility_mask(donor_cols, recipient_cols):
+    """Boolean (donors, recipients) matrix of organ + blood type matches"""
+    return (
+        (donor_cols["organ_type"][:, None] == recipient_cols["organ_needed"][None, :])
+        & (donor_cols["blood_type"][:, None] == recipient_cols["blood_type"][None, :])
+    )
+
+
+def score_matrix(donor_cols, recipient_cols, chunk_size=DEFAULT_CHUNK_SIZE):
+    """batch_match_scores over column dicts from donor_columns / recipient_columns
+
+    Columns that already carry hla_masks / hla_has (e.g. from the Registry)
+    skip re-parsing the HLA strings.
+    """
+    if "hla_masks" in donor_cols and "hla_masks" in recipient_cols:
+        return encoded_match_scores(
+            donor_cols["organ_condition_score"], donor_cols["hla_masks"], donor_cols["hla_has"],
+            recipient_cols["urgency_level"], recipient_cols["hla_masks"], recipient_cols["hla_has"],
+            chunk_size=chunk_size,
+        )
+    return batch_match_scores(
+        donor_cols["organ_condition_score"], donor_cols["hla_typing"],
+        recipient_cols["urgency_level"], recipient_cols["hla_typing"],
+        chunk_size=chunk_size,
+    )
@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from backend.data_access import json_default, parallel_scan, table_cache
+from backend.registry import DATA_DIR, Registry, install_registry
+
+# Read at startup and rewritten after each background refresh. Point it at a
+# writable path (e.g. /tmp/...) on read-only deployments, or bundle one built
+# with `python -m backend.snapshot` at deploy time.
+SNAPSHOT_PATH = os.getenv("REGISTRY_SNAPSHOT_PATH", os.path.join(DATA_DIR, "registry_snapshot.npz"))
+# Opt-in background rescan of DynamoDB, in seconds (e.g. TABLE_CACHE_TTL / 2 so
+# requests never scan) for long-lived servers. Off by default: every process
+# would otherwise scan all three tables on a timer, wanted or not.
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "0"))
+# Snapshots older than this are not served at startup; 0 accepts any age
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("REGISTRY_SNAPSHOT_MAX_AGE_SECONDS", "86400"))
+SNAPSHOT_VERSION = 2
+
+TABLE_NAMES = ("donors", "recipients", "hospitals")
+
+
+def save_snapshot(items, registry, path=SNAPSHOT_PATH):
+    """Write the raw items and the registry arrays to one .npz, atomically
+
+    Items are stored as JSON (numbers restored as Decimal on load, like
+    DynamoDB returns them); everything else is plain arrays, so no pickle.
+    """
+    arrays = {f"registry.{key}": array for key, array in registry.to_arrays().items()}
+    for name in TABLE_NAMES:
+        raw = json.dumps(items[name], default=json_default, separators=(",", ":")).encode("utf-8")
+        arrays[f"items.{name}"] = np.frombuffer(raw, dtype=np.uint8)
+    arrays["meta"] = np.array(json.dumps({"version": SNAPSHOT_VERSION, "saved_at": time.time()}))
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_registry(path=SNAPSHOT_PATH):
+    """(Registry, saved_at) from a snapshot, or None if absent or unreadable"""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != SNAPSHOT_VERSION:
+                print(f"⚠️ Ignoring snapshot {path}: version {meta.get('version')}")
+                return None
+            prefix = "registry."
+            registry = Registry.from_arrays({k[len(prefix):]: data[k] for k in data.files if k.startswith(prefix)})
+        return registry, meta["saved_at"]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ Could not load snapshot {path}: {e}")
+        return None
+
+
+def load_items(path=SNAPSHOT_PATH):
+    """Raw items by table from a snapshot (numbers as Decimal, as DynamoDB returns them)"""
+    with np.load(path, allow_pickle=False) as data:
+        return {
+            name: json.loads(data[f"items.{name}"].tobytes(), parse_float=Decimal, parse_int=Decimal)
+            for name in TABLE_NAMES
+        }
+
+
+class SnapshotRefresher:
+    """Serve the last snapshot at startup and keep it current in the background
+
+    start() loads only the registry arrays (milliseconds, no DynamoDB calls)
+    and serves them pinned, unless the snapshot is older than max_age. A
+    daemon thread then decodes the snapshot's raw items into the shared table
+    cache. With refresh_seconds > 0 it also rescans the tables on that
+    interval, swaps in a rebuilt registry when anything changed and rewrites
+    the snapshot for the next cold start.
+    """
+
+    def __init__(self, get_tables, path=SNAPSHOT_PATH, refresh_seconds=SNAPSHOT_REFRESH_SECONDS,
+                 max_age=SNAPSHOT_MAX_AGE_SECONDS):
+        self.get_tables = get_tables
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.max_age = max_age
+        self.loaded_ms = None
+        self._registry = None
+        self._items = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def warm(self):
+        """Pin the snapshot's registry; True if one was loaded"""
+        start = time.perf_counter()
+        snapshot = load_registry(self.path)
+        if snapshot is None:
+            return False
+        registry, saved_at = snapshot
+        age = time.time() - saved_at
+        if self.max_age > 0 and age > self.max_age:
+            print(f"⚠️ Ignoring snapshot {self.path}: {age / 3600:.1f} h old (limit {self.max_age / 3600:.1f} h)")
+            return False
+        self._registry = registry
+        install_registry(self._registry)
+        self.loaded_ms = (time.perf_counter() - start) * 1000
+        print(f"Loaded registry snapshot ({len(self._registry.donors)} donors, "
+              f"{len(self._registry.recipients)} recipients) in {self.loaded_ms:.1f} ms, "
+              f"{age / 60:.0f} min old")
+        return True
+
+    def seed(self):
+        """Decode the snapshot's items into the table cache and bind the pinned registry to them"""
+        if self._registry is None:
+            return
+        try:
+            items = load_items(self.path)
+        except Exception as e:
+            # Unpin, so requests build the registry from the tables rather than serve it forever
+            print(f"⚠️ Could not load snapshot items {self.path}: {e}")
+            self._registry = None
+            install_registry(None)
+            return
+        for name in TABLE_NAMES:
+            table_cache.put(name, items[name])
+        install_registry(self._registry, [items[name] for name in TABLE_NAMES])
+        self._items = items
+
+    def refresh(self):
+        """Rescan the tables; rebuild the registry and rewrite the snapshot if anything changed"""
+        tables = self.get_tables()
+        items = {name: parallel_scan(table) for name, table in zip(TABLE_NAMES, tables)}
+        changed = items != self._items
+        if changed:
+            self._items = items
+        # Unchanged scans keep the same lists (and so the same registry) fresh for another TTL
+        for name, table in zip(TABLE_NAMES, tables):
+            table_cache.put(table.name, self._items[name])
+        if not changed:
+            return False
+        # Built here rather than via get_registry, which would hand back a still pinned snapshot
+        registry = Registry(*(items[name] for name in TABLE_NAMES))
+        install_registry(registry, [items[name] for name in TABLE_NAMES])
+        try:
+            save_snapshot(items, registry, self.path)
+        except (OSError, TypeError) as e:
+            print(f"⚠️ Could not write snapshot {self.path}: {e}")
+        return True
+
+    def _run(self):
+        self.seed()
+        if self.refresh_seconds <= 0:
+            return
+        last_error = None
+        while True:
+            try:
+                self.refresh()
+                last_error = None
+            except Exception as e:
+                # Report each distinct failure once rather than every cycle
+                if str(e) != last_error:
+                    print(f"⚠️ Snapshot refresh failed: {e}")
+                last_error = str(e)
+            if self._stop.wait(self.refresh_seconds):
+                return
+
+    def start(self):
+        """warm(), then seed (and refresh, if enabled) in a daemon thread; returns whether a snapshot was loaded"""
+        warmed = self.warm()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-refresh", daemon=True)
+            self._thread.start()
+        return warmed
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    """python -m backend.snapshot [--csv] [--out data/registry_snapshot.npz]"""
+    parser = argparse.ArgumentParser(description="Build a registry snapshot for fast cold starts")
+    parser.add_argument("--csv", action="store_true", help="build from the CSVs in data/ instead of DynamoDB")
+    parser.add_argument("--out", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.csv:
+        import csv
+
+        items = {}
+        for name in TABLE_NAMES:
+            with open(os.path.join(DATA_DIR, f"{name}.csv"), newline="", encoding="utf-8") as f:
+                items[name] = list(csv.DictReader(f))
+    else:
+        from backend.core import initialize_tables
+
+        initialize_tables()
+        from backend.core import donors_table, recipients_table, hospitals_table
+        items = {t.name: parallel_scan(t) for t in (donors_table, recipients_table, hospitals_table)}
+    registry = Registry(*(items[name] for name in TABLE_NAMES))
+    save_snapshot(items, registry, args.out)
+    print(f"Wrote {args.out} ({os.path.getsize(args.out) / 2**20:.1f} MiB) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Print each startup phase with the packages it imported, and the time to the
+# first healthy /api/health. For per-module import times run
+# benchmarks/bench_startup.py (python -X importtime).
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+
+def _process_age():
+    """Seconds since this process was started (Linux), else 0"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupTimer:
+    """Milliseconds from process start to each startup phase and to the first healthy /api/health
+
+    Process start comes from /proc where available (so interpreter startup
+    and module imports count), otherwise from when this module was imported.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() - _process_age() if started is None else started
+        self.phases = {}
+        self.milestones = {}
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def mark(self, name):
+        """Record a milestone once; later marks of the same name are ignored"""
+        with self._lock:
+            if name in self.milestones:
+                return False
+            self.milestones[name] = round(self.elapsed_ms(), 1)
+        if STARTUP_PROFILE:
+            print(f"⏱️ {name} at {self.milestones[name]:.1f} ms")
+        return True
+
+    def mark_healthy(self):
+        return self.mark("first_healthy")
+
+    @contextmanager
+    def phase(self, name):
+        before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.phases[name] = round(ms, 1)
+            if STARTUP_PROFILE:
+                stdlib = getattr(sys, "stdlib_module_names", ())
+                packages = sorted({module.split(".")[0] for module in set(sys.modules) - before} - set(stdlib))
+                packages = [p for p in packages if not p.startswith("_")]
+                print(f"⏱️ {name}: {ms:.1f} ms, imported {', '.join(packages) or 'nothing new'}")
+
+    def snapshot(self):
+        with self._lock:
+            return {"phases_ms": dict(self.phases), "milestones_ms": dict(self.milestones)}
+
+
+startup_timer = StartupTimer()
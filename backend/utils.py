@@ -1,5 +1,6 @@
 from datetime import datetime
-import random
+
+from backend.flight_sim import simulate_flight_search as simulate_flights
 
 def simulate_viability_check(organ_data):
     """Simulate organ viability checking"""
@@ -53,41 +54,8 @@ def simulate_weather_data(location):
 
 
 def simulate_flight_search(origin, destination, date=None):
-    """Simulate flight search"""
-    flights = [
-        {
-            "flight": f"AA{123 + hash(origin) % 900}",
-            "departure": "14:30",
-            "arrival": "18:45",
-            "duration": "6h 15m",
-            "aircraft": "Boeing 737",
-            "price": "$450"
-        },
-        {
-            "flight": f"DL{456 + hash(destination) % 900}",
-            "departure": "16:00",
-            "arrival": "20:30",
-            "duration": "6h 30m",
-            "aircraft": "Airbus A320",
-            "price": "$380"
-        },
-        {
-            "flight": f"UA{789 + hash(origin + destination) % 900}",
-            "departure": "18:15",
-            "arrival": "22:45",
-            "duration": "6h 30m",
-            "aircraft": "Boeing 757",
-            "price": "$420"
-        }
-    ]
-
-    return {
-        "flights": flights,
-        "fastest_flight": flights[0]["flight"],
-        "cheapest_flight": flights[1]["flight"],
-        "recommendation": f"Book {flights[0]['flight']} for fastest transport",
-        "method": "simulation"
-    }
+    """Simulate flight search (deterministic and memoized per route and day)"""
+    return simulate_flights(origin, destination, date)
 
 
 def simulate_donor_matching(donor_data, recipient_data):
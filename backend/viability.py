@@ -0,0 +1,137 @@
+import math
+from datetime import datetime
+
+import numpy as np
+
+from backend.scoring import round_scores
+
+# Same limits as OrganMatchBackend._simulate_viability_check
+MAX_HOURS = {"heart": 6, "liver": 12, "kidney": 24, "lung": 8}
+DEFAULT_MAX_HOURS = 6
+
+# Largest batch accepted by /api/check-viability/batch
+MAX_BATCH_SIZE = 10000
+
+
+
+def _has_offset(value):
+    """True for 'Z' or a +/-HH:MM offset after the date part"""
+    tail = value[10:]
+    return value.endswith("Z") or "+" in tail or "-" in tail
+
+
+def parse_donation_times(values):
+    """Parse ISO timestamps in bulk into a datetime64[us] array
+
+    Empty, unparseable or timezone-qualified values become NaT; as in the
+    single-organ check, those count as 0 hours elapsed (an offset-aware time
+    cannot be compared with the naive local clock).
+    """
+    times = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[us]")
+    plain = [
+        i for i, value in enumerate(values)
+        if isinstance(value, str) and value and not _has_offset(value)
+    ]
+    if not plain:
+        return times
+
+    strings = [values[i] for i in plain]
+    try:
+        times[plain] = np.array(strings, dtype="datetime64[us]")
+    except ValueError:
+        # A malformed value poisons the bulk parse; fall back row by row
+        for i, value in zip(plain, strings):
+            try:
+                times[i] = np.datetime64(value, "us")
+            except ValueError:
+                try:
+                    times[i] = np.datetime64(datetime.fromisoformat(value), "us")
+                except ValueError:
+                    pass
+    return times
+
+
+def _to_columns(organs):
+    """Validate organs into columns; returns (columns, rows, errors)"""
+    try:
+        # Fast path: every item is well formed
+        columns = (
+            [str(organ.get("type", "heart")).lower() for organ in organs],
+            [organ.get("donation_time") for organ in organs],
+            np.array([organ.get("temperature", 4) for organ in organs], dtype=np.float64),
+            np.array([organ.get("condition_score", 85) for organ in organs], dtype=np.float64),
+        )
+        # null converts to NaN without raising; those items need per-item errors
+        if np.isfinite(columns[2]).all() and np.isfinite(columns[3]).all():
+            return columns, list(range(len(organs))), {}
+    except (AttributeError, TypeError, ValueError):
+        pass
+
+    types, donation_times, temperatures, conditions, rows = [], [], [], [], []
+    errors = {}
+    for i, organ in enumerate(organs):
+        if not isinstance(organ, dict):
+            errors[i] = "organ must be an object"
+            continue
+        try:
+            organ_type = str(organ.get("type", "heart")).lower()
+            temperature = float(organ.get("temperature", 4))
+            condition = float(organ.get("condition_score", 85))
+        except (TypeError, ValueError) as e:
+            errors[i] = f"invalid organ data: {e}"
+            continue
+        if not (math.isfinite(temperature) and math.isfinite(condition)):
+            errors[i] = "invalid organ data: temperature and condition_score must be finite numbers"
+            continue
+        rows.append(i)
+        types.append(organ_type)
+        donation_times.append(organ.get("donation_time"))
+        temperatures.append(temperature)
+        conditions.append(condition)
+    return (types, donation_times, temperatures, conditions), rows, errors
+
+
+def simulate_viability_batch(organs, now=None):
+    """_simulate_viability_check over many organs in one vectorized pass
+
+    Returns one result per input, in order; invalid items get {"error": ...}
+    instead of failing the whole batch.
+    """
+    (types, donation_times, temperatures, conditions), rows, errors = _to_columns(organs)
+    results = [None] * len(organs)
+    for i, message in errors.items():
+        results[i] = {"error": message}
+    if not rows:
+        return results
+
+    now = np.datetime64(now or datetime.now(), "us")
+    parsed = parse_donation_times(donation_times)
+    # Seconds first, then hours: the same two divisions as timedelta.total_seconds() / 3600
+    elapsed_us = (now - parsed).astype(np.int64)
+    hours_elapsed = np.where(np.isnat(parsed), 0.0, elapsed_us / 1e6 / 3600)
+
+    max_hours = np.array([MAX_HOURS.get(t, DEFAULT_MAX_HOURS) for t in types], dtype=np.float64)
+    temp_factor = np.where(np.asarray(temperatures, dtype=np.float64) <= 4, 1.0, 0.7)
+    condition_factor = np.asarray(conditions, dtype=np.float64) / 100
+
+    hours_left = np.maximum(0, (max_hours - hours_elapsed) * temp_factor * condition_factor)
+    is_viable = hours_left > 0.5
+    urgency = np.where(hours_left < 2, "High", np.where(hours_left < 4, "Medium", "Low"))
+    recommendation = np.where(is_viable, "Proceed with transport", "Consider alternative options")
+
+    columns = zip(
+        rows, is_viable.tolist(), round_scores(hours_left, 1).tolist(),
+        round_scores(hours_elapsed, 1).tolist(), max_hours.astype(int).tolist(),
+        recommendation.tolist(), urgency.tolist(),
+    )
+    for i, viable, left, elapsed, limit, advice, level in columns:
+        results[i] = {
+            "is_viable": viable,
+            "hours_left": left,
+            "hours_elapsed": elapsed,
+            "max_hours": limit,
+            "recommendation": advice,
+            "urgency": level,
+            "method": "simulation"
+        }
+    return results
@@ -0,0 +1,85 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.cache import TTLCache, normalize_text_key
+
+# Overridable so tests can point at a local stub server
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "http://api.weatherapi.com/v1/current.json")
+# (connect, read) timeouts in seconds for WeatherAPI calls
+WEATHER_TIMEOUT = (
+    float(os.getenv("WEATHER_CONNECT_TIMEOUT", "2")),
+    float(os.getenv("WEATHER_READ_TIMEOUT", "4")),
+)
+
+# Weather cache: fresh for WEATHER_CACHE_TTL seconds, then served stale for up
+# to WEATHER_CACHE_STALE_TTL more while one background call refreshes it
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "600"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "256"))
+
+_session = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="weather")
+
+
+def weather_session():
+    """Process-wide requests.Session so connections (and TLS) are reused"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+# Shared by /api/get-weather and transport planning
+weather_cache = TTLCache(
+    WEATHER_CACHE_TTL, max_entries=WEATHER_CACHE_SIZE,
+    stale_ttl=WEATHER_CACHE_STALE_TTL, normalize=normalize_text_key,
+)
+
+
+def _fetch_uncached(location, api_key):
+    response = weather_session().get(
+        WEATHER_API_URL, params={"key": api_key, "q": location}, timeout=WEATHER_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_current_weather(location, api_key=None):
+    """Raw WeatherAPI current.json payload for a location; raises on failure
+
+    Served from weather_cache; concurrent requests for one city share a call.
+    """
+    api_key = api_key or os.getenv("WEATHER_API_KEY")
+    return weather_cache.get_or_load(location, lambda: _fetch_uncached(location, api_key))
+
+
+def transport_weather(city, api_key=None):
+    """Weather summary used by transport planning; errors are returned, not raised"""
+    try:
+        data = fetch_current_weather(city, api_key)
+        return {
+            "city": city,
+            "temperature_c": data["current"]["temp_c"],
+            "condition": data["current"]["condition"]["text"],
+            "wind_kph": data["current"]["wind_kph"],
+            "humidity": data["current"]["humidity"]
+        }
+    except Exception as e:
+        return {"city": city, "error": str(e)}
+
+
+def fetch_weather_concurrently(cities, api_key=None):
+    """transport_weather for every city at once; latency is the slowest call"""
+    futures = [_executor.submit(transport_weather, city, api_key) for city in cities]
+    return [future.result() for future in futures]
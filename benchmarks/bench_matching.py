@@ -0,0 +1,118 @@
+"""
+Benchmark the indexed MatchingEngine against the original nested loop.
+
+Usage: python benchmarks/bench_matching.py [--donors 300] [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.matching import MatchingEngine, calculate_match_score
+
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+ORGANS = ["Heart", "Kidney", "Liver", "Lung", "Pancreas"]
+
+
+def _hla(rng):
+    return f"A{rng.randint(1, 30)},B{rng.randint(1, 50)},DR{rng.randint(1, 17)}"
+
+
+def make_registry(n_donors, n_recipients, n_hospitals=100, seed=42):
+    rng = random.Random(seed)
+    hospitals = [
+        {"hospital_id": f"H{i:03d}", "hospital_name": f"Hospital_{i}", "city": f"City_{i % 20}",
+         "transport_ready": str(rng.random() > 0.5)}
+        for i in range(1, n_hospitals + 1)
+    ]
+    donors = [
+        {"donor_id": f"D{i:06d}", "organ_type": rng.choice(ORGANS), "blood_type": rng.choice(BLOOD_TYPES),
+         "organ_condition_score": str(round(rng.uniform(50, 100), 2)), "hla_typing": _hla(rng),
+         "hospital_id": f"H{rng.randint(1, n_hospitals):03d}"}
+        for i in range(n_donors)
+    ]
+    recipients = [
+        {"recipient_id": f"R{i:06d}", "organ_needed": rng.choice(ORGANS), "blood_type": rng.choice(BLOOD_TYPES),
+         "urgency_level": str(rng.randint(1, 5)), "hla_typing": _hla(rng),
+         "hospital_id": f"H{rng.randint(1, n_hospitals):03d}"}
+        for i in range(n_recipients)
+    ]
+    return donors, recipients, hospitals
+
+
+def naive_match(donors, recipients, hospitals):
+    """The original O(donors x recipients) loop from lambda_matcher_tool"""
+    hospital_lookup = {h["hospital_id"]: h for h in hospitals}
+    matches = []
+    for donor in donors:
+        for recipient in recipients:
+            if (
+                donor["organ_type"].lower() == recipient["organ_needed"].lower()
+                and donor["blood_type"] == recipient["blood_type"]
+            ):
+                donor_hosp = hospital_lookup.get(donor.get("hospital_id", ""), {})
+                recip_hosp = hospital_lookup.get(recipient.get("hospital_id", ""), {})
+                if not donor_hosp or not recip_hosp:
+                    continue
+                matches.append({
+                    "donor_id": donor["donor_id"],
+                    "recipient_id": recipient["recipient_id"],
+                    "organ": donor["organ_type"],
+                    "blood_type": donor["blood_type"],
+                    "donor_hospital": donor_hosp.get("hospital_name", "Unknown"),
+                    "recipient_hospital": recip_hosp.get("hospital_name", "Unknown"),
+                    "donor_city": donor_hosp.get("city", ""),
+                    "recipient_city": recip_hosp.get("city", ""),
+                    "transport_ready": donor_hosp.get("transport_ready", "False"),
+                    "urgency_level": recipient.get("urgency_level", "N/A"),
+                    "match_score": calculate_match_score(donor, recipient)
+                })
+    return matches
+
+
+def indexed_match(donors, recipients, hospitals, vectorized=False):
+    engine = MatchingEngine(hospitals, vectorized=vectorized)
+    engine.add_recipients(recipients)
+    return engine.match(donors)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--donors", type=int, default=300)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--naive-max", type=int, default=10000,
+                        help="skip the naive loop above this many recipients")
+    args = parser.parse_args()
+
+    print(f"{'recipients':>10} {'matches':>9} {'naive s':>9} {'indexed s':>10} {'numpy s':>9} "
+          f"{'pairs/s':>12} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        donors, recipients, hospitals = make_registry(args.donors, size)
+        indexed, t_indexed = timed(indexed_match, donors, recipients, hospitals)
+        vectorized, t_vectorized = timed(indexed_match, donors, recipients, hospitals, True)
+        assert vectorized == indexed, "vectorized scoring diverged from calculate_match_score"
+        pairs_per_s = args.donors * size / t_indexed
+
+        if size <= args.naive_max:
+            naive, t_naive = timed(naive_match, donors, recipients, hospitals)
+            assert naive == indexed, "indexed engine diverged from the nested loop"
+            naive_col, speedup = f"{t_naive:9.3f}", f"{t_naive / t_indexed:7.1f}x"
+        else:
+            naive_col, speedup = f"{'skipped':>9}", f"{'-':>8}"
+
+        print(f"{size:>10} {len(indexed):>9} {naive_col} {t_indexed:10.3f} {t_vectorized:9.3f} "
+              f"{pairs_per_s:12.0f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
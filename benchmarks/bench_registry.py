@@ -0,0 +1,111 @@
+"""
+Benchmark the columnar Registry against lists of string dicts.
+
+Usage: python benchmarks/bench_registry.py [--scale 100]
+
+The CSV records are replicated --scale times (with fresh ids) and compared on
+memory footprint, a filter scan, per-donor candidate scoring and whole-bucket
+matrix scoring. Every registry score is checked against calculate_match_score.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.matching import MatchingEngine, calculate_match_score
+from backend.registry import DATA_DIR, Registry
+from backend.scoring import donor_columns, recipient_columns, score_matrix
+
+
+def read(name):
+    with open(os.path.join(DATA_DIR, f"{name}.csv"), newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def replicate(rows, id_field, scale):
+    return [dict(row, **{id_field: f"{row[id_field]}_{k}"}) for k in range(scale) for row in rows]
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--donors", type=int, default=200, help="donors scored in the candidate test")
+    args = parser.parse_args()
+
+    hospitals = read("hospitals")
+    base_donors, base_recipients = read("donors"), read("recipients")
+
+    (donors, recipients), dict_bytes, _ = measure(lambda: (
+        replicate(base_donors, "donor_id", args.scale), replicate(base_recipients, "recipient_id", args.scale)))
+    registry, registry_bytes, t_build = measure(lambda: Registry(donors, recipients, hospitals))
+    print(f"donors={len(donors)} recipients={len(recipients)} hospitals={len(hospitals)}")
+    print(f"memory: dicts {dict_bytes / 2**20:.1f} MiB, registry {registry_bytes / 2**20:.1f} MiB "
+          f"(columns {registry.nbytes() / 2**20:.1f} MiB), build {t_build:.2f}s")
+
+    # Filter scan: urgent recipients needing a kidney
+    start = time.perf_counter()
+    expected = [r["recipient_id"] for r in recipients
+                if r["organ_needed"].lower() == "kidney" and int(r["urgency_level"]) >= 4]
+    t_dicts = time.perf_counter() - start
+    start = time.perf_counter()
+    kidney = registry.vocabularies["organ"].codes["kidney"]
+    got = registry.recipients.ids[(registry.recipients["organ_needed"] == kidney)
+                                  & (registry.recipients.numbers("urgency_level") >= 4)].tolist()
+    t_columns = time.perf_counter() - start
+    assert got == expected
+    print(f"filter scan: dicts {t_dicts * 1000:.1f} ms, columns {t_columns * 1000:.2f} ms ({len(got)} rows)")
+
+    # Per-donor candidates: bucket lookup + score + rank
+    engine = MatchingEngine(hospitals)
+    engine.add_recipients(recipients)
+    sample = donors[:args.donors]
+    start = time.perf_counter()
+    for donor in sample:
+        sorted((calculate_match_score(donor, r) for r in engine.bucket_for(donor)), reverse=True)
+    t_dicts = time.perf_counter() - start
+    start = time.perf_counter()
+    results = [registry.candidates(donor["donor_id"]) for donor in sample]
+    t_columns = time.perf_counter() - start
+    checked = 0
+    for donor, (rows, scores) in zip(sample[:20], results):
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            assert score == calculate_match_score(donor, recipients[row])
+            checked += 1
+    print(f"candidates for {len(sample)} donors: dicts {t_dicts * 1000:.1f} ms, "
+          f"registry {t_columns * 1000:.1f} ms ({checked} scores verified)")
+
+    # Whole-bucket matrix scoring: string columns (HLA parsed per call) vs pre-encoded
+    donor = donors[0]
+    bucket = engine.bucket_for(donor)
+    bucket_donors = [d for d in donors if engine.donor_key(d) == engine.donor_key(donor)]
+    start = time.perf_counter()
+    parsed = score_matrix(donor_columns(bucket_donors), recipient_columns(bucket))
+    t_dicts = time.perf_counter() - start
+    engine.registry = registry
+    start = time.perf_counter()
+    encoded = score_matrix(*engine.scoring_columns(bucket_donors, bucket))
+    t_columns = time.perf_counter() - start
+    assert np.array_equal(parsed, encoded)
+    print(f"bucket {len(bucket_donors)}x{len(bucket)}: parsed {t_dicts * 1000:.1f} ms, "
+          f"registry {t_columns * 1000:.1f} ms (rounding dominates both)")
+
+
+if __name__ == "__main__":
+    main()
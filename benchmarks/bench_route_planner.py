@@ -0,0 +1,113 @@
+"""
+Benchmark the time-dependent route planner on a synthetic flight schedule.
+
+Usage: python benchmarks/bench_route_planner.py [--flights 100000] [--airports 300] [--queries 200]
+
+Every earliest arrival is checked against a connection-scan reference.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.flight_data import FlightTable
+from backend.route_planner import FlightGraph, MIN_CONNECTION_MINUTES
+
+DAY = 24 * 3600
+
+
+def make_schedule(n_flights, n_airports, days=3, seed=7):
+    """Random flights; a few hub airports get most of the traffic"""
+    rng = random.Random(seed)
+    airports = [f"A{i:03d}" for i in range(n_airports)]
+    weights = [10 if i < n_airports // 20 else 1 for i in range(n_airports)]
+    origins, destinations, departures, arrivals = [], [], [], []
+    for _ in range(n_flights):
+        origin, destination = rng.choices(airports, weights, k=2)
+        while destination == origin:
+            destination = rng.choice(airports)
+        departure = rng.randrange(0, days * DAY, 300)
+        origins.append(origin)
+        destinations.append(destination)
+        departures.append(departure)
+        arrivals.append(departure + rng.randrange(45 * 60, 7 * 3600, 300))
+    return origins, destinations, departures, arrivals
+
+
+def connection_scan(schedule, origin, destination, depart_after, deadline, min_connection):
+    """Reference earliest arrival: one pass over flights sorted by departure"""
+    origins, destinations, departures, arrivals = schedule
+    best = {origin: depart_after}
+    for i in sorted(range(len(departures)), key=departures.__getitem__):
+        departure = departures[i]
+        if departure > deadline:
+            break
+        if origins[i] not in best or arrivals[i] > deadline:
+            continue
+        ready = best[origins[i]] + (0 if origins[i] == origin else min_connection)
+        if departure >= ready and arrivals[i] < best.get(destinations[i], np.inf):
+            best[destinations[i]] = arrivals[i]
+    return best.get(destination)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--flights", type=int, default=100000)
+    parser.add_argument("--airports", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--hours-left", type=float, default=12)
+    parser.add_argument("--check", type=int, default=20, help="queries verified by connection scan")
+    args = parser.parse_args()
+
+    schedule = make_schedule(args.flights, args.airports)
+    rows = [
+        {"airline": "", "flight_number": "", "origin": o, "destination": d, "departure": dep,
+         "arrival": arr, "duration_minutes": (arr - dep) // 60, "price": None, "source": "simulated"}
+        for o, d, dep, arr in zip(*schedule)
+    ]
+    start = time.perf_counter()
+    table = FlightTable(rows)
+    t_table = time.perf_counter() - start
+    start = time.perf_counter()
+    graph = FlightGraph(table)
+    t_build = time.perf_counter() - start
+
+    rng = random.Random(1)
+    min_connection = MIN_CONNECTION_MINUTES * 60
+    queries = []
+    for _ in range(args.queries):
+        origin, destination = rng.sample(graph.airports, 2)
+        depart_after = rng.randrange(0, DAY)
+        queries.append((origin, destination, depart_after, depart_after + args.hours_left * 3600))
+
+    found, legs = 0, 0
+    start = time.perf_counter()
+    results = []
+    for origin, destination, depart_after, deadline in queries:
+        itinerary = graph.earliest_arrival(origin, destination, depart_after, deadline, min_connection)
+        results.append(itinerary)
+        if itinerary:
+            found += 1
+            legs += len(itinerary)
+    t_query = time.perf_counter() - start
+
+    for query, itinerary in list(zip(queries, results))[:args.check]:
+        expected = connection_scan(schedule, *query, min_connection)
+        got = float(graph.arrivals[itinerary[-1]]) if itinerary else None
+        assert got == expected, f"planner disagrees with connection scan for {query}: {got} != {expected}"
+
+    print(f"flights={args.flights} airports={args.airports} window={args.hours_left}h")
+    print(f"table build: {t_table * 1000:.1f} ms, graph build: {t_build * 1000:.1f} ms")
+    print(f"queries: {args.queries} in {t_query:.3f}s ({t_query / args.queries * 1000:.2f} ms each), "
+          f"{found} reachable, {legs / max(found, 1):.2f} legs on average")
+    print(f"verified {min(args.check, len(queries))} queries against connection scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark cold start with and without a registry snapshot.
+
+Usage: python benchmarks/bench_snapshot.py [--scale 100] [--endpoint-url http://localhost:8000]
+
+Without a snapshot a process must scan the three tables and build the
+Registry before serving; with one it loads a single .npz. The build and
+load are timed in-process on the CSV records replicated --scale times, and
+the loaded registry is checked against the built one. With --endpoint-url
+(DynamoDB Local or another stand-in holding the tables) the scans are timed
+too, and fresh interpreters are timed from start to first served
+candidates request.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_registry import read, replicate
+from backend.registry import Registry
+from backend.snapshot import load_items, load_registry, save_snapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time from interpreter start to the first candidates response
+FIRST_REQUEST = """
+import time
+start = time.perf_counter()
+from app import app
+response = app.test_client().get("/api/organs/{donor_id}/candidates")
+assert response.status_code == 200, response.get_data(as_text=True)
+print(time.perf_counter() - start)
+"""
+
+
+def check_equal(built, loaded):
+    for name in ("donors", "recipients", "hospitals"):
+        a, b = getattr(built, name), getattr(loaded, name)
+        assert a.ids.tolist() == b.ids.tolist()
+        for row in range(0, len(a), max(1, len(a) // 50)):
+            assert a.record(row) == b.record(row), (name, row)
+    for donor_id in built.donors.ids[:50].tolist():
+        rows_a, scores_a = built.candidates(donor_id)
+        rows_b, scores_b = loaded.candidates(donor_id)
+        assert np.array_equal(rows_a, rows_b) and np.array_equal(scores_a, scores_b)
+    assert np.array_equal(built.expiry(), loaded.expiry(), equal_nan=True)
+
+
+def first_request(snapshot_path, endpoint_url, donor_id):
+    env = dict(os.environ, REGISTRY_SNAPSHOT_PATH=snapshot_path, DYNAMODB_ENDPOINT_URL=endpoint_url)
+    out = subprocess.run([sys.executable, "-c", FIRST_REQUEST.format(donor_id=donor_id)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--endpoint-url", help="DynamoDB stand-in holding donors, recipients and hospitals")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "registry_snapshot.npz")
+    if args.endpoint_url:
+        import boto3
+
+        from backend.data_access import parallel_scan
+
+        dynamodb = boto3.resource("dynamodb", endpoint_url=args.endpoint_url,
+                                  region_name=os.getenv("REGION", "us-east-1"))
+        start = time.perf_counter()
+        items = {name: parallel_scan(dynamodb.Table(name)) for name in ("donors", "recipients", "hospitals")}
+        t_scan = time.perf_counter() - start
+    else:
+        items = {
+            "donors": replicate(read("donors"), "donor_id", args.scale),
+            "recipients": replicate(read("recipients"), "recipient_id", args.scale),
+            "hospitals": read("hospitals"),
+        }
+        t_scan = None
+
+    start = time.perf_counter()
+    built = Registry(items["donors"], items["recipients"], items["hospitals"])
+    t_build = time.perf_counter() - start
+    save_snapshot(items, built, path)
+    start = time.perf_counter()
+    loaded, _ = load_registry(path)
+    t_load = time.perf_counter() - start
+    start = time.perf_counter()
+    assert load_items(path) is not None
+    t_items = time.perf_counter() - start
+    check_equal(built, loaded)
+
+    print(f"donors={len(built.donors)} recipients={len(built.recipients)} hospitals={len(built.hospitals)}, "
+          f"snapshot {os.path.getsize(path) / 2**20:.1f} MiB")
+    if t_scan is not None:
+        print(f"cold: scan {t_scan * 1000:.0f} ms + build {t_build * 1000:.0f} ms")
+    else:
+        print(f"cold: build {t_build * 1000:.0f} ms (plus the table scans)")
+    print(f"warm: registry load {t_load * 1000:.0f} ms (verified against the built one); "
+          f"raw items decoded in the background in {t_items * 1000:.0f} ms")
+
+    if args.endpoint_url:
+        donor_id = built.donors.ids[0]
+        missing = os.path.join(os.path.dirname(path), "missing.npz")
+        cold = first_request(missing, args.endpoint_url, donor_id)
+        warm = first_request(path, args.endpoint_url, donor_id)
+        print(f"first request, fresh process: no snapshot {cold:.2f}s, snapshot {warm:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
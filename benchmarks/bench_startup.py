@@ -0,0 +1,85 @@
+"""
+Benchmark app startup: time to the first healthy /api/health and where import time goes.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 15]
+
+Each run is a fresh interpreter under `python -X importtime` that imports app
+and serves /api/health. Reported per run and as the median: milliseconds from
+process start to create_app, to ready and to the first healthy response (the
+StartupTimer milestones the health endpoint returns). One more run with
+BACKEND_PREWARM=0 logs imports from the main thread alone (-X importtime
+misattributes imports that overlap across threads); it is summed per
+top-level package (self time, so nothing is counted twice) and the heaviest
+packages are listed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_HEALTHY = """
+import json
+from app import app
+response = app.test_client().get("/api/health")
+assert response.status_code == 200, response.get_data(as_text=True)
+print(json.dumps(response.get_json()["startup"]))
+"""
+
+
+def run_once(prewarm=True):
+    # No snapshot and no background rescans of DynamoDB: measure startup only
+    missing = os.path.join(tempfile.mkdtemp(), "missing.npz")
+    env = dict(os.environ, SNAPSHOT_REFRESH_SECONDS="0", REGISTRY_SNAPSHOT_PATH=missing, STARTUP_PROFILE="",
+               BACKEND_PREWARM="1" if prewarm else "0")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", FIRST_HEALTHY], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1]), out.stderr
+
+
+def import_breakdown(log):
+    """Self microseconds per top-level package from an -X importtime log"""
+    totals = defaultdict(int)
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for startup, _ in runs:
+        m = startup["milestones_ms"]
+        print(f"create_app {m['create_app']:7.1f} ms  ready {m['ready']:7.1f} ms  "
+              f"first healthy {m['first_healthy']:7.1f} ms  phases {startup['phases_ms']}")
+
+    healthy = [startup["milestones_ms"]["first_healthy"] for startup, _ in runs]
+    median = statistics.median(healthy)
+    print(f"\ntime to first healthy /api/health: median {median:.1f} ms "
+          f"(min {min(healthy):.1f}, max {max(healthy):.1f})")
+
+    startup, log = run_once(prewarm=False)
+    breakdown = import_breakdown(log)
+    total = sum(us for _, us in breakdown)
+    print(f"\nimports before the first healthy response (BACKEND_PREWARM=0, first healthy at "
+          f"{startup['milestones_ms']['first_healthy']:.1f} ms): {total / 1000:.1f} ms "
+          f"across {len(breakdown)} top-level packages")
+    for name, us in breakdown[:args.top]:
+        print(f"  {name:<24} {us / 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,188 @@
+"""
+Bulk-load donors, recipients or hospitals from CSV into DynamoDB.
+
+Usage: python data/dynamo_upload.py recipients [--csv data/recipients.csv] [--workers 8]
+       [--checkpoint recipients.checkpoint.json] [--endpoint-url http://localhost:8000]
+
+Rows are written as 25-item BatchWriteItem requests on parallel threads.
+Items are typed by backend.schema: numbers and booleans keep their DynamoDB
+types (N / BOOL), datetimes become sortable ISO strings and the organ_blood
+GSI key is filled in. Unprocessed items are retried with exponential
+backoff, and each finished chunk of rows is recorded in a checkpoint file so
+an interrupted load resumes where it stopped.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import boto3
-import pandas as pd
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.registry import DATA_DIR
+from backend.schema import TABLES, column_types, ensure_table, typed_item
+
+# BatchWriteItem accepts at most 25 puts per request
+BATCH_SIZE = 25
+# Rows per checkpointed unit of work
+CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "1000"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "8"))
+
+_serializer = TypeSerializer()
+
+
+def write_batch(client, table_name, items, key):
+    """One BatchWriteItem of up to 25 items, retrying unprocessed ones with backoff
+
+    Later rows win when a batch repeats a key, since DynamoDB rejects
+    duplicate keys in one request.
+    """
+    unique = list({item[key]: item for item in items}.values())
+    requests = [{"PutRequest": {"Item": {k: _serializer.serialize(v) for k, v in item.items()}}}
+                for item in unique]
+    for attempt in range(MAX_RETRIES + 1):
+        response = client.batch_write_item(RequestItems={table_name: requests})
+        requests = response.get("UnprocessedItems", {}).get(table_name, [])
+        if not requests:
+            return len(unique)
+        # Full jitter keeps parallel writers from retrying in lockstep
+        time.sleep(random.uniform(0, min(20.0, 0.05 * 2 ** attempt)))
+    raise RuntimeError(f"{len(requests)} items still unprocessed after {MAX_RETRIES} retries")
+
+
+def write_chunk(client, table_name, rows, types, key):
+    items = [typed_item(table_name, row, types) for row in rows]
+    items = [item for item in items if key in item]
+    written = 0
+    for start in range(0, len(items), BATCH_SIZE):
+        written += write_batch(client, table_name, items[start:start + BATCH_SIZE], key)
+    return written
+
+
+class Checkpoint:
+    """Completed chunk numbers for one (csv file, table) load, saved atomically"""
+
+    def __init__(self, path, source, table_name, chunk_rows):
+        self.path = path
+        stat = os.stat(source)
+        self.identity = {"source": os.path.abspath(source), "size": stat.st_size,
+                         "mtime": int(stat.st_mtime), "table": table_name, "chunk_rows": chunk_rows}
+        self.done = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("identity") == self.identity:
+                self.done = set(saved.get("done", []))
+            else:
+                print(f"⚠️ Checkpoint {path} is for a different file or table; starting over")
+
+    def mark(self, chunk):
+        with self._lock:
+            self.done.add(chunk)
+            if not self.path:
+                return
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"identity": self.identity, "done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+
+def read_chunks(path, chunk_rows):
+    """(chunk number, rows) from a CSV, streamed"""
+    with open(path, newline="", encoding="utf-8") as f:
+        chunk, rows = 0, []
+        for row in csv.DictReader(f):
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                yield chunk, rows
+                chunk, rows = chunk + 1, []
+        if rows:
+            yield chunk, rows
+
 
-# Load CSV
-df = pd.read_csv("recipients.csv")
+def upload(client, table_name, path, key=None, workers=UPLOAD_WORKERS, checkpoint_path=None,
+           chunk_rows=CHUNK_ROWS):
+    """Load a CSV into a table; returns (items written, seconds)"""
+    key = key or TABLES.get(table_name, {}).get("key")
+    if not key:
+        raise ValueError(f"--key is required for table {table_name!r}")
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        sample = [row for _, row in zip(range(chunk_rows), reader)]
+        types = column_types(table_name, reader.fieldnames or [], sample)
+    checkpoint = Checkpoint(checkpoint_path, path, table_name, chunk_rows)
+    if checkpoint.done:
+        print(f"Resuming: {len(checkpoint.done)} chunks already loaded")
 
-# Connect to DynamoDB using IAM user profile
-session = boto3.Session(profile_name="organmatch-admin", region_name="us-east-1")
-dynamodb = session.resource("dynamodb")
-table = dynamodb.Table("recipients")
+    start = time.perf_counter()
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
 
-# Upload each row
-for _, row in df.iterrows():
-    item = {col: str(row[col]) for col in df.columns if pd.notna(row[col])}
-    table.put_item(Item=item)
+        def collect(done):
+            nonlocal written
+            for future in done:
+                chunk = pending.pop(future)
+                written += future.result()
+                checkpoint.mark(chunk)
 
-print("✅ Data uploaded successfully to IAM user account!")
+        for chunk, rows in read_chunks(path, chunk_rows):
+            if chunk in checkpoint.done:
+                continue
+            # Bounded in-flight work keeps a large CSV from being read into memory at once
+            while len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[pool.submit(write_chunk, client, table_name, rows, types, key)] = chunk
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+    return written, time.perf_counter() - start
 
 
-# # import boto3
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", help="donors, recipients, hospitals or any other table name")
+    parser.add_argument("--csv", help="defaults to data/<table>.csv")
+    parser.add_argument("--key", help="partition key (known tables have a default)")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--checkpoint", help="resume file; defaults to <csv>.checkpoint.json")
+    parser.add_argument("--no-checkpoint", action="store_true")
+    parser.add_argument("--create", action="store_true", help="create the table (or its missing GSIs) first")
+    parser.add_argument("--profile", default=os.getenv("AWS_PROFILE"))
+    parser.add_argument("--region", default=os.getenv("REGION", "us-east-1"))
+    parser.add_argument("--endpoint-url", default=os.getenv("DYNAMODB_ENDPOINT_URL"),
+                        help="e.g. DynamoDB Local at http://localhost:8000")
+    args = parser.parse_args()
 
-# # session = boto3.Session(profile_name="organmatch-admin", region_name="us-east-1")
-# # ddb = session.resource("dynamodb")
-# # table = ddb.Table("hospitals")
+    path = args.csv or os.path.join(DATA_DIR, f"{args.table}.csv")
+    checkpoint = None if args.no_checkpoint else args.checkpoint or f"{path}.checkpoint.json"
+    session = boto3.Session(profile_name=args.profile, region_name=args.region)
+    # Adaptive retries back off on throttling; one connection per writer thread
+    client = session.client("dynamodb", endpoint_url=args.endpoint_url, config=Config(
+        retries={"max_attempts": 10, "mode": "adaptive"}, max_pool_connections=max(10, args.workers)))
 
-# # test_item = {
-# #     "hospital_id": "H999",
-# #     "hospital_name": "Debug Test Hospital",
-# #     "city": "Testville",
-# #     "state": "TS",
-# #     "organ_storage_facility": "True"
-# # }
+    if args.create:
+        ensure_table(client, args.table)
+    written, elapsed = upload(client, args.table, path, args.key, args.workers, checkpoint, args.chunk_rows)
+    print(f"✅ Uploaded {written} items to {args.table} in {elapsed:.1f}s "
+          f"({written / max(elapsed, 1e-9):.0f} items/s)")
+    if checkpoint and os.path.exists(checkpoint):
+        # A complete load needs no resume point
+        os.remove(checkpoint)
 
-# # table.put_item(Item=test_item)
-# # print("✅ Test item uploaded!")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Migrate the donors, recipients and hospitals tables to the typed schema.
+
+Usage: python data/migrate_schema.py [donors recipients hospitals] [--dry-run]
+       [--endpoint-url http://localhost:8000]
+
+For each table: create it if missing, or add whichever of its GSIs are
+missing (backend.schema.table_definition), then rewrite every item whose
+stringified numbers, booleans or datetimes are not yet typed, filling in
+the organ_blood GSI key. Items already typed are left alone, so the
+migration can be re-run safely. Items whose GSI key number does not parse
+(e.g. urgency_level "high") are reported and left untouched rather than
+rewritten without it.
+
+Once every item of a table is typed, the table is tagged
+(backend.schema.SCHEMA_TAG); the app only Queries the GSIs of tagged tables.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.data_access import parallel_scan
+from backend.schema import TABLES, column_types, ensure_table, mark_migrated, typed_item, unindexable
+from dynamo_upload import BATCH_SIZE, UPLOAD_WORKERS, write_batch
+
+
+def migrate(client, table, workers=UPLOAD_WORKERS, dry_run=False):
+    """Rewrite the items of one table that change under typed_item
+
+    Returns (scanned, rewritten, skipped), skipped being {key: bad columns}
+    for the items left alone.
+    """
+    key = TABLES[table.name]["key"]
+    types = column_types(table.name)
+    items = parallel_scan(table)
+    changed = []
+    skipped = {}
+    for item in items:
+        bad = unindexable(table.name, item, types)
+        if bad:
+            skipped[item[key]] = bad
+            continue
+        typed = typed_item(table.name, item, types)
+        if typed != item:
+            changed.append(typed)
+    if dry_run or not changed:
+        return len(items), len(changed), skipped
+    batches = [changed[i:i + BATCH_SIZE] for i in range(0, len(changed), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda batch: write_batch(client, table.name, batch, key), batches))
+    return len(items), len(changed), skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tables", nargs="*", default=list(TABLES))
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS)
+    parser.add_argument("--profile", default=os.getenv("AWS_PROFILE"))
+    parser.add_argument("--region", default=os.getenv("REGION", "us-east-1"))
+    parser.add_argument("--endpoint-url", default=os.getenv("DYNAMODB_ENDPOINT_URL"))
+    args = parser.parse_args()
+
+    session = boto3.Session(profile_name=args.profile, region_name=args.region)
+    config = Config(retries={"max_attempts": 10, "mode": "adaptive"}, max_pool_connections=max(10, args.workers))
+    client = session.client("dynamodb", endpoint_url=args.endpoint_url, config=config)
+    dynamodb = session.resource("dynamodb", endpoint_url=args.endpoint_url, config=config)
+
+    for name in args.tables:
+        if name not in TABLES:
+            parser.error(f"unknown table {name!r}; expected one of {', '.join(TABLES)}")
+        start = time.perf_counter()
+        if not args.dry_run:
+            added = ensure_table(client, name)
+            if added:
+                print(f"{name}: added {', '.join(added)}")
+        scanned, rewritten, skipped = migrate(client, dynamodb.Table(name), args.workers, args.dry_run)
+        verb = "would rewrite" if args.dry_run else "rewrote"
+        print(f"✅ {name}: scanned {scanned}, {verb} {rewritten} in {time.perf_counter() - start:.1f}s")
+        if skipped:
+            print(f"⚠️ {name}: left {len(skipped)} items untouched, their index keys are not numbers; "
+                  f"fix them and re-run before the app will Query this table")
+            for item_key, columns in sorted(skipped.items()):
+                print(f"   {item_key}: {', '.join(columns)}")
+        elif not args.dry_run:
+            mark_migrated(client, name)
+
+
+if __name__ == "__main__":
+    main()
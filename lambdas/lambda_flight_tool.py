@@ -1,8 +1,6 @@
-import json, boto3
+import json
 
-s3 = boto3.client("s3")
-BUCKET_NAME = "organmatch-flight-data"
-FILE_KEY = "mock_flights.json"
+from backend.flight_store import flight_store
 
 def lambda_handler(event, context):
     body = event.get("body")
@@ -15,12 +13,8 @@ def lambda_handler(event, context):
     to_city = body.get("to_city", "").upper()
 
     try:
-        # Read file from S3
-        obj = s3.get_object(Bucket=BUCKET_NAME, Key=FILE_KEY)
-        data = json.loads(obj["Body"].read().decode("utf-8"))
-
-        # Filter flights by route
-        flights = [f for f in data if f["from"] == from_city and f["to"] == to_city]
+        # Route lookup on the cached, indexed S3 schedule
+        flights = flight_store.flights(from_city, to_city)
 
         return {"statusCode": 200, "body": json.dumps({"flights": flights})}
 
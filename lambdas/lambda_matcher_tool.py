@@ -1,59 +1,107 @@
 import boto3
 import json
+import os
+from boto3.dynamodb.types import TypeDeserializer
+
+from backend.data_access import parallel_scan
+from backend.distances import HospitalDistances
+from backend.geo import parse_distance_km
+from backend.matching import IncrementalMatcher, MatchingEngine
+from backend.registry import Registry
+from backend.schema import recipients_for_donors
+# Re-exported: the match scorers are part of this Lambda's interface as well as backend helpers
+from backend.matching import calculate_match_score  # noqa: F401
+from backend.scoring import batch_match_scores  # noqa: F401
 
 # Initialize DynamoDB
-dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+dynamodb = boto3.resource(
+    "dynamodb", region_name="us-east-1", endpoint_url=os.getenv("DYNAMODB_ENDPOINT_URL")
+)
 
 # Reference tables
 donors_table = dynamodb.Table("donors")
 recipients_table = dynamodb.Table("recipients")
 hospitals_table = dynamodb.Table("hospitals")
 
+_deserializer = TypeDeserializer()
+
+# Kept by warm containers between stream batches, so one changed donor or
+# recipient rescores only its bucket instead of rerunning the full match
+_matcher = None
+
+
+def get_matcher():
+    """The incremental matcher, loaded from the tables on first use"""
+    global _matcher
+    if _matcher is None:
+        hospitals = parallel_scan(hospitals_table)
+        matcher = IncrementalMatcher(hospitals, distances=HospitalDistances(hospitals, path=None))
+        matcher.load(parallel_scan(donors_table), parallel_scan(recipients_table))
+        _matcher = matcher
+    return _matcher
+
+
+def apply_stream_records(matcher, records):
+    """Apply DynamoDB Streams records from the donors/recipients tables; returns the merged delta"""
+    delta = {"added": [], "removed": [], "changed": []}
+    for record in records:
+        table = record.get("eventSourceARN", "").split(":table/")[-1].split("/")[0]
+        if table not in ("donors", "recipients"):
+            continue
+        kind = table[:-1]
+        change = record["dynamodb"]
+        if record["eventName"] == "REMOVE":
+            keys = {k: _deserializer.deserialize(v) for k, v in change["Keys"].items()}
+            result = getattr(matcher, f"remove_{kind}")(keys[f"{kind}_id"])
+        else:
+            image = {k: _deserializer.deserialize(v) for k, v in change["NewImage"].items()}
+            result = getattr(matcher, f"upsert_{kind}")(image)
+        IncrementalMatcher.merge(delta, result)
+    return delta
+
+
 def lambda_handler(event, context):
+    # ✅ Stream trigger on donors/recipients: incremental delta, not a full rematch.
+    #    Errors propagate so Lambda retries the batch; re-applying upserts is idempotent.
+    if (event or {}).get("Records"):
+        delta = apply_stream_records(get_matcher(), event["Records"])
+        counts = {kind: len(matches) for kind, matches in delta.items()}
+        return {"statusCode": 200, "body": json.dumps({**counts, "delta": delta}, default=str)}
+
     try:
-        # ✅ Fetch all data from the three tables
-        donors = donors_table.scan().get("Items", [])
-        recipients = recipients_table.scan().get("Items", [])
-        hospitals = hospitals_table.scan().get("Items", [])
-
-        # Convert hospitals into a dict for quick lookup
-        hospital_lookup = {h["hospital_id"]: h for h in hospitals}
-
-        matches = []
-
-        # ✅ Match donors and recipients by organ + blood type
-        for donor in donors:
-            for recipient in recipients:
-                if (
-                    donor["organ_type"].lower() == recipient["organ_needed"].lower()
-                    and donor["blood_type"] == recipient["blood_type"]
-                ):
-                    donor_hosp = hospital_lookup.get(donor.get("hospital_id", ""), {})
-                    recip_hosp = hospital_lookup.get(recipient.get("hospital_id", ""), {})
-
-                    # Optional: skip if any hospital missing key data
-                    if not donor_hosp or not recip_hosp:
-                        continue
-
-                    match = {
-                        "donor_id": donor["donor_id"],
-                        "recipient_id": recipient["recipient_id"],
-                        "organ": donor["organ_type"],
-                        "blood_type": donor["blood_type"],
-                        "donor_hospital": donor_hosp.get("hospital_name", "Unknown"),
-                        "recipient_hospital": recip_hosp.get("hospital_name", "Unknown"),
-                        "donor_city": donor_hosp.get("city", ""),
-                        "recipient_city": recip_hosp.get("city", ""),
-                        "transport_ready": donor_hosp.get("transport_ready", "False"),
-                        "urgency_level": recipient.get("urgency_level", "N/A"),
-                        "match_score": calculate_match_score(donor, recipient)
-                    }
-
-                    matches.append(match)
+        max_distance_km = parse_distance_km((event or {}).get("max_distance_km"))
+    except ValueError as e:
+        return {"statusCode": 400, "body": json.dumps({"error": f"max_distance_km: {e}"})}
+
+    try:
+        # ✅ Fetch donors and hospitals (every page, in parallel segments)
+        donors = parallel_scan(donors_table)
+        hospitals = parallel_scan(hospitals_table)
+        # ✅ Only recipients in a donor's organ + blood bucket: one Query per bucket
+        #    on the organ_blood GSI (falls back to a scan before migration)
+        recipients = recipients_for_donors(recipients_table, donors)
+
+        # ✅ Bucket recipients by organ + blood type, then score each bucket as a matrix
+        #    using the registry's pre-encoded columns (HLA parsed once per invocation)
+        # ✅ Optional travel radius prunes recipients too far from the donor;
+        #    every match carries its hospital-to-hospital distance
+        engine = MatchingEngine(
+            hospitals, vectorized=True, max_distance_km=max_distance_km,
+            distances=HospitalDistances(hospitals, path=None),
+            registry=Registry(donors, recipients, hospitals)
+        )
+        engine.add_recipients(recipients)
+
+        # ✅ "allocate" proposes each donor and recipient at most once (max total score)
+        if (event or {}).get("mode") == "allocate":
+            matches = engine.allocate(donors)
+        else:
+            matches = engine.match(donors)
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"matches_found": len(matches), "matches": matches}, indent=2)
+            # Typed attributes come back as Decimal; default=str keeps their text form
+            "body": json.dumps({"matches_found": len(matches), "matches": matches}, indent=2, default=str)
         }
 
     except Exception as e:
@@ -61,26 +109,3 @@ def lambda_handler(event, context):
             "statusCode": 400,
             "body": json.dumps({"error": str(e)})
         }
-
-def calculate_match_score(donor, recipient):
-    score = 0
-
-    # Base score for organ + blood type match
-    score += 50
-
-    # Organ condition (0–100)
-    cond = float(donor.get("organ_condition_score", 0))
-    score += cond * 0.3
-
-    # Urgency weighting
-    urgency = float(recipient.get("urgency_level", 1))
-    score += urgency * 3
-
-    # HLA string similarity (rough match check)
-    if donor.get("hla_typing") and recipient.get("hla_typing"):
-        donor_hla = set(donor["hla_typing"].replace(" ", "").split(","))
-        recip_hla = set(recipient["hla_typing"].replace(" ", "").split(","))
-        overlap = len(donor_hla.intersection(recip_hla))
-        score += overlap * 5
-
-    return round(score, 2)
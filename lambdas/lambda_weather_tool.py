@@ -1,17 +1,46 @@
 import json
 import urllib.request
 import urllib.parse
-import boto3, json, os
+import os
+import threading
 
+from backend.cache import TTLCache, normalize_text_key
 
 secret_name = "organmatch/weatherapi"
 region = "us-east-1"
 
-client = boto3.client("secretsmanager", region_name=region)
-secret = client.get_secret_value(SecretId=secret_name)
-secrets = json.loads(secret["SecretString"])
+# Fetched from Secrets Manager on the first cache miss rather than at import,
+# so a cold start (and every cached lookup) skips the boto3 import and the call
+_api_key = None
+_api_key_lock = threading.Lock()
 
-API_KEY = secrets["API_KEY"]
+# Survives across warm invocations; same TTL / stale window as the Flask app
+weather_cache = TTLCache(
+    float(os.getenv("WEATHER_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("WEATHER_CACHE_SIZE", "256")),
+    stale_ttl=float(os.getenv("WEATHER_CACHE_STALE_TTL", "600")),
+    normalize=normalize_text_key,
+)
+
+
+def get_api_key():
+    """WeatherAPI key, read once per container"""
+    global _api_key
+    with _api_key_lock:
+        if _api_key is None:
+            import boto3
+
+            client = boto3.client("secretsmanager", region_name=region)
+            secret = client.get_secret_value(SecretId=secret_name)
+            _api_key = json.loads(secret["SecretString"])["API_KEY"]
+    return _api_key
+
+
+def fetch_weather(location):
+    query = urllib.parse.quote(location)
+    url = f"http://api.weatherapi.com/v1/current.json?key={get_api_key()}&q={query}"
+    with urllib.request.urlopen(url, timeout=8) as response:
+        return json.loads(response.read().decode())
 
 
 
@@ -30,13 +59,9 @@ def lambda_handler(event, context):
 
     location = body.get("location", "London")
 
-    # --- Build and call the WeatherAPI URL ---
-    query = urllib.parse.quote(location)
-    url = f"http://api.weatherapi.com/v1/current.json?key={API_KEY}&q={query}"
-
+    # --- Call WeatherAPI (cached per normalized location) ---
     try:
-        with urllib.request.urlopen(url, timeout=8) as response:
-            data = json.loads(response.read().decode())
+        data = weather_cache.get_or_load(location, lambda: fetch_weather(location))
 
         # --- Extract relevant details ---
         weather = {
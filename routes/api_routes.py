@@ -1,23 +1,42 @@
-from flask import Blueprint, request, jsonify
-from backend.core import OrganMatchBackend, initialize_aws
-import boto3
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from backend.core import OrganMatchBackend, initialize_tables
+from backend.data_access import table_cache, scan_page, build_filter, equals_any_case, equals_number, InvalidCursor
+from decimal import Decimal, InvalidOperation
+from backend.hospital_index import get_hospital_index
+from backend.expiry_index import get_expiry_index
+from backend.registry import get_registry
+from backend.schema import (DONOR_BUCKET_INDEX, RECIPIENT_BUCKET_INDEX, bucket_condition, index_available,
+                            index_keys, schema_migrated)
+from backend.geo import coordinates, distance_matrix, get_recipient_geo_index, parse_distance_km
+from backend.distances import get_hospital_distances
+from backend.flight_store import flight_store
+from backend.weather import fetch_weather_concurrently, fetch_current_weather, weather_cache
+from backend.decision_cache import decision_cache, decision_key
+from backend.viability import MAX_BATCH_SIZE, simulate_viability_batch
+from backend.route_planner import graph_for, plan_route, MIN_CONNECTION_MINUTES
+from backend.startup import startup_timer
 import os
 import json
+import math
+import threading
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
-# Initialize backend lazily
+# Initialize backend lazily (create_app also warms it in the background)
 backend = None
+_backend_lock = threading.Lock()
 
 def get_backend():
     global backend
     if backend is None:
-        backend = OrganMatchBackend()
+        with _backend_lock:
+            if backend is None:
+                backend = OrganMatchBackend()
     return backend
 
 def get_tables():
-    initialize_aws()
+    initialize_tables()
     from backend.core import donors_table, recipients_table, hospitals_table
     return donors_table, recipients_table, hospitals_table
 
@@ -27,8 +46,6 @@ load_dotenv()
 # --- AWS Configuration ---
 REGION = os.getenv("REGION")
 api_bp = Blueprint('api', __name__, url_prefix='/api')
-s3_client = boto3.client("s3", region_name=REGION)
-S3_BUCKET = "organmatch-flight-data"
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
 
@@ -40,42 +57,25 @@ def create_transport_plan():
         data = request.get_json()
         origin = data.get('origin', 'SFO')
         destination = data.get('destination', 'BOS')
+        distance_miles = transport_distance_miles(
+            data.get('origin_hospital') or origin,
+            data.get('destination_hospital') or destination
+        )
 
         # ---------------------------
-        # 1️⃣ Fetch mock flights from S3
+        # 1️⃣ Look up mock flights (S3 object cached and indexed by route)
         # ---------------------------
-        s3_response = s3_client.get_object(Bucket=S3_BUCKET, Key="mock_flights.json")
-        flights_data = json.loads(s3_response['Body'].read().decode('utf-8'))
-
-        # Filter flights based on origin/destination
-        filtered_flights = [
-            f for f in flights_data
-            if f["from"].lower() == origin.lower() and f["to"].lower() == destination.lower()
-        ]
+        filtered_flights = flight_store.flights(origin, destination)
 
         # Limit to top 5 flights
         flights = filtered_flights[:5] if filtered_flights else []
 
         # ---------------------------
-        # 2️⃣ Get weather info for both cities
+        # 2️⃣ Get weather info for both cities (fetched concurrently)
         # ---------------------------
-        def get_weather(city):
-            url = f"http://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={city}"
-            try:
-                r = requests.get(url)
-                data = r.json()
-                return {
-                    "city": city,
-                    "temperature_c": data["current"]["temp_c"],
-                    "condition": data["current"]["condition"]["text"],
-                    "wind_kph": data["current"]["wind_kph"],
-                    "humidity": data["current"]["humidity"]
-                }
-            except Exception as e:
-                return {"city": city, "error": str(e)}
-
-        weather_origin = get_weather(origin)
-        weather_dest = get_weather(destination)
+        weather_origin, weather_dest = fetch_weather_concurrently(
+            [origin, destination], WEATHER_API_KEY
+        )
 
         # ---------------------------
         # 3️⃣ Create response object
@@ -84,7 +84,7 @@ def create_transport_plan():
             "route": {
                 "origin": origin,
                 "destination": destination,
-                "distance": f"{round(0.621 * 1000)} miles",  # placeholder
+                "distance": f"{round(distance_miles)} miles" if distance_miles is not None else "N/A",
                 "estimatedTime": f"{flights[0]['duration_hr'] if flights else 'N/A'} hours"
             },
             "flights": flights,
@@ -106,16 +106,139 @@ def create_transport_plan():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _hospital_for(hospitals, value):
+    """A hospital by id, or the first hospital in a city of that name"""
+    hospital = hospitals.get(value)
+    if hospital:
+        return hospital
+    in_city = hospitals.in_city(value)
+    return in_city[0] if in_city else None
+
+def transport_distance_miles(origin, destination):
+    """Great-circle miles between two hospitals (ids or city names), or None"""
+    try:
+        _, _, hospitals_table = get_tables()
+        hospitals = get_hospital_index(hospitals_table)
+        origin_hospital = _hospital_for(hospitals, origin)
+        destination_hospital = _hospital_for(hospitals, destination)
+        if not origin_hospital or not destination_hospital:
+            return None
+        return get_hospital_distances(hospitals_table).miles(
+            origin_hospital["hospital_id"], destination_hospital["hospital_id"]
+        )
+    except Exception as e:
+        print(f"⚠️ Distance lookup failed: {e}")
+        return None
+
+# Attributes each list endpoint actually reads
+ORGAN_FIELDS = ["donor_id", "id", "organ_type", "type", "blood_type", "age",
+                "organ_condition_score", "condition_score", "hospital_id", "location"]
+RECIPIENT_FIELDS = ["recipient_id", "id", "name", "blood_type", "age", "urgency_level",
+                    "wait_time_days", "hospital_id", "hospital", "medical_condition_score"]
+
+def page_args():
+    """limit/cursor query parameters shared by the list endpoints (default 5 rows)"""
+    return request.args.get('limit', 5, type=int), request.args.get('cursor')
+
+def optional_eq(field, value):
+    from boto3.dynamodb.conditions import Attr
+    return Attr(field).eq(value) if value else None
+
+def finite_decimal(value):
+    """Decimal for a numeric query parameter; NaN and infinity are rejected like any non-number"""
+    number = Decimal(value)
+    if not number.is_finite():
+        raise InvalidOperation(f"not a finite number: {value}")
+    return number
+
+def optional_min(field, value):
+    """Numeric lower bound, evaluated by DynamoDB on typed (N) attributes"""
+    from boto3.dynamodb.conditions import Attr
+    return Attr(field).gte(finite_decimal(value)) if value else None
+
+def at_least(minimums):
+    """Item predicate for numeric lower bounds, for tables whose numbers may still be strings
+
+    DynamoDB compares a string attribute with a number as never matching,
+    so on unmigrated tables the bounds are checked here instead.
+    """
+    bounds = {field: finite_decimal(value) for field, value in minimums.items() if value}
+    if not bounds:
+        return None
+
+    def keep(item):
+        for field, bound in bounds.items():
+            try:
+                if not Decimal(str(item.get(field)).strip()) >= bound:
+                    return False
+            except ArithmeticError:
+                return False
+        return True
+    return keep
+
+def bucket_page(table, index_name, limit, cursor, organ, blood_type, filters, projection, minimums=None,
+                **key_range):
+    """scan_page, read with Query on the organ_blood GSI when organ and blood type are both given
+
+    minimums maps fields to numeric lower bounds. Tables not yet migrated
+    are scanned, with the key conditions as filters and the bounds checked
+    in Python.
+    """
+    minimums = dict(minimums or {})
+    urgency, min_urgency = key_range.get("urgency"), key_range.get("min_urgency")
+    if organ and blood_type and index_available(table, index_name):
+        for value in (urgency, min_urgency):
+            if value:
+                finite_decimal(value)
+        return scan_page(
+            table, limit, cursor,
+            build_filter(filters + [optional_min(field, value) for field, value in minimums.items()]),
+            projection,
+            key_condition=bucket_condition(organ, blood_type, **key_range),
+            index_name=index_name, index_keys=index_keys(table.name, index_name),
+        )
+    organ_field = "organ_type" if index_name == DONOR_BUCKET_INDEX else "organ_needed"
+    minimums["urgency_level"] = min_urgency
+    keep = None
+    if schema_migrated(table):
+        filters = filters + [optional_min(field, value) for field, value in minimums.items()]
+    else:
+        keep = at_least(minimums)
+        projection = list(projection) + [field for field in minimums if field not in projection]
+    filter_expression = build_filter([
+        equals_any_case(organ_field, organ) if organ else None,
+        optional_eq("blood_type", blood_type),
+        equals_number("urgency_level", urgency) if urgency else None,
+    ] + filters)
+    return scan_page(table, limit, cursor, filter_expression, projection, keep=keep)
+
+def paged_response(items, next_cursor):
+    """JSON list body; the cursor for the next page goes in X-Next-Cursor"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
 # -------------------------------
-# Get all donors/organs
+# Get donors/organs (paged, filterable)
 # -------------------------------
 @api_bp.route('/organs', methods=['GET'])
 def get_organs():
-    """Fetch and map donor data from DynamoDB"""
+    """Fetch and map one page of donor data from DynamoDB
+
+    Query params: limit, cursor, organ_type, blood_type, hospital, min_condition.
+    organ_type + blood_type together are read from the organ_blood GSI.
+    """
     try:
         donors_table, _, _ = get_tables()
-        response = donors_table.scan()
-        items = response.get("Items", [])[:5]  # limit to 5
+        limit, cursor = page_args()
+        items, next_cursor = bucket_page(
+            donors_table, DONOR_BUCKET_INDEX, limit, cursor,
+            request.args.get('organ_type'), request.args.get('blood_type'),
+            [optional_eq("hospital_id", request.args.get('hospital'))],
+            ORGAN_FIELDS,
+            minimums={"organ_condition_score": request.args.get('min_condition')},
+        )
         mapped = []
         for d in items:
             mapped.append({
@@ -126,44 +249,127 @@ def get_organs():
                 "conditionScore": float(d.get("organ_condition_score", d.get("condition_score", 0))),
                 "location": d.get("hospital_id", d.get("location", "Unknown"))
             })
-        return jsonify(mapped)
+        return paged_response(mapped, next_cursor)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    except ArithmeticError:
+        return jsonify({"error": "numeric filters must be numbers"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/organs/expiring', methods=['GET'])
+def get_expiring_organs():
+    """Most urgent still-viable organs, soonest expiry first
+
+    Query params: limit (default 10), hours (only organs expiring within this many hours)
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+        hours = request.args.get('hours')
+        hours = float(hours) if hours else None
+    except ValueError:
+        return jsonify({"error": "limit and hours must be numbers"}), 400
+    try:
+        donors_table, _, _ = get_tables()
+        now = datetime.now().timestamp()
+        expiring = get_expiry_index(donors_table).soonest(limit, hours, now)
+        return jsonify([
+            {
+                "id": d.get("donor_id"),
+                "type": d.get("organ_type", "Unknown"),
+                "bloodType": d.get("blood_type", "Unknown"),
+                "location": d.get("hospital_id", "Unknown"),
+                "expiresAt": datetime.fromtimestamp(expiry).isoformat(timespec="seconds"),
+                "hoursLeft": round((expiry - now) / 3600, 1)
+            }
+            for expiry, d in expiring
+        ])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/organs/<donor_id>/candidates', methods=['GET'])
+def get_organ_candidates(donor_id):
+    """Best-scoring recipients (same organ and blood type) for a donor's organ
+
+    Query params: limit (default 10)
+    """
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    try:
+        registry = get_registry(*get_tables())
+        row = registry.donors.index.get(donor_id)
+        if row is None:
+            return jsonify({"error": f"Donor {donor_id} not found"}), 404
+        donor = registry.donors.record(row)
+        hours_left = float(registry.hours_left()[row])
+        rows, scores = registry.candidates(donor_id, limit)
+        recipients = registry.recipients
+        urgencies = recipients.numbers("urgency_level", rows)
+        return jsonify({
+            "donor": {
+                "id": donor_id,
+                "type": donor["organ_type"],
+                "bloodType": donor["blood_type"],
+                "location": donor["hospital_id"],
+                "hoursLeft": round(hours_left, 1),
+                "viable": hours_left > 0.5
+            },
+            "candidates": [
+                {
+                    "id": recipients.ids[r],
+                    # Missing urgency is null; whole numbers stay ints
+                    "urgency": None if math.isnan(urgency) else (int(urgency) if urgency.is_integer() else urgency),
+                    "hospital": recipients.labels("hospital_id", [r])[0],
+                    "matchScore": round(float(score), 2)
+                }
+                for r, score, urgency in zip(rows.tolist(), scores.tolist(), urgencies.tolist())
+            ]
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @api_bp.route('/recipients', methods=['GET'])
 def get_recipients():
-    """Fetch and map recipient data from DynamoDB with city information"""
+    """Fetch and map one page of recipient data from DynamoDB with city information
+
+    Query params: limit, cursor, organ_type, blood_type, urgency, min_urgency, hospital.
+    organ_type + blood_type together are read from the organ_blood GSI, with
+    urgency / min_urgency as its sort key condition.
+    """
     try:
         _, recipients_table, hospitals_table = get_tables()
         
-        # Get recipients
-        response = recipients_table.scan()
-        recipients = response.get("Items", [])[:5]  # limit to 5
+        # Get one page of recipients, filtered (or queried) inside DynamoDB
+        limit, cursor = page_args()
+        recipients, next_cursor = bucket_page(
+            recipients_table, RECIPIENT_BUCKET_INDEX, limit, cursor,
+            request.args.get('organ_type'), request.args.get('blood_type'),
+            [optional_eq("hospital_id", request.args.get('hospital'))],
+            RECIPIENT_FIELDS,
+            urgency=request.args.get('urgency'), min_urgency=request.args.get('min_urgency'),
+        )
         
-        # Get hospitals for city mapping
-        hospitals_response = hospitals_table.scan()
-        hospitals = hospitals_response.get("Items", [])
+        # Hospital lookups come from the shared index
+        hospitals = get_hospital_index(hospitals_table)
         
-        # Create hospital ID to city mapping
-        hospital_city_map = {}
-        for hospital in hospitals:
-            hospital_id = hospital.get("hospital_id") or hospital.get("id")
-            if hospital_id:
-                hospital_city_map[hospital_id] = {
+        mapped = []
+        for r in recipients:
+            hospital_id = r.get("hospital_id", r.get("hospital", "Unknown"))
+            hospital = hospitals.get(hospital_id)
+            if hospital:
+                hospital_info = {
                     "city": hospital.get("city", "Unknown"),
                     "state": hospital.get("state", "Unknown"),
                     "name": hospital.get("name", "Unknown Hospital")
                 }
-        
-        mapped = []
-        for r in recipients:
-            hospital_id = r.get("hospital_id", r.get("hospital", "Unknown"))
-            hospital_info = hospital_city_map.get(hospital_id, {
-                "city": "Unknown",
-                "state": "Unknown", 
-                "name": "Unknown Hospital"
-            })
+            else:
+                hospital_info = {
+                    "city": "Unknown",
+                    "state": "Unknown", 
+                    "name": "Unknown Hospital"
+                }
             
             mapped.append({
                 "id": r.get("recipient_id", r.get("id", "N/A")),
@@ -177,7 +383,11 @@ def get_recipients():
                 "state": hospital_info["state"],
                 "condition": r.get("medical_condition_score", "N/A")
             })
-        return jsonify(mapped)
+        return paged_response(mapped, next_cursor)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    except ArithmeticError:
+        return jsonify({"error": "numeric filters must be numbers"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -188,19 +398,103 @@ def get_recipients():
 def get_hospitals():
     try:
         _, _, hospitals_table = get_tables()
-        response = hospitals_table.scan()
-        items = response.get("Items", [])
+        items = table_cache.get(hospitals_table)
         return jsonify(items)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@api_bp.route('/hospitals/nearest', methods=['GET'])
+def get_nearest_hospitals():
+    """k nearest hospitals to a point, optionally only those transplanting an organ
+
+    Query params: lat, lon, k (default 5), organ
+    """
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        k = min(max(request.args.get('k', 5, type=int), 1), 100)
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon are required numbers"}), 400
+    try:
+        _, _, hospitals_table = get_tables()
+        nearest = get_hospital_index(hospitals_table).nearest(lat, lon, k, request.args.get('organ'))
+        return jsonify([dict(hospital, distance_km=round(distance, 1)) for distance, hospital in nearest])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route('/recipients/nearby', methods=['GET'])
+def get_nearby_recipients():
+    """Recipients within radius_km of a donor, nearest first
+
+    Query params: donor_id, radius_km (default 500), compatible (organ + blood type only), limit
+    """
+    donor_id = request.args.get('donor_id')
+    if not donor_id:
+        return jsonify({"error": "donor_id is required"}), 400
+    try:
+        radius_km = float(request.args.get('radius_km', 500))
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    except ValueError:
+        return jsonify({"error": "radius_km must be a number"}), 400
+    try:
+        donors_table, recipients_table, _ = get_tables()
+        donor = donors_table.get_item(Key={"donor_id": donor_id}).get("Item")
+        if not donor:
+            return jsonify({"error": f"Donor {donor_id} not found"}), 404
+        point = coordinates(donor)
+        if point is None:
+            return jsonify({"error": f"Donor {donor_id} has no location"}), 422
+
+        compatible = request.args.get('compatible', 'false').lower() == 'true'
+        nearby = []
+        for distance, r in get_recipient_geo_index(recipients_table).within(*point, radius_km):
+            if compatible and (
+                r.get("organ_needed", "").lower() != donor.get("organ_type", "").lower()
+                or r.get("blood_type") != donor.get("blood_type")
+            ):
+                continue
+            nearby.append({
+                "id": r.get("recipient_id"),
+                "organNeeded": r.get("organ_needed", "Unknown"),
+                "bloodType": r.get("blood_type", "Unknown"),
+                "urgency": r.get("urgency_level", "Medium"),
+                "hospital": r.get("hospital_id", "Unknown"),
+                "distanceKm": round(distance, 1)
+            })
+            if len(nearby) == limit:
+                break
+        return jsonify(nearby)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @api_bp.route('/check-viability', methods=['POST'])
 def check_viability():
     data = request.get_json()
     organ = data.get('organ', {})
     return jsonify(get_backend().check_viability(organ))
 
+@api_bp.route('/check-viability/batch', methods=['POST'])
+def check_viability_batch():
+    """Viability for a list of organs in one request, with per-item errors"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    organs = data.get('organs')
+    if not isinstance(organs, list):
+        return jsonify({"error": "'organs' must be a list"}), 400
+    if len(organs) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} organs per request"}), 400
+    
+    results = get_backend().check_viability_batch(organs)
+    return jsonify({
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "results": results
+    })
+
 @api_bp.route('/get-weather', methods=['POST'])
 def get_weather():
     """Get weather data using WeatherAPI"""
@@ -221,40 +515,36 @@ def get_weather():
                 "icon": "☀️"
             })
         
-        url = f"http://api.weatherapi.com/v1/current.json?key={weather_api_key}&q={location}"
-        
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                weather_data = response.json()
-                
-                # Extract relevant data
-                current = weather_data.get("current", {})
-                location_data = weather_data.get("location", {})
-                
-                result = {
-                    "location": location_data.get("name", location),
-                    "temperature": current.get("temp_c", 22),
-                    "condition": current.get("condition", {}).get("text", "Clear"),
-                    "humidity": current.get("humidity", 65),
-                    "wind_kph": current.get("wind_kph", 10),
-                    "icon": get_weather_icon_from_condition(current.get("condition", {}).get("text", "Clear")),
-                    "last_updated": current.get("last_updated", "")
-                }
-                
-                return jsonify(result)
-            else:
-                # API error, return simulated data
-                return jsonify({
-                    "location": location,
-                    "temperature": 22,
-                    "condition": "Clear", 
-                    "humidity": 65,
-                    "wind_kph": 10,
-                    "icon": "☀️",
-                    "error": f"Weather API returned {response.status_code}"
-                })
-                
+            # Cached per normalized location; concurrent lookups share one call
+            weather_data = fetch_current_weather(location, weather_api_key)
+            # Extract relevant data
+            current = weather_data.get("current", {})
+            location_data = weather_data.get("location", {})
+            
+            result = {
+                "location": location_data.get("name", location),
+                "temperature": current.get("temp_c", 22),
+                "condition": current.get("condition", {}).get("text", "Clear"),
+                "humidity": current.get("humidity", 65),
+                "wind_kph": current.get("wind_kph", 10),
+                "icon": get_weather_icon_from_condition(current.get("condition", {}).get("text", "Clear")),
+                "last_updated": current.get("last_updated", "")
+            }
+            
+            return jsonify(result)
+            
+        except requests.HTTPError as e:
+            # API error, return simulated data
+            return jsonify({
+                "location": location,
+                "temperature": 22,
+                "condition": "Clear", 
+                "humidity": 65,
+                "wind_kph": 10,
+                "icon": "☀️",
+                "error": f"Weather API returned {e.response.status_code}"
+            })
         except requests.RequestException as e:
             # Network error, return simulated data
             return jsonify({
@@ -301,6 +591,40 @@ def search_flights():
     destination = data.get('destination', 'LAX')
     return jsonify(get_backend().search_flights(origin, destination, data.get('date')))
 
+@api_bp.route('/route-plan', methods=['POST'])
+def route_plan():
+    """Earliest-arrival itinerary, with connections, inside the organ's viability window
+
+    Body: origin, destination, departure_after (ISO, default now), and either
+    hours_left or an organ (as for /check-viability) to derive it from
+    """
+    data = request.get_json() or {}
+    origin = data.get('origin')
+    destination = data.get('destination')
+    if not origin or not destination:
+        return jsonify({"error": "origin and destination are required"}), 400
+    try:
+        departure_after = data.get('departure_after')
+        depart_after = (
+            datetime.fromisoformat(departure_after.replace("Z", "+00:00")).timestamp()
+            if departure_after else datetime.now().timestamp()
+        )
+        hours_left = data.get('hours_left')
+        if hours_left is None and data.get('organ'):
+            viability = simulate_viability_batch([data['organ']])[0]
+            if "error" in viability:
+                return jsonify(viability), 400
+            hours_left = viability["hours_left"]
+        hours_left = None if hours_left is None else float(hours_left)
+        min_connection = float(data.get('min_connection_minutes', MIN_CONNECTION_MINUTES))
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid route request: {e}"}), 400
+    try:
+        graph = graph_for(flight_store.table())
+        return jsonify(plan_route(graph, origin, destination, depart_after, hours_left, min_connection))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @api_bp.route('/match-compatibility', methods=['POST'])
 def match_compatibility():
     data = request.get_json()
@@ -315,10 +639,42 @@ def agent_chat():
     context = data.get('context', {})
     return jsonify(get_backend().invoke_agent(msg, context))
 
+@api_bp.route('/agent-chat/stream', methods=['POST'])
+def agent_chat_stream():
+    """Stream the agent's reply as server-sent events, one per chunk"""
+    data = request.get_json()
+    msg = data.get('message', '')
+    context = data.get('context', {})
+    events = get_backend().invoke_agent_stream(msg, context)
+    
+    def sse():
+        for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+    
+    return Response(
+        stream_with_context(sse()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api_bp.route('/agent-routing', methods=['GET'])
+def agent_routing():
+    """Which path (AgentCore or direct model) is serving agent calls, and why"""
+    return jsonify(get_backend().routing_status())
+
+@api_bp.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    return jsonify({
+        "weather": weather_cache.stats(),
+        "transport_decisions": decision_cache.stats()
+    })
+
 # Health check endpoint for Vercel
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "service": "OrganMatch API"})
+    startup_timer.mark_healthy()
+    return jsonify({"status": "healthy", "service": "OrganMatch API", "startup": startup_timer.snapshot()})
 
 # AI Transport Decision endpoint
 @api_bp.route('/agent-transport-decision', methods=['POST'])
@@ -399,6 +755,15 @@ def agent_transport_decision():
         Consider organ viability time limits, donor-recipient compatibility, weather safety, flight reliability, urgency level, and severity.
         """
         
+        # Identical scenarios (ignoring the timestamp) reuse the earlier decision;
+        # after a recent AI failure they reuse its rule-based fallback
+        ai_key = decision_key("ai_agent", context, prompt)
+        cached = decision_cache.get(ai_key)
+        if cached is None:
+            cached = decision_cache.fallback(ai_key)
+        if cached is not None:
+            return jsonify(with_request_context(cached, context))
+        
         # Try to get AI agent response
         try:
             backend = get_backend()
@@ -408,19 +773,34 @@ def agent_transport_decision():
                 # Parse AI response and structure it
                 ai_text = agent_response.get('response', '')
                 decision = parse_ai_decision(ai_text, context)
+                decision_cache.set(ai_key, decision)
                 return jsonify(decision)
             else:
                 # Fallback to rule-based decision
-                return jsonify(generate_rule_based_decision(context, weather))
+                return jsonify(rule_based_fallback(ai_key, context, weather))
                 
         except Exception as e:
             print(f"AI agent error: {e}")
             # Fallback to rule-based decision
-            return jsonify(generate_rule_based_decision(context, weather))
+            return jsonify(rule_based_fallback(ai_key, context, weather))
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def with_request_context(decision, context):
+    """A cached decision, reported against the current request's context and time"""
+    served = {**decision, "context": context, "cached": True}
+    if "analysis_details" in decision:
+        served["analysis_details"] = {**decision["analysis_details"],
+                                      "assessment_time": datetime.now().isoformat()}
+    return served
+
+def rule_based_fallback(ai_key, context, weather_data):
+    """generate_rule_based_decision, served for this scenario until the AI is retried"""
+    decision = generate_rule_based_decision(context, weather_data)
+    decision_cache.mark_failed(ai_key, decision)
+    return decision
+
 def format_weather_for_prompt(weather_data):
     """Format weather data for AI prompt"""
     if not weather_data:
@@ -675,6 +1055,10 @@ def create_dynamic_transport_plan():
         data = request.get_json()
         origin_city = data.get('origin_city')
         destination_city = data.get('destination_city')
+        try:
+            max_distance_km = parse_distance_km(data.get('max_distance_km'))
+        except ValueError as e:
+            return jsonify({"error": f"max_distance_km: {e}"}), 400
         
         # Get hospital details from DynamoDB
         _, _, hospitals_table = get_tables()
@@ -682,19 +1066,23 @@ def create_dynamic_transport_plan():
         origin_hospitals = []
         dest_hospitals = []
         
-        # Get all hospitals and filter by city
+        # Look up hospitals by city in the shared index
         try:
-            response = hospitals_table.scan()
-            all_hospitals = response.get('Items', [])
-            
-            for hospital in all_hospitals:
-                hospital_city = hospital.get('city', '').lower()
-                if origin_city and hospital_city == origin_city.lower():
-                    origin_hospitals.append(hospital)
-                if destination_city and hospital_city == destination_city.lower():
-                    dest_hospitals.append(hospital)
+            hospitals = get_hospital_index(hospitals_table)
+            origin_hospitals = hospitals.in_city(origin_city)
+            dest_hospitals = hospitals.in_city(destination_city)
         except Exception as e:
-            print(f"Error scanning hospitals: {e}")
+            print(f"Error loading hospitals: {e}")
+        
+        # Optionally drop destination hospitals beyond the organ's travel radius
+        if max_distance_km is not None and origin_hospitals and dest_hospitals:
+            origin_points = [coordinates(h) or (float('nan'), float('nan')) for h in origin_hospitals]
+            dest_points = [coordinates(h) or (float('nan'), float('nan')) for h in dest_hospitals]
+            nearest_km = distance_matrix(origin_points, dest_points).min(axis=0)
+            dest_hospitals = [
+                h for h, km in zip(dest_hospitals, nearest_km.tolist())
+                if not km > max_distance_km
+            ]
         
         # Create transport plan
         plan = {
@@ -728,32 +1116,24 @@ def get_cities():
     """Get unique cities from hospitals table"""
     try:
         _, _, hospitals_table = get_tables()
-        response = hospitals_table.scan()
-        hospitals = response.get('Items', [])
         
-        # Extract unique cities
-        cities = set()
+        # One entry per city, listing every hospital in it (with or without an id)
         city_data = {}
-        
-        for hospital in hospitals:
-            city = hospital.get('city')
-            state = hospital.get('state', '')
-            
-            if city:
-                cities.add(city)
-                if city not in city_data:
-                    city_data[city] = {
-                        'city': city,
-                        'state': state,
-                        'hospitals': []
+        for city, hospitals in get_hospital_index(hospitals_table).cities().items():
+            city_data[city] = {
+                'city': city,
+                'state': hospitals[0].get('state', ''),
+                'hospitals': [
+                    {
+                        'name': hospital.get('name', 'Unknown Hospital'),
+                        'id': hospital.get('hospital_id', hospital.get('id'))
                     }
-                city_data[city]['hospitals'].append({
-                    'name': hospital.get('name', 'Unknown Hospital'),
-                    'id': hospital.get('hospital_id', hospital.get('id'))
-                })
+                    for hospital in hospitals
+                ]
+            }
         
         # Convert to list and sort
-        cities_list = [city_data[city] for city in sorted(cities)]
+        cities_list = [city_data[city] for city in sorted(city_data)]
         
         return jsonify(cities_list)
         
@@ -0,0 +1,19 @@
+import csv
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def read_csv(name):
+    with open(os.path.join(ROOT, "data", f"{name}.csv"), newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture(scope="session")
+def records():
+    """donors, recipients and hospitals from the bundled CSVs"""
+    return read_csv("donors"), read_csv("recipients"), read_csv("hospitals")
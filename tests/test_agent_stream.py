@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+
+from flask import Flask  # noqa: E402
+
+from backend import core  # noqa: E402
+from routes import api_routes  # noqa: E402
+
+
+def model_event(payload):
+    return {"chunk": {"bytes": json.dumps(payload).encode("utf-8")}}
+
+
+class FakeRuntime:
+    """bedrock-runtime whose response stream replays Anthropic messages events"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.calls = 0
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        self.calls += 1
+        events = [model_event({"type": "message_start", "message": {"role": "assistant"}}),
+                  model_event({"type": "content_block_start", "index": 0})]
+        events += [model_event({"type": "content_block_delta", "delta": {"type": "text_delta", "text": t}})
+                   for t in self.texts]
+        events += [{"metadata": {}}, model_event({"type": "message_stop"})]
+        return {"body": iter(events)}
+
+
+class FakeAgentRuntime:
+    """bedrock-agent-runtime whose completion yields chunks and traces, then optionally fails"""
+
+    def __init__(self, texts, fail_after=None):
+        self.texts = texts
+        self.fail_after = fail_after
+
+    def invoke_agent(self, **kwargs):
+        def completion():
+            for i, text in enumerate(self.texts):
+                if i == self.fail_after:
+                    raise RuntimeError("stream reset")
+                yield {"trace": {"trace": {}}}
+                yield {"chunk": {"bytes": text.encode("utf-8")}}
+            if self.fail_after is not None and self.fail_after >= len(self.texts):
+                raise RuntimeError("stream reset")
+        return {"completion": completion()}
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """POST a message to /api/agent-chat/stream; returns the parsed events"""
+    monkeypatch.setattr(core, "initialize_aws", lambda: None)
+    monkeypatch.setattr(core, "AGENTCORE_AVAILABLE", False)
+    monkeypatch.setattr(core, "AGENT_ID", "agent")
+    monkeypatch.setattr(core, "AGENT_ALIAS_ID", "alias")
+    app = Flask(__name__)
+    app.register_blueprint(api_routes.api_bp)
+    client = app.test_client()
+
+    def post(runtime, agent_runtime=None):
+        monkeypatch.setattr(core, "bedrock_runtime", runtime)
+        monkeypatch.setattr(core, "bedrock_agent_runtime", agent_runtime)
+        monkeypatch.setattr(api_routes, "backend", core.OrganMatchBackend())
+        response = client.post("/api/agent-chat/stream", json={"message": "hi"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        body = response.get_data(as_text=True)
+        assert body.endswith("\n\n")
+        frames = body[:-2].split("\n\n")
+        assert all(frame.startswith("data: ") for frame in frames)
+        return [json.loads(frame[len("data: "):]) for frame in frames]
+    return post
+
+
+def texts(events):
+    return "".join(e["text"] for e in events if e["type"] == "chunk")
+
+
+def test_direct_model_deltas_become_events(chat):
+    events = chat(FakeRuntime(["Kidney ", "match\n\nfound", " 🎉"]))
+    assert texts(events) == "Kidney match\n\nfound 🎉"
+    assert [e["type"] for e in events] == ["chunk"] * 3 + ["done"]
+    assert events[-1]["method"] == "direct_model"
+
+
+def test_agent_chunks_stream_and_skip_traces(chat):
+    runtime = FakeRuntime(["unused"])
+    events = chat(runtime, FakeAgentRuntime(["Hel", "lo"]))
+    assert texts(events) == "Hello"
+    assert events[-1] == {"type": "done", "method": "agentcore"}
+    assert runtime.calls == 0
+
+
+def test_agent_failing_before_text_falls_back(chat):
+    events = chat(FakeRuntime(["from model"]), FakeAgentRuntime(["never"], fail_after=0))
+    assert texts(events) == "from model"
+    assert events[-1]["method"] == "direct_model"
+
+
+def test_agent_failing_mid_stream_reports_error(chat):
+    runtime = FakeRuntime(["unused"])
+    events = chat(runtime, FakeAgentRuntime(["partial"], fail_after=1))
+    assert texts(events) == "partial"
+    assert events[-1] == {"type": "error", "error": "stream reset", "method": "agentcore"}
+    assert runtime.calls == 0
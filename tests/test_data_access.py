@@ -0,0 +1,80 @@
+import pytest
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+from backend.data_access import InvalidCursor, equals_any_case, parallel_scan, scan_all, scan_page  # noqa: E402
+
+
+@pytest.fixture
+def donors_table(records, monkeypatch):
+    for name, value in {"AWS_ACCESS_KEY_ID": "x", "AWS_SECRET_ACCESS_KEY": "x",
+                        "AWS_DEFAULT_REGION": "us-east-1"}.items():
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        table = boto3.resource("dynamodb", region_name="us-east-1").create_table(
+            TableName="donors", KeySchema=[{"AttributeName": "donor_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "donor_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST")
+        with table.batch_writer() as writer:
+            for row in records[0]:
+                writer.put_item(Item={k: v for k, v in row.items() if v != ""})
+        yield table
+
+
+def ids(items):
+    return [item["donor_id"] for item in items]
+
+
+def test_scan_all_follows_every_page(donors_table, records):
+    items = scan_all(donors_table, Limit=7)
+    assert sorted(ids(items)) == sorted(ids(records[0]))
+
+
+@pytest.mark.parametrize("segments", [1, 3, 4])
+def test_parallel_scan_reads_each_item_once(donors_table, records, segments):
+    items = parallel_scan(donors_table, segments, Limit=11)
+    assert sorted(ids(items)) == sorted(ids(records[0]))
+
+
+@pytest.mark.parametrize("limit", [1, 7, 100])
+def test_scan_page_cursor_resumes_without_gaps(donors_table, records, limit):
+    expected = ids(scan_all(donors_table))
+    pages, cursor = [], None
+    while True:
+        items, cursor = scan_page(donors_table, limit, cursor, projection=["blood_type"])
+        assert 0 < len(items) <= limit
+        pages.append(ids(items))
+        if not cursor:
+            break
+    assert [i for page in pages for i in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_scan_page_filter_spans_reads(donors_table):
+    """Fewer matches per read than the page needs, and pages cut mid-read"""
+    expected = ids(d for d in scan_all(donors_table) if d["organ_type"].lower() == "kidney")
+    found, cursor = [], None
+    while True:
+        items, cursor = scan_page(donors_table, 3, cursor, equals_any_case("organ_type", "kidney"))
+        found += ids(items)
+        if not cursor:
+            break
+    assert found == expected
+
+
+def test_scan_page_keep_predicate(donors_table):
+    expected = ids(d for d in scan_all(donors_table) if float(d["organ_condition_score"]) >= 80)
+    found, cursor = [], None
+    while True:
+        items, cursor = scan_page(donors_table, 4, cursor,
+                                  keep=lambda d: float(d["organ_condition_score"]) >= 80)
+        found += ids(items)
+        if not cursor:
+            break
+    assert found == expected
+
+
+def test_scan_page_rejects_foreign_cursor(donors_table):
+    with pytest.raises(InvalidCursor):
+        scan_page(donors_table, 5, "not-a-cursor")
@@ -0,0 +1,86 @@
+import importlib
+import json
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+from conftest import ROOT
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+CHUNK_ROWS = 40
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    """data/dynamo_upload.py with an empty, typed donors table under moto"""
+    for name, value in {"AWS_ACCESS_KEY_ID": "x", "AWS_SECRET_ACCESS_KEY": "x",
+                        "AWS_DEFAULT_REGION": "us-east-1"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "data"))
+    from backend.schema import ensure_table
+
+    with moto.mock_aws():
+        client = boto3.client("dynamodb", region_name="us-east-1")
+        ensure_table(client, "donors")
+        sys.modules.pop("dynamo_upload", None)
+        yield client, importlib.import_module("dynamo_upload")
+        sys.modules.pop("dynamo_upload", None)
+
+
+def test_interrupted_load_resumes_from_checkpoint(loader, records, tmp_path, monkeypatch):
+    client, dynamo_upload = loader
+    donors = records[0]
+    source = os.path.join(ROOT, "data", "donors.csv")
+    checkpoint = str(tmp_path / "donors.checkpoint.json")
+    write_chunk = dynamo_upload.write_chunk
+    failing = {donors[3 * CHUNK_ROWS]["donor_id"]}
+
+    def flaky(client, table_name, rows, types, key):
+        if rows[0]["donor_id"] in failing:
+            raise RuntimeError("throttled")
+        return write_chunk(client, table_name, rows, types, key)
+
+    monkeypatch.setattr(dynamo_upload, "write_chunk", flaky)
+    with pytest.raises(RuntimeError, match="throttled"):
+        dynamo_upload.upload(client, "donors", source, workers=2, checkpoint_path=checkpoint,
+                             chunk_rows=CHUNK_ROWS)
+    with open(checkpoint, encoding="utf-8") as f:
+        done = set(json.load(f)["done"])
+    assert done and 3 not in done
+
+    written_chunks = []
+
+    def counting(client, table_name, rows, types, key):
+        written_chunks.append(rows[0]["donor_id"])
+        return write_chunk(client, table_name, rows, types, key)
+
+    monkeypatch.setattr(dynamo_upload, "write_chunk", counting)
+    written, _ = dynamo_upload.upload(client, "donors", source, workers=2, checkpoint_path=checkpoint,
+                                      chunk_rows=CHUNK_ROWS)
+    chunks = [donors[i:i + CHUNK_ROWS] for i in range(0, len(donors), CHUNK_ROWS)]
+    remaining = [chunk for n, chunk in enumerate(chunks) if n not in done]
+    assert sorted(written_chunks) == sorted(chunk[0]["donor_id"] for chunk in remaining)
+    assert written == sum(len(chunk) for chunk in remaining)
+
+    table = boto3.resource("dynamodb", region_name="us-east-1").Table("donors")
+    from backend.data_access import scan_all
+
+    items = scan_all(table)
+    assert sorted(item["donor_id"] for item in items) == sorted(d["donor_id"] for d in donors)
+    item = next(i for i in items if i["donor_id"] == donors[0]["donor_id"])
+    assert item["organ_condition_score"] == Decimal(donors[0]["organ_condition_score"])
+    assert item["organ_blood"] == f"{donors[0]['organ_type'].lower()}#{donors[0]['blood_type']}"
+
+
+def test_checkpoint_for_other_chunking_starts_over(loader, tmp_path):
+    client, dynamo_upload = loader
+    source = os.path.join(ROOT, "data", "donors.csv")
+    checkpoint = str(tmp_path / "donors.checkpoint.json")
+    dynamo_upload.Checkpoint(checkpoint, source, "donors", CHUNK_ROWS).mark(0)
+    assert dynamo_upload.Checkpoint(checkpoint, source, "donors", CHUNK_ROWS).done == {0}
+    assert dynamo_upload.Checkpoint(checkpoint, source, "donors", CHUNK_ROWS * 2).done == set()
+    assert dynamo_upload.Checkpoint(checkpoint, source, "recipients", CHUNK_ROWS).done == set()
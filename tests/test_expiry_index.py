@@ -0,0 +1,20 @@
+from backend.expiry_index import ExpiryIndex, compute_expiry
+
+
+def test_non_finite_inputs_do_not_break_the_order(records):
+    donors = [dict(d) for d in records[0]]
+    donors[0]["organ_condition_score"] = "nan"
+    donors[1]["organ_condition_score"] = "inf"
+    donors[2]["temperature"] = "NaN"
+    donors[0].pop("available_until", None)
+    assert compute_expiry(donors[0]) is None
+    assert compute_expiry(donors[1]) == compute_expiry({"available_until": donors[1].get("available_until")})
+
+    index = ExpiryIndex(donors)
+    index.upsert(dict(donors[3], organ_condition_score="nan", available_until=""))
+    order = index._order
+    assert order == sorted(order)
+    assert donors[0]["donor_id"] not in index._entries
+    assert donors[3]["donor_id"] not in index._entries
+    expiries = [expiry for expiry, _ in index.soonest(len(donors), now=0)]
+    assert expiries == sorted(expiries) and len(expiries) == len(index)
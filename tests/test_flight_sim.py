@@ -0,0 +1,21 @@
+from backend.flight_data import normalize_simulated
+from backend.flight_sim import AIRPORTS, simulate_flight_search
+
+
+def test_overnight_arrivals_carry_a_day_marker():
+    overnight = 0
+    for origin in AIRPORTS[:10]:
+        for destination in AIRPORTS[:10]:
+            if origin == destination:
+                continue
+            flights = simulate_flight_search(origin, destination, "2026-03-01")["flights"]
+            by_duration = normalize_simulated(flights, origin, destination, "2026-03-01")
+            # Without durations the arrival string alone must give the same times
+            by_arrival = normalize_simulated([dict(f, duration="") for f in flights],
+                                             origin, destination, "2026-03-01")
+            for flight, a, b in zip(flights, by_duration, by_arrival):
+                assert a["arrival"] == b["arrival"] > a["departure"]
+                if flight["arrival"] < flight["departure"]:
+                    assert flight["arrival"].endswith("+1")
+                overnight += flight["arrival"].endswith("+1")
+    assert overnight
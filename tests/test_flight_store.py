@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+
+from backend.flight_data import FlightTable, normalize_mock
+from backend.flight_sim import generate_schedule
+from backend.flight_store import FlightScheduleStore
+
+
+class FakeS3:
+    def __init__(self, flights=None):
+        self.flights = flights
+        self.calls = 0
+
+    def get_object(self, **params):
+        self.calls += 1
+        if self.flights is None:
+            raise ConnectionError("S3 unreachable")
+        return {"Body": io.BytesIO(json.dumps(self.flights).encode("utf-8")), "ETag": '"v1"'}
+
+
+def test_failed_first_load_backs_off():
+    s3 = FakeS3()
+    store = FlightScheduleStore(s3_client=s3, retry_after=60)
+    with pytest.raises(ConnectionError):
+        store.refresh()
+    # Within the backoff the planners get the local cache without another GET
+    table = store.table()
+    assert isinstance(table, FlightTable)
+    assert store.flights("BOS", "LAX") == []
+    assert s3.calls == 1
+
+    s3.flights = generate_schedule(50)
+    assert store.refresh(force=True)
+    assert s3.calls == 2
+
+
+def test_records_use_the_normalized_schema():
+    rows = normalize_mock(generate_schedule(50))
+    table = FlightTable(rows)
+    records = table.records(range(len(table)))
+    assert all(record.keys() == rows[0].keys() for record in records)
+    assert sorted((r["flight_number"], r["origin"], r["destination"]) for r in records) == sorted(
+        (r["flight_number"], r["origin"], r["destination"]) for r in rows)
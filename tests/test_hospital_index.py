@@ -0,0 +1,35 @@
+from backend.hospital_index import HospitalIndex
+
+
+def grouped(hospitals):
+    """/api/cities grouping as it was computed from the scan: exact city names, every hospital"""
+    cities = {}
+    for hospital in hospitals:
+        if hospital.get("city"):
+            cities.setdefault(hospital["city"], []).append(hospital)
+    return cities
+
+
+def test_cities_matches_scan_grouping(records):
+    hospitals = [dict(h) for h in records[2]]
+    hospitals[1]["city"] = hospitals[0]["city"].upper()
+    hospitals.append({"name": "No Id General", "city": hospitals[0]["city"], "state": "MA"})
+    index = HospitalIndex(hospitals)
+    assert index.cities() == grouped(hospitals)
+
+    # Updates keep each hospital's place; removals drop it
+    changed = dict(hospitals[0], name="Renamed")
+    index.upsert(changed)
+    index.remove(hospitals[2]["hospital_id"])
+    expected = [changed] + [h for h in hospitals[1:] if h is not hospitals[2]]
+    assert index.cities() == grouped(expected)
+
+
+def test_in_city_keeps_scan_order_through_updates(records):
+    hospitals = [dict(h, city="Springfield") for h in records[2][:5]]
+    index = HospitalIndex(hospitals)
+    index.upsert(dict(hospitals[0], name="Renamed"))
+    index.upsert({"hospital_id": "H-new", "city": "springfield"})
+    assert [h["hospital_id"] for h in index.in_city("SPRINGFIELD")] == (
+        [h["hospital_id"] for h in hospitals] + ["H-new"])
+    assert index.in_city("springfield")[0]["name"] == "Renamed"
@@ -0,0 +1,82 @@
+import random
+
+from backend.distances import HospitalDistances
+from backend.matching import IncrementalMatcher, MatchingEngine
+
+
+def pairs(matches):
+    return {(m["donor_id"], m["recipient_id"]): m for m in matches}
+
+
+def full_match(hospitals, donors, recipients, **kwargs):
+    engine = MatchingEngine(hospitals, **kwargs)
+    engine.add_recipients(recipients)
+    return pairs(engine.match(donors))
+
+
+def test_matches_full_recompute_after_random_changes(records):
+    donors, recipients, hospitals = records
+    rng = random.Random(7)
+    distances = HospitalDistances(hospitals, path=None)
+    matcher = IncrementalMatcher(hospitals, distances=distances)
+    matcher.load(donors, recipients)
+    current = pairs(matcher.all_matches())
+    assert current == full_match(hospitals, donors, recipients, distances=distances)
+
+    live_donors = {d["donor_id"]: d for d in donors}
+    live_recipients = {r["recipient_id"]: r for r in recipients}
+    organs = sorted({d["organ_type"] for d in donors})
+    blood_types = sorted({d["blood_type"] for d in donors})
+    for step in range(400):
+        action = rng.random()
+        if action < 0.3:
+            donor = dict(rng.choice(donors), donor_id=f"D-new-{step}", organ_type=rng.choice(organs),
+                         blood_type=rng.choice(blood_types))
+            live_donors[donor["donor_id"]] = donor
+            delta = matcher.upsert_donor(donor)
+        elif action < 0.5 and live_donors:
+            donor_id = rng.choice(sorted(live_donors))
+            del live_donors[donor_id]
+            delta = matcher.remove_donor(donor_id)
+        elif action < 0.8:
+            recipient = dict(rng.choice(recipients), urgency_level=str(rng.randint(1, 5)),
+                             blood_type=rng.choice(blood_types))
+            live_recipients[recipient["recipient_id"]] = recipient
+            delta = matcher.upsert_recipient(recipient)
+        elif live_recipients:
+            recipient_id = rng.choice(sorted(live_recipients))
+            del live_recipients[recipient_id]
+            delta = matcher.remove_recipient(recipient_id)
+        else:
+            continue
+
+        # Applying the delta to the previous state gives the new state
+        for match in delta["removed"]:
+            del current[(match["donor_id"], match["recipient_id"])]
+        for match in delta["added"] + delta["changed"]:
+            current[(match["donor_id"], match["recipient_id"])] = match
+        assert current == pairs(matcher.all_matches())
+
+    expected = full_match(hospitals, list(live_donors.values()), list(live_recipients.values()),
+                          distances=distances)
+    assert pairs(matcher.all_matches()) == expected
+
+
+def test_radius_matches_full_recompute(records):
+    donors, recipients, hospitals = records
+    matcher = IncrementalMatcher(hospitals, max_distance_km=1500)
+    matcher.load(donors, recipients)
+    assert pairs(matcher.all_matches()) == full_match(hospitals, donors, recipients, max_distance_km=1500)
+
+
+def test_removals_leave_no_empty_entries(records):
+    donors, recipients, hospitals = records
+    matcher = IncrementalMatcher(hospitals)
+    matcher.load(donors, recipients)
+    for donor in donors:
+        matcher.remove_donor(donor["donor_id"])
+    for recipient in recipients:
+        matcher.remove_recipient(recipient["recipient_id"])
+    assert not matcher.donors and not matcher.recipients
+    assert not matcher.donor_buckets and not matcher.recipient_buckets
+    assert not matcher.by_donor and not matcher.by_recipient
@@ -0,0 +1,80 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+from boto3.dynamodb.types import TypeSerializer  # noqa: E402
+
+KEYS = {"donors": "donor_id", "recipients": "recipient_id", "hospitals": "hospital_id"}
+
+
+@pytest.fixture
+def matcher_lambda(records, monkeypatch):
+    for name, value in {"AWS_ACCESS_KEY_ID": "x", "AWS_SECRET_ACCESS_KEY": "x",
+                        "AWS_DEFAULT_REGION": "us-east-1"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "lambdas"))
+    with moto.mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        for name, rows in zip(("donors", "recipients", "hospitals"), records):
+            table = dynamodb.create_table(
+                TableName=name, KeySchema=[{"AttributeName": KEYS[name], "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": KEYS[name], "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST")
+            with table.batch_writer() as writer:
+                for row in rows:
+                    writer.put_item(Item={k: v for k, v in row.items() if v != ""})
+        sys.modules.pop("lambda_matcher_tool", None)
+        yield importlib.import_module("lambda_matcher_tool")
+        sys.modules.pop("lambda_matcher_tool", None)
+
+
+def stream_record(table, event_name, image):
+    serializer = TypeSerializer()
+    key = KEYS[table]
+    change = {"Keys": {key: serializer.serialize(image[key])}}
+    if event_name != "REMOVE":
+        change["NewImage"] = {k: serializer.serialize(v) for k, v in image.items() if v != ""}
+    return {"eventName": event_name, "dynamodb": change,
+            "eventSourceARN": f"arn:aws:dynamodb:us-east-1:123456789012:table/{table}/stream/2025-01-01T00:00:00"}
+
+
+def test_stream_records_update_matches_incrementally(matcher_lambda, records):
+    donors, recipients, _ = records
+    full = json.loads(matcher_lambda.lambda_handler({}, None)["body"])
+    matcher = matcher_lambda.get_matcher()
+    assert len(matcher.all_matches()) == full["matches_found"]
+
+    donor = donors[0]
+    body = json.loads(matcher_lambda.lambda_handler(
+        {"Records": [stream_record("donors", "REMOVE", donor)]}, None)["body"])
+    assert body["removed"] == len([m for m in full["matches"] if m["donor_id"] == donor["donor_id"]])
+    assert not matcher.donor_matches(donor["donor_id"])
+
+    body = json.loads(matcher_lambda.lambda_handler(
+        {"Records": [stream_record("donors", "INSERT", donor)]}, None)["body"])
+    assert body["removed"] == 0 and body["added"] == len(matcher.donor_matches(donor["donor_id"])) > 0
+    assert len(matcher.all_matches()) == full["matches_found"]
+
+    # A hospitals record (or any other table) is ignored
+    body = json.loads(matcher_lambda.lambda_handler(
+        {"Records": [stream_record("hospitals", "REMOVE", {"hospital_id": "H001"})]}, None)["body"])
+    assert body == {"added": 0, "removed": 0, "changed": 0, "delta": {"added": [], "removed": [], "changed": []}}
+
+
+def test_max_distance_km_is_coerced_and_validated(matcher_lambda):
+    everywhere = json.loads(matcher_lambda.lambda_handler({}, None)["body"])["matches_found"]
+    response = matcher_lambda.lambda_handler({"max_distance_km": "500"}, None)
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["matches_found"] < everywhere
+
+    for bad in ("far", "nan", -1, [500]):
+        response = matcher_lambda.lambda_handler({"max_distance_km": bad}, None)
+        assert response["statusCode"] == 400, bad
+        assert "max_distance_km" in json.loads(response["body"])["error"]
@@ -0,0 +1,33 @@
+import math
+
+from backend.matching import calculate_match_score
+from backend.registry import Registry
+
+
+def test_fractional_urgency_scores_like_calculate_match_score(records):
+    donors, recipients, hospitals = records
+    recipients = [dict(r) for r in recipients]
+    for recipient, urgency in zip(recipients, ["3.5", "2.25", "4.7", "1.05", "0.3"] * len(recipients)):
+        recipient["urgency_level"] = urgency
+    registry = Registry(donors, recipients, hospitals)
+    by_id = {r["recipient_id"]: r for r in recipients}
+
+    checked = 0
+    for donor in donors[:50]:
+        rows, scores = registry.candidates(donor["donor_id"])
+        for recipient_id, score in zip(registry.recipients.ids[rows].tolist(), scores.tolist()):
+            assert round(score, 2) == calculate_match_score(donor, by_id[recipient_id])
+            checked += 1
+    assert checked
+    assert registry.recipients.record(registry.recipients.index[recipients[0]["recipient_id"]])[
+        "urgency_level"] == 3.5
+
+
+def test_missing_urgency_scores_as_one(records):
+    donors, recipients, hospitals = records
+    recipients = [dict(r) for r in recipients]
+    for recipient in recipients:
+        recipient["urgency_level"] = ""
+    registry = Registry(donors, recipients, hospitals)
+    assert math.isnan(registry.recipients.numbers("urgency_level")[0])
+    assert (registry.recipient_columns([0, 1])["urgency_level"] == 1.0).all()
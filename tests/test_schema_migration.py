@@ -0,0 +1,107 @@
+import importlib
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+from conftest import ROOT
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+
+@pytest.fixture
+def legacy_tables(records, monkeypatch):
+    """donors and recipients holding the CSV rows as strings, GSIs added afterwards
+
+    The first recipient's urgency_level is "high", which cannot become an
+    index key.
+    """
+    for name, value in {"AWS_ACCESS_KEY_ID": "x", "AWS_SECRET_ACCESS_KEY": "x",
+                        "AWS_DEFAULT_REGION": "us-east-1"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "data"))
+    from backend import schema
+
+    monkeypatch.setattr(schema, "_status", {})
+    with moto.mock_aws():
+        client = boto3.client("dynamodb", region_name="us-east-1")
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        tables = {}
+        for name, rows in zip(("donors", "recipients"), records):
+            key = schema.TABLES[name]["key"]
+            tables[name] = dynamodb.create_table(
+                TableName=name, KeySchema=[{"AttributeName": key, "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": key, "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST")
+            with tables[name].batch_writer() as writer:
+                for row in rows:
+                    writer.put_item(Item={k: v for k, v in row.items() if v != ""})
+        tables["recipients"].update_item(Key={"recipient_id": records[1][0]["recipient_id"]},
+                                          UpdateExpression="SET urgency_level = :u",
+                                          ExpressionAttributeValues={":u": "high"})
+        for name in tables:
+            schema.ensure_table(client, name)
+        sys.modules.pop("migrate_schema", None)
+        yield client, tables, importlib.import_module("migrate_schema")
+        sys.modules.pop("migrate_schema", None)
+
+
+def test_unparseable_index_key_is_reported_not_rewritten(legacy_tables, records):
+    client, tables, migrate_schema = legacy_tables
+    from backend import schema
+
+    recipients = tables["recipients"]
+    scanned, rewritten, skipped = migrate_schema.migrate(client, recipients)
+    assert scanned == len(records[1]) and rewritten == scanned - 1
+    assert skipped == {records[1][0]["recipient_id"]: ["urgency_level"]}
+    kept = recipients.get_item(Key={"recipient_id": records[1][0]["recipient_id"]})["Item"]
+    assert kept["urgency_level"] == "high"
+    # An index alone does not make the table queryable: the tag is written only once nothing was skipped
+    assert not schema.index_available(recipients, schema.RECIPIENT_BUCKET_INDEX)
+
+    recipients.update_item(Key={"recipient_id": records[1][0]["recipient_id"]},
+                           UpdateExpression="SET urgency_level = :u", ExpressionAttributeValues={":u": Decimal(5)})
+    assert migrate_schema.migrate(client, recipients)[1:] == (1, {})
+    schema.mark_migrated(client, "recipients")
+    # The negative answer is cached until SCHEMA_RECHECK_SECONDS pass
+    assert not schema.index_available(recipients, schema.RECIPIENT_BUCKET_INDEX)
+    schema._status.clear()
+    assert schema.index_available(recipients, schema.RECIPIENT_BUCKET_INDEX)
+
+
+def test_numeric_minimum_matches_before_and_after_migration(legacy_tables, records):
+    client, tables, migrate_schema = legacy_tables
+    from backend import schema
+    from routes.api_routes import ORGAN_FIELDS, bucket_page
+
+    donors = tables["donors"]
+    expected = sorted(d["donor_id"] for d in records[0] if float(d["organ_condition_score"]) >= 70)
+
+    def matching(organ=None, blood_type=None):
+        found, cursor = [], None
+        while True:
+            items, cursor = bucket_page(donors, schema.DONOR_BUCKET_INDEX, 100, cursor, organ, blood_type, [],
+                                        ORGAN_FIELDS, minimums={"organ_condition_score": "70"})
+            found += [item["donor_id"] for item in items]
+            if not cursor:
+                return sorted(found)
+
+    assert matching() == expected
+    migrate_schema.migrate(client, donors)
+    schema.mark_migrated(client, "donors")
+    schema._status.clear()
+    assert matching() == expected
+
+    donor = records[0][0]
+    in_bucket = sorted(
+        d["donor_id"] for d in records[0]
+        if d["donor_id"] in expected and d["organ_type"].lower() == donor["organ_type"].lower()
+        and d["blood_type"] == donor["blood_type"]
+    )
+    assert matching(donor["organ_type"], donor["blood_type"]) == in_bucket
+
+    with pytest.raises(ArithmeticError):
+        bucket_page(donors, schema.DONOR_BUCKET_INDEX, 5, None, None, None, [], ORGAN_FIELDS,
+                    minimums={"organ_condition_score": "nan"})
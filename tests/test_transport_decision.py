@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("flask")
+
+from flask import Flask  # noqa: E402
+
+from backend.decision_cache import DecisionCache  # noqa: E402
+from routes import api_routes  # noqa: E402
+
+SCENARIO = {
+    "organ": {"type": "kidney", "donorId": "D001", "urgency": "high"},
+    "route": {"origin": {"city": "Boston"}, "destination": {"city": "Chicago"}},
+    "flight": {"flightNumber": "AA100", "duration": "2h"},
+    "weather": [],
+    "recipientId": "R001",
+    "severity": "high",
+}
+
+
+class FailingAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_agent(self, prompt, context=None):
+        self.calls += 1
+        return {"success": False, "error": "unavailable"}
+
+
+@pytest.fixture
+def post(monkeypatch):
+    cache = DecisionCache(path=None)
+    agent = FailingAgent()
+    monkeypatch.setattr(api_routes, "decision_cache", cache)
+    monkeypatch.setattr(api_routes, "backend", agent)
+    app = Flask(__name__)
+    app.register_blueprint(api_routes.api_bp)
+    client = app.test_client()
+
+    def post(timestamp):
+        response = client.post("/api/agent-transport-decision", json=dict(SCENARIO, timestamp=timestamp))
+        assert response.status_code == 200
+        return response.get_json()
+    post.cache, post.agent = cache, agent
+    return post
+
+
+def test_rule_based_fallback_is_reused_with_a_fresh_time(post):
+    first = post("2026-01-01T00:00:00")
+    assert first["source"] == "rule_based" and "cached" not in first
+    second = post("2026-01-01T00:05:00")
+    assert second["cached"] and second["recommendation"] == first["recommendation"]
+    assert second["context"]["timestamp"] == "2026-01-01T00:05:00"
+    assert second["analysis_details"]["assessment_time"] > first["analysis_details"]["assessment_time"]
+    # The AI is not retried while the failure is fresh, and each request is one lookup
+    assert post.agent.calls == 1
+    stats = post.cache.stats()
+    assert stats["hits"] + stats["misses"] == 2